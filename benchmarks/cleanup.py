@@ -0,0 +1,85 @@
+"""Cleanup cost per page: one compiled traversal vs. one traversal per rule.
+
+Usage: python benchmarks/cleanup.py [--limit N] [--repeat N]
+"""
+
+import argparse
+import time
+from copy import deepcopy
+
+from common import pages, report
+from lxml import html
+
+from cppref.core.cppreference.cppreference import cleanup
+
+
+def legacy_cleanup(body: html.HtmlElement):
+    """The cleanup as it was done before, walking the tree once per rule."""
+    for element in body.xpath("//*[@id='toc']"):
+        element.drop_tree()
+    for element in body.xpath("//comment()"):
+        element.drop_tree()
+    for clazz in (
+        "t-navbar",
+        "t-page-template",
+        "editsection",
+        "noprint",
+        "ambox",
+        "t-image",
+        "t-inheritance-diagram",
+        "t-plot",
+        "t-template-editlink",
+    ):
+        for element in body.find_class(clazz):
+            element.drop_tree()
+    for element in body.cssselect("[style]"):
+        if "display:none" in element.get("style", ""):
+            element.drop_tree()
+    for element in body.xpath('.//table[contains(@class, "mw-collapsible") or contains(@class, "mw-collapsed")]'):  # fmt: off
+        span = html.Element("span")
+        span.text = "There should be a table, but it's too crowded."
+        parent = element.getparent()
+        if parent is not None:
+            index = parent.index(element)
+            parent.remove(element)
+            parent.insert(index, span)
+
+
+def body_of(document: str) -> html.HtmlElement:
+    doc = html.fromstring(document, parser=html.HTMLParser(encoding="utf-8"))
+    return doc.xpath("//div[@id='mw-content-text']")[0]
+
+
+def measure(fn, bodies: list[html.HtmlElement], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        copies = [deepcopy(b) for b in bodies]
+        start = time.perf_counter()
+        for body in copies:
+            fn(body)
+        best = min(best, time.perf_counter() - start)
+    return best / len(bodies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bodies = [body_of(p) for p in pages(args.limit)]
+    for body in bodies:
+        before, after = deepcopy(body), deepcopy(body)
+        legacy_cleanup(before)
+        cleanup(after)
+        assert html.tostring(before) == html.tostring(after), "Cleanup mismatch"
+
+    rows = [
+        ("legacy (per rule)", measure(legacy_cleanup, bodies, args.repeat)),
+        ("compiled (single pass)", measure(cleanup, bodies, args.repeat)),
+    ]
+    report(f"cleanup cost per page over {len(bodies)} page(s)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Shared helpers of the benchmarks.
+
+The benchmarks render the pages cached by ``cppref fetch`` when they exist,
+otherwise a synthetic page shaped like a cppreference reference page.
+"""
+
+import sys
+import time
+from typing import Callable, Iterable
+
+from cppref.conf import ConfContext
+
+_SECTION = """\
+<div class="t-navbar"><div class="t-navbar-head"><a href="#">C++</a></div></div>
+<!-- section {index} -->
+<h3><span class="mw-headline">Section {index}</span><span class="editsection">[edit]</span></h3>
+<table class="t-dcl-begin"><tbody>
+<tr class="t-dsc-header"><td>Defined in header <code>&lt;vector&gt;</code></td><td></td><td></td></tr>
+<tr class="t-dcl-sep"><td></td><td></td><td></td></tr>
+<tr class="t-dcl"><td><span class="mw-geshi cpp">template&lt;class T&gt;
+class vector;</span></td><td>(1)</td><td><span class="t-mark-rev">(since C++98)</span></td></tr>
+</tbody></table>
+<p>Paragraph {index} with <a href="#">a link</a> and <code>code</code>.<span class="noprint">hidden</span></p>
+<div class="ambox">incomplete</div>
+<div class="t-image">image</div>
+<span style="display:none">invisible</span>
+<table class="t-dsc-begin"><tbody>
+<tr class="t-dsc"><td><div class="t-lines"><span>at</span><span>operator[]</span></div></td><td>access specified element
+<table class="t-rev-begin"><tbody>
+<tr><td><p><code>Allocator::pointer</code></p></td><td><span>(until C++11)</span></td></tr>
+<tr><td><p><code>pointer</code></p></td><td><span>(since C++11)</span></td></tr>
+</tbody></table><span class="editsection noprint">[edit]</span></td></tr>
+<tr class="t-dsc"><td><code>size</code></td><td>returns the number of elements</td></tr>
+</tbody></table>
+<table class="wikitable"><tbody><tr><th>A</th><th>B</th><th>C</th></tr><tr><td>1</td><td>2</td><td>3</td></tr></tbody></table>
+<table class="mw-collapsible"><tbody><tr><td>collapsible</td></tr></tbody></table>
+<dl><dd>definition <i>italic</i><ul><li>one</li><li>two</li></ul></dd></dl>
+<div class="t-example"><div class="t-example-live-link">Run this code</div><div class="mw-geshi">int main() {{ return 0; }}</div></div>
+"""
+
+
+def synthetic_page(sections: int = 40) -> str:
+    body = "".join(_SECTION.format(index=i) for i in range(sections))
+    return f"""<!DOCTYPE html>
+<html><head><title>std::vector</title><script>var a = 1;</script></head>
+<body><div id="mw-head">head</div>
+<div id="cpp-content-base"><div id="content">
+<h1 id="firstHeading" class="firstHeading">std::vector</h1>
+<div id="bodyContent"><div id="mw-content-text" class="mw-content-ltr">
+<table id="toc"><tbody><tr><td>Contents</td></tr></tbody></table>
+{body}
+</div></div></div></div><div id="footer">footer</div></body></html>"""
+
+
+def pages(limit: int) -> list[str]:
+    root = ConfContext.html_root()
+    files = sorted(root.glob("cppreference*.html"))[:limit] if root.is_dir() else []
+    if len(files) == 0:
+        return [synthetic_page()]
+    return [f.read_text(encoding="utf-8") for f in files]
+
+
+def timeit(fn: Callable[[], object], repeat: int) -> float:
+    """Best wall time of `repeat` runs in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(title: str, rows: Iterable[tuple[str, float]]):
+    print(title, file=sys.stdout)
+    for name, seconds in rows:
+        print(f"  {name:<24} {seconds * 1e3:10.3f} ms", file=sys.stdout)
@@ -0,0 +1,62 @@
+"""Parse time and python memory per page, decoded text against mapped bytes.
+
+Usage: python benchmarks/parse.py [--limit N] [--repeat N]
+"""
+
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from common import report, synthetic_page, timeit
+from lxml import html
+
+from cppref.conf import ConfContext
+from cppref.core.cppreference.cppreference import _content
+from cppref.utils import Utils
+
+
+def legacy(path: Path):
+    document = Utils.read_file(path)
+    doc = html.fromstring(document, parser=html.HTMLParser(encoding="utf-8"))
+    return doc.xpath("/html/body/div[@id='cpp-content-base']/div[@id='content']")[0]
+
+
+def mapped(path: Path):
+    with Utils.map_file(path) as document:
+        return _content(document)[0]
+
+
+def peak(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, ret = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ret
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        root = ConfContext.html_root()
+        files = sorted(root.glob("cppreference*.html"))[: args.limit] if root.is_dir() else []  # fmt: off
+        if len(files) == 0:
+            files = [Path(temp).joinpath("synthetic.html")]
+            files[0].write_text(synthetic_page(), encoding="utf-8")
+
+        rows, peaks = list[tuple[str, float]](), list[tuple[str, float]]()
+        for name, fn in (("read + fromstring", legacy), ("mmap + reused parser", mapped)):  # fmt: off
+            rows.append((name, timeit(lambda: [fn(f) for f in files], args.repeat) / len(files)))  # fmt: off
+            peaks.append((name, max(peak(lambda: fn(f)) for f in files)))
+        report(f"parse time per page over {len(files)} page(s)", rows)
+        print("python memory peak per page")
+        for name, size in peaks:
+            print(f"  {name:<24} {size / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Render time per page of the cppreference processor.
+
+Usage: python benchmarks/render.py [--limit N] [--repeat N]
+"""
+
+import argparse
+
+from common import pages, report, timeit
+
+from cppref.core.cppreference import process
+from cppref.typing_ import Record
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = pages(args.limit)
+    record = Record(1, "std::vector", "https://en.cppreference.com/w/cpp/container/vector.html")  # fmt: off
+
+    def render():
+        for document in documents:
+            process(document, record)
+
+    seconds = timeit(render, args.repeat) / len(documents)
+    report(f"render time per page over {len(documents)} page(s)", [("process", seconds)])
+
+
+if __name__ == "__main__":
+    main()
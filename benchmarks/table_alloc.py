@@ -0,0 +1,82 @@
+"""Allocations of rendering large reference tables, measured with tracemalloc.
+
+Usage: python benchmarks/table_alloc.py [--rows N]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from lxml.etree import strip_tags
+from lxml.html import fromstring
+
+from cppref.core.cppreference.table import _tabinfo, table
+from cppref.core.cppreference.table.base import Table
+from cppref.core.cppreference.table.t_dsc_begin import TDscBegin
+from cppref.core.cppreference.table.t_general import DscTable, WikiTable
+from cppref.core.cppreference.table.width import table_width
+
+
+def dsctable(rows: int) -> str:
+    cells = "".join(f"<tr><td><code>fn{i}</code></td><td>{i}</td><td>does {i}</td></tr>" for i in range(rows))  # fmt: off
+    return f'<table class="dsctable"><tr><th>Name</th><th>Value</th><th>Effect</th></tr>{cells}</table>'  # fmt: off
+
+
+def wikitable(rows: int) -> str:
+    cells = "".join(f"<tr><td>{i}</td><td>a</td><td>b</td><td>c</td></tr>" for i in range(rows))  # fmt: off
+    return f'<table class="wikitable"><tr><th>A</th><th>B</th><th>C</th><th>D</th></tr>{cells}</table>'  # fmt: off
+
+
+def t_dsc_begin(rows: int) -> str:
+    nested = '<table class="t-rev-begin"><tr><td>x</td><td>(C++11)</td></tr><tr><td>y</td><td>(C++17)</td></tr></table>'  # fmt: off
+    cells = "".join(f"<tr><td><code>fn{i}</code></td><td>does {i} {nested}</td></tr>" for i in range(rows))  # fmt: off
+    return f'<table class="t-dsc-begin">{cells}</table>'
+
+
+def layout(cls: type[Table], html: str) -> tuple[int, int]:
+    """Blocks and bytes held by the layout of the table."""
+    element = fromstring(html)
+    strip_tags(element, "tbody")
+    width = table_width(element)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    info = cls(element).normal(width, _tabinfo)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del info
+    return sum(s.count_diff for s in stats), sum(s.size_diff for s in stats)
+
+
+def render(html: str) -> tuple[int, float]:
+    """Peak bytes and seconds of rendering the table."""
+    element = fromstring(html)
+    tracemalloc.start()
+    table(element)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    element = fromstring(html)
+    start = time.perf_counter()
+    table(element)
+    return peak, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'table':<12} {'layout blocks':>14} {'layout KiB':>11} {'peak KiB':>10} {'time ms':>9}")  # fmt: off
+    for name, cls, build in (
+        ("dsctable", DscTable, dsctable),
+        ("wikitable", WikiTable, wikitable),
+        ("t-dsc-begin", TDscBegin, t_dsc_begin),
+    ):
+        html = build(args.rows)
+        blocks, size = layout(cls, html)
+        peak, seconds = render(html)
+        print(f"{name:<12} {blocks:>14} {size / 1024:>11.1f} {peak / 1024:>10.1f} {seconds * 1e3:>9.2f}")  # fmt: off
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-from cppref.typing_ import Format, Record, Source
+from cppref.typing_ import Engine, Format, Record, Source
 
 __all__ = [
+    "Engine",
     "Format",
     "Record",
     "Source",
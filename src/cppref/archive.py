@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Collection, Iterator, Optional
+from urllib.parse import unquote, urlsplit
+
+from cppref.typing_ import Record
+from cppref.utils import Utils
+
+_SUFFIXES = (".html", ".htm")
+
+
+class ArchiveContext:
+    """The web pages of an offline copy of the site, a directory, a zip or a (compressed) tar.
+
+    The members are read one at a time as they come in the archive, nothing is
+    extracted. A tar is streamed, i.e. read through once for the names of its
+    members and once again for their contents.
+    """
+
+    def __init__(self, path: Path) -> None:
+        assert path.exists(), f"{path} does not exist!"
+        self._path = path
+        self._zip: Optional[zipfile.ZipFile] = None
+        if path.is_dir():
+            self._kind = "dir"
+        elif zipfile.is_zipfile(path):
+            self._kind = "zip"
+        elif tarfile.is_tarfile(path):
+            self._kind = "tar"
+        else:
+            raise AssertionError(f"{path} is neither a directory, a zip nor a tar")
+
+    def __enter__(self) -> ArchiveContext:
+        if self._kind == "zip":
+            self._zip = zipfile.ZipFile(self._path)
+        return self
+
+    def __exit__(self, __1__, __2__, __3__):
+        if self._zip is not None:
+            self._zip.close()
+        return False
+
+    def names(self) -> list[str]:
+        """The names of the web pages in the archive, i.e. their paths in it."""
+        if self._kind == "dir":
+            names = (p.relative_to(self._path).as_posix() for p in self._path.rglob("*") if p.is_file())  # fmt: off
+        elif self._kind == "zip":
+            assert self._zip is not None, "Not entered"
+            names = (info.filename for info in self._zip.infolist() if not info.is_dir())
+        else:
+            with tarfile.open(self._path, "r|*") as tar:
+                names = [member.name for member in tar if member.isfile()]
+        return [name for name in names if name.lower().endswith(_SUFFIXES)]
+
+    def read(self, names: Collection[str]) -> Iterator[tuple[str, bytes]]:
+        """The contents of the members named, in the order of the archive."""
+        if self._kind == "dir":
+            for name in names:
+                yield name, self._path.joinpath(name).read_bytes()
+        elif self._kind == "zip":
+            assert self._zip is not None, "Not entered"
+            for info in self._zip.infolist():
+                if info.filename in names:
+                    yield info.filename, self._zip.read(info)
+        else:
+            with tarfile.open(self._path, "r|*") as tar:
+                for member in tar:
+                    if member.name in names and (file := tar.extractfile(member)) is not None:  # fmt: off
+                        yield member.name, file.read()
+
+    @staticmethod
+    def match(records: list[Record], names: list[str]) -> dict[str, list[Record]]:
+        """The records of each member, by the whole path of the page in the wiki.
+
+        The path of a member past the directory of the language of the site is the
+        path of a url past /w/, e.g. reference/en/cpp/container/vector.html is the
+        page of https://en.cppreference.com/w/cpp/container/vector. The records
+        without such a member are not in the archive.
+        """
+        languages = {ArchiveContext._language(r.url) for r in records}
+        members = dict[tuple[str, tuple[str, ...]], str]()
+        for name in sorted(names, key=lambda n: (n.count("/"), n)):  # the shallowest first
+            segments = ArchiveContext._segments(name)
+            # the directory of the language is the first one named so
+            if (root := next((i for i, s in enumerate(segments[:-1]) if s in languages), None)) is not None:  # fmt: off
+                members.setdefault((segments[root], segments[root + 1 :]), name)
+
+        matched = dict[str, list[Record]]()
+        for record in records:
+            path = unquote(urlsplit(Utils.canonical(record.url)).path)
+            if not path.startswith("/w/"):
+                continue
+            key = (ArchiveContext._language(record.url), ArchiveContext._segments(path.removeprefix("/w/")))  # fmt: off
+            if (name := members.get(key)) is not None:
+                matched.setdefault(name, []).append(record)
+        return matched
+
+    @staticmethod
+    def _language(url: str) -> str:
+        """The language of the site of url, i.e. the first label of its host, e.g. en."""
+        return (urlsplit(url).hostname or "").split(".", 1)[0]
+
+    @staticmethod
+    def _segments(path: str) -> tuple[str, ...]:
+        """The segments of path without the extension of the page, and without a trailing index."""  # fmt: off
+        for suffix in _SUFFIXES:
+            if path.lower().endswith(suffix):
+                path = path[: -len(suffix)]
+                break
+        segments = [s for s in path.split("/") if s not in ("", ".")]
+        return tuple(segments[:-1] if len(segments) > 1 and segments[-1] == "index" else segments)  # fmt: off
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+from playwright.sync_api import sync_playwright
+
+from cppref.conf import ConfContext
+
+
+class BrowserService:
+    """A browser kept running in the background, shared by the fetches through its CDP endpoint.
+
+    The endpoint and the pid of the service are recorded in the state directory.
+    Every use of the service touches that file, and the service exits once it has
+    not been touched for idle seconds. The record is only trusted while the
+    endpoint answers, the pid of a service gone may belong to another process.
+    """
+
+    @staticmethod
+    def endpoint() -> Optional[str]:
+        """The endpoint of the running service, None if there is none."""
+        if (state := BrowserService._read()) is None:
+            return None
+        BrowserService.touch()
+        return state["endpoint"]
+
+    @staticmethod
+    def pid() -> Optional[int]:
+        """The pid of the running service, None if there is none."""
+        return None if (state := BrowserService._read()) is None else state["pid"]
+
+    @staticmethod
+    def touch():
+        try:
+            os.utime(ConfContext.browser())
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def start(idle: float, timeout: float = 30) -> str:
+        """Start the service in the background unless it is running, returns its endpoint."""
+        if (endpoint := BrowserService.endpoint()) is not None:
+            return endpoint
+        command = [sys.executable, "-m", "cppref.browser", str(idle)]
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)  # fmt: off
+        deadline = time.monotonic() + timeout
+        while (endpoint := BrowserService.endpoint()) is None:
+            assert process.poll() is None, f"Browser service exited with {process.returncode}"  # fmt: off
+            assert time.monotonic() < deadline, "Timeout: browser service is not ready"
+            time.sleep(0.1)
+        return endpoint
+
+    @staticmethod
+    def stop() -> bool:
+        """Stop the running service, returns whether there was one."""
+        if (state := BrowserService._read()) is None:
+            return False
+        os.kill(state["pid"], signal.SIGTERM)
+        return True
+
+    @staticmethod
+    def serve(idle: float, timeout: float = 30):
+        """Run the service in the foreground, until it has been idle for idle seconds."""
+        path = ConfContext.browser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        with tempfile.TemporaryDirectory() as profile, sync_playwright() as p:
+            # the port is picked by the browser itself, and told in its profile
+            context = p.chromium.launch_persistent_context(profile, headless=True, args=["--remote-debugging-port=0"])  # fmt: off
+            try:
+                endpoint = f"http://127.0.0.1:{BrowserService._port(Path(profile), timeout)}"
+                temp = path.with_name(f".{path.name}.part")
+                temp.write_text(json.dumps({"endpoint": endpoint, "pid": os.getpid()}))
+                temp.replace(path)
+                while BrowserService._alive(endpoint) and time.time() - path.stat().st_mtime < idle:  # fmt: off
+                    time.sleep(min(idle, 5))
+            finally:
+                path.unlink(missing_ok=True)
+                context.close()
+
+    @staticmethod
+    def _port(profile: Path, timeout: float) -> int:
+        """The port the browser of profile listens on, once it has told it."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return int(profile.joinpath("DevToolsActivePort").read_text().splitlines()[0])
+            except (FileNotFoundError, IndexError, ValueError):
+                assert time.monotonic() < deadline, "Timeout: browser did not tell its port"
+                time.sleep(0.05)
+
+    @staticmethod
+    def _alive(endpoint: str, timeout: float = 1) -> bool:
+        """Whether a browser answers at endpoint."""
+        try:
+            with urllib.request.urlopen(f"{endpoint}/json/version", timeout=timeout) as resp:
+                return resp.status == 200
+        except (OSError, ValueError):
+            return False
+
+    @staticmethod
+    def _read() -> Optional[dict]:
+        path = ConfContext.browser()
+        try:
+            state = json.loads(path.read_text())
+            os.kill(state["pid"], 0)
+            alive = BrowserService._alive(state["endpoint"])
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError, ProcessLookupError, PermissionError):
+            alive = False
+        if not alive:
+            path.unlink(missing_ok=True)  # left behind by a service that died
+            return None
+        return state
+
+
+if __name__ == "__main__":
+    BrowserService.serve(float(sys.argv[1]))
@@ -52,6 +52,18 @@ class ConfContext:
     def dbfile() -> Path:
         return ConfContext.SHARE.joinpath("cppref", "index.db")
 
+    @staticmethod
+    def manifest() -> Path:
+        return ConfContext.SHARE.joinpath("cppref", "manifest.db")
+
+    @staticmethod
+    def journal() -> Path:
+        return ConfContext.STATE.joinpath("cppref", "journal.db")
+
+    @staticmethod
+    def browser() -> Path:
+        return ConfContext.STATE.joinpath("cppref", "browser.json")
+
     @staticmethod
     def conf_path() -> Path:
         return ConfContext.CONF.joinpath("cppref", "conf.toml")
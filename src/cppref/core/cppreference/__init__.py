@@ -1,3 +1,3 @@
-from cppref.core.cppreference.cppreference import process, processor
+from cppref.core.cppreference.cppreference import process, processor, render, valid
 
-__all__ = ["process", "processor"]
+__all__ = ["process", "processor", "render", "valid"]
@@ -1,19 +1,23 @@
 import datetime
 import re
+from collections.abc import Buffer
+from typing import Callable
 
 from lxml import etree, html
 
 from cppref.core.cppreference.description import dl
 from cppref.core.cppreference.div import div
 from cppref.core.cppreference.table import table
-from cppref.core.cppreference.utils import collect
+from cppref.core.cppreference.utils import collect, collect_into
 from cppref.core.processor import Processor
 from cppref.typing_ import Record
 
 processor: Processor[[], str] = Processor()
 
+_T_REF_STD = re.compile(r"t-ref-std-c\+\+\d\d")
 
-@processor.route(lambda e: e.tag == "h1")
+
+@processor.route(tag="h1")
 def _(elem: html.HtmlElement) -> str:
     return (
         "\n.sp\n"
@@ -29,7 +33,7 @@ def _(elem: html.HtmlElement) -> str:
     )
 
 
-@processor.route(lambda e: e.tag == "h2")
+@processor.route(tag="h2")
 def _(elem: html.HtmlElement) -> str:
     return (
         "\n.sp\n"
@@ -44,52 +48,52 @@ def _(elem: html.HtmlElement) -> str:
     )
 
 
-@processor.route(lambda e: e.tag == "h3")
+@processor.route(tag="h3")
 def _(s: html.HtmlElement) -> str:
     return f'\n.sp\n.SH "{s.text_content().strip().upper()}"\n'
 
 
-@processor.route(lambda e: e.tag in ("h4", "h5"))
+@processor.route(tag=("h4", "h5"))
 def _(elem: html.HtmlElement) -> str:
     return f'\n.sp\n.SS "{elem.text_content().strip()}"\n'
 
 
-@processor.route(lambda e: e.tag == "pre")
+@processor.route(tag="pre")
 def _(elem: html.HtmlElement) -> str:
     return f"\n.in +2n\n.nf\n{elem.text_content().strip()}\n.fi\n.in\n"
 
 
-@processor.route(lambda e: e.tag == "p")
+@processor.route(tag="p")
 def _(p: html.HtmlElement) -> str:
     return f"\n{p.text_content().replace('\n', '\n.br\n')}\n"
 
 
-@processor.route(lambda e: e.tag == "span")
+@processor.route(tag="span")
 def _(elem: html.HtmlElement) -> str:
     return elem.text_content().strip()
 
 
-@processor.route(lambda e: e.tag == "dl")
+@processor.route(tag="dl")
 def _(elem: html.HtmlElement) -> str:
     return dl(elem, processor)
 
 
-@processor.route(lambda e: e.tag == "code")
+@processor.route(tag="code")
 def _(elem: html.HtmlElement) -> str:
     return elem.text_content().strip()
 
 
-@processor.route(lambda e: e.tag == "a")
+@processor.route(tag="a")
 def _(elem: html.HtmlElement) -> str:
     return elem.text_content().strip()
 
 
-@processor.route(lambda e: e.tag == "br")
+@processor.route(tag="br")
 def _(_: html.HtmlElement) -> str:
     return "\n.br\n"
 
 
-@processor.route(lambda e: e.tag == "ol")
+@processor.route(tag="ol")
 def _(ol: html.HtmlElement) -> str:
     lines: list[str] = list()
     lines.append(r".nr step 0 1")
@@ -102,7 +106,7 @@ def _(ol: html.HtmlElement) -> str:
     return f"\n{'\n'.join(lines)}\n"
 
 
-@processor.route(lambda e: e.tag == "ul")
+@processor.route(tag="ul")
 def _(ul: html.HtmlElement) -> str:
     lines: list[str] = list()
     for item in ul:
@@ -113,7 +117,7 @@ def _(ul: html.HtmlElement) -> str:
     return f"\n{'\n'.join(lines)}\n"
 
 
-@processor.route(lambda e: e.tag == "div")
+@processor.route(tag="div")
 def _(element: html.HtmlElement) -> str:
     if "t-member" in element.get("class", ""):
         for e in element.iter("h2"):
@@ -122,7 +126,7 @@ def _(element: html.HtmlElement) -> str:
     if element.get("class") is None:
         return collect(element, processor)
 
-    if re.search(r"t-ref-std-c\+\+\d\d", element.get("class", "")) is not None:
+    if _T_REF_STD.search(element.get("class", "")) is not None:
         return collect(element, processor)
 
     if "mw-collapsed" in element.get("class", ""):
@@ -132,82 +136,145 @@ def _(element: html.HtmlElement) -> str:
     return div(element)
 
 
-@processor.route(lambda e: e.tag == "table")
+@processor.route(tag="table")
 def _(elem: html.HtmlElement) -> str:
     return table(elem)
 
 
-def process(document: str, record: Record, p: Processor[[], str] = processor) -> str:
-    doc: html.HtmlElement = html.fromstring(document, parser=html.HTMLParser(encoding="utf-8"))  # fmt: off
-    doc = doc.xpath("/html/body/div[@id='cpp-content-base']/div[@id='content']")[0]
-    body: html.HtmlElement = doc.xpath("div[@id='bodyContent']/div[@id='mw-content-text']")[0]  # fmt: off
-    heading: html.HtmlElement = doc.xpath("h1")[0]
-    texts: list[str] = list()
-    heading_text = heading.text_content().strip()
-    date = str(datetime.date.today())
-    source = record.url
-    slogan = "C++ Programmer\\'s Manual"
-    texts.append(f'.TH "{heading_text}" 3 "{date}" "{source}" "{slogan}"')
-    texts.append('.SH "NAME"')
-    texts.append(rf"cppreference{record.id} \- {heading_text}")
-    texts.append('.SH "DEFINITION"')
-
-    # remove the table of contents which does not make sense
-    for element in body.xpath("//*[@id='toc']"):
+# elements removed from the body before rendering
+_DROP_IDS = frozenset(("toc",))  # the table of contents which does not make sense
+_DROP_CLASSES = frozenset((
+    "t-navbar",  # navigation bars at the top
+    "t-page-template",
+    "editsection",  # the invisible edit text
+    "noprint",  # invisible elements
+    "ambox",  # the incomplete section notice
+    "t-image",  # images
+    "t-inheritance-diagram",
+    "t-plot",
+    "t-template-editlink",
+))  # fmt: off
+_DROP_STYLES = ("display:none",)
+# tables replaced by a placeholder since they are too crowded to render
+_CROWDED_CLASSES = ("mw-collapsible", "mw-collapsed")
+
+
+def _dropped(element: html.HtmlElement) -> bool:
+    if element.get("id") in _DROP_IDS:
+        return True
+    if (klass := element.get("class")) is not None and not _DROP_CLASSES.isdisjoint(klass.split()):  # fmt: off
+        return True
+    if (style := element.get("style")) is not None:
+        return any(s in style for s in _DROP_STYLES)
+    return False
+
+
+def _crowded(element: html.HtmlElement) -> bool:
+    klass = element.get("class", "")
+    return element.tag == "table" and any(c in klass for c in _CROWDED_CLASSES)
+
+
+def cleanup(body: html.HtmlElement):
+    """Remove the elements that should not be rendered in a single traversal."""
+    dropped, crowded = list[html.HtmlElement](), list[html.HtmlElement]()
+    for element in body.iter():
+        if element.tag is etree.Comment or _dropped(element):
+            dropped.append(element)
+        elif _crowded(element):
+            crowded.append(element)
+
+    for element in dropped:
         element.drop_tree()
 
-    # remove all the comments
-    for element in body.xpath("//comment()"):
-        element.drop_tree()
+    # replace after dropping, so the tails merged into the tables are discarded
+    for element in crowded:
+        span = html.Element("span")
+        span.text = "There should be a table, but it's too crowded."
+        parent = element.getparent()
+        if parent is not None:
+            index = parent.index(element)
+            parent.remove(element)
+            parent.insert(index, span)
 
-    # remove navigation bars at the top
-    for element in body.find_class("t-navbar"):
-        element.drop_tree()
 
-    for element in body.find_class("t-page-template"):
-        element.drop_tree()
+def _lastmod(doc: html.HtmlElement) -> str:
+    """The date the page was last modified on according to its footer, if any."""
+    for element in doc.xpath("//li[@id='footer-info-lastmod']"):
+        matched = re.search(r"(\d{1,2} [A-Z][a-z]+ \d{4})", element.text_content())
+        if matched is not None:
+            return str(datetime.datetime.strptime(matched.group(1), "%d %B %Y").date())
+    return ""
 
-    # remove the invisible edit text
-    for element in body.find_class("editsection"):
-        element.drop_tree()
 
-    # remove invisible elements
-    for element in body.find_class("noprint"):
-        element.drop_tree()
+# reused for every page: nothing is fetched, comments and processing instructions
+# are dropped while parsing, and the element classes are looked up in C instead
+# of by the per-tag python lookup of lxml.html
+_PARSER = etree.HTMLParser(encoding="utf-8", no_network=True, remove_comments=True, remove_pis=True)  # fmt: off
+_PARSER.set_element_class_lookup(etree.ElementDefaultClassLookup(element=html.HtmlElement, comment=html.HtmlComment, pi=html.HtmlProcessingInstruction, entity=html.HtmlEntity))  # fmt: off
 
-    # remove the incomplete section notice
-    for element in body.find_class("ambox"):
-        element.drop_tree()
 
-    # remove images
-    for element in body.find_class("t-image"):
-        element.drop_tree()
+_CONTENT = "/html/body/div[@id='cpp-content-base']/div[@id='content']"
 
-    # remove images
-    for element in body.find_class("t-inheritance-diagram"):
-        element.drop_tree()
 
-    for element in body.find_class("t-plot"):
-        element.drop_tree()
+def valid(document: str | Buffer) -> bool:
+    """Whether the document is a page that can be rendered, i.e. it has a heading and a body."""
+    try:
+        doc: html.HtmlElement = html.document_fromstring(document, parser=_PARSER)
+    except etree.ParserError:
+        return False
+    return len(doc.xpath(f"{_CONTENT}[h1][div[@id='bodyContent']/div[@id='mw-content-text']]")) > 0  # fmt: off
 
-    for element in body.find_class("t-template-editlink"):
-        element.drop_tree()
-
-    for element in body.cssselect("[style]"):
-        if "display:none" in element.get("style", ""):
-            element.drop_tree()
 
-    for element in body.xpath('.//table[contains(@class, "mw-collapsible") or contains(@class, "mw-collapsed")]'):  # fmt: off
-        span = html.Element("span")
-        span.text = "There should be a table, but it's too crowded."
-        parent = element.getparent()
-        if parent is not None:
-            index = parent.index(element)
-            parent.remove(element)
-            parent.insert(index, span)
+def _content(document: str | Buffer) -> tuple[html.HtmlElement, str]:
+    """The #content of the document and its last modified date.
 
-    texts.append(collect(body, p))
+    Everything else in the document is discarded before rendering.
+    """
+    doc: html.HtmlElement = html.document_fromstring(document, parser=_PARSER)
+    date = _lastmod(doc)
+    content = doc.xpath(_CONTENT)[0]
+    # the removed subtrees are freed at once, as no element refers to them
+    node = content
+    while (parent := node.getparent()) is not None:
+        for sibling in [e for e in parent if e is not node]:
+            parent.remove(sibling)
+        node = parent
+    return content, date
 
-    text = "\n.sp\n".join(texts)
 
+def _normalize(text: str) -> str:
+    # str.translate takes its slow path per character for a non-ASCII table,
+    # these replaces are done in C and are orders of magnitude faster
     return text.replace("\xa0", " ").replace("\u200b", "").replace("\ufeff", "")
+
+
+def render(document: str | Buffer, record: Record, write: Callable[[str], object], p: Processor[[], str] = processor):  # fmt: off
+    """Render the document, writing the fragments of each top-level element as they are done.
+
+    The document is preferably the raw bytes of the page (or a mmap of them),
+    which are parsed as they are instead of being decoded first.
+    """
+    # the date is taken from the page, so that the same page renders the same
+    doc, date = _content(document)
+    body: html.HtmlElement = doc.xpath("div[@id='bodyContent']/div[@id='mw-content-text']")[0]  # fmt: off
+    heading: html.HtmlElement = doc.xpath("h1")[0]
+    texts: list[str] = list()
+    heading_text = heading.text_content().strip()
+    source = record.url
+    slogan = "C++ Programmer\\'s Manual"
+    texts.append(f'.TH "{heading_text}" 3 "{date}" "{source}" "{slogan}"')
+    texts.append('.SH "NAME"')
+    texts.append(rf"cppreference{record.id} \- {heading_text}")
+    texts.append('.SH "DEFINITION"')
+    texts.append("")
+
+    cleanup(body)
+
+    write(_normalize("\n.sp\n".join(texts)))
+    collect_into(body, p, lambda text: write(_normalize(text)))
+
+
+def process(document: str | Buffer, record: Record, p: Processor[[], str] = processor) -> str:
+    texts: list[str] = list()
+    render(document, record, texts.append, p)
+    return "".join(texts)
@@ -1,63 +1,79 @@
 import re
+from dataclasses import dataclass
 
 from lxml.html import HtmlElement
 
 from cppref.core.cppreference.utils import collect
 from cppref.core.processor import Processor
 
+_NEWLINES = re.compile(r"\n+")
+
+
+@dataclass(frozen=True)
+class Context:
+    level: int  # indent level of the lists
+    parent: Processor[[], str]  # routes of the elements not overridden here
+
+    def nested(self) -> "Context":
+        return Context(self.level + 1, self.parent)
+
+
+_processor = Processor[[Context], str]()
+
+
+@_processor.route(tag="dl")
+def _(elem: HtmlElement, ctx: Context) -> str:
+    return collect(elem, _processor, ctx.nested())
+
+
+@_processor.route(tag="dt")
+def _(elem: HtmlElement, ctx: Context) -> str:
+    return f"{elem.text_content().strip()}\n"
+
+
+@_processor.route(tag="dd")
+def _(elem: HtmlElement, ctx: Context) -> str:
+    # INFO: dd is actually the same as dl, the only difference is
+    # dl increase indent level, but dd will not.
+    return collect(elem, _processor, ctx)
+
+
+@_processor.route(tag="ul")
+def _(elem: HtmlElement, ctx: Context) -> str:
+    texts: list[str] = list()
+    texts.append(f".RS {2 * ctx.level}")
+    for item in elem:
+        assert item.tag == "li", f"Unknown tag {item.tag} in unordered list"
+        texts.append(r'.IP "◦" 2n')
+        texts.append(f"{item.text_content().strip()}")
+    texts.append(r".RE")
+    return f"\n{'\n'.join(texts)}\n"
+
+
+@_processor.route(tag="ol")
+def _(elem: HtmlElement, ctx: Context) -> str:
+    texts = list[str]()
+    texts.append(rf".nr step{ctx.level} 0 1")
+    texts.append(f".RS {2 * ctx.level}")
+    for item in elem:
+        assert item.tag == "li", f"Unknown tag {item.tag} in ordered list"
+        texts.append(rf".IP \n+[step{ctx.level}] 2n")
+        texts.append(rf"{item.text_content().strip()}")
+    texts.append(r".RE")
+    return f"\n{'\n'.join(texts)}\n"
+
+
+@_processor.route(tag=("i", "sup"))
+def _(elem: HtmlElement, ctx: Context) -> str:
+    return f'.I "{elem.text_content().strip()}"\n'
+
+
+@_processor.route()
+def _(elem: HtmlElement, ctx: Context) -> str:
+    if (handler := ctx.parent.resolve(elem)) is not None:
+        return handler(elem)
+    return f"{elem.text_content().strip()}\n.sp"
+
 
 def dl(desc: HtmlElement, processor: Processor[[], str]) -> str:
-    p = processor.clone()
-
-    level: int = 2
-
-    @p.route(lambda e: e.tag == "dl")
-    def _(elem: HtmlElement) -> str:
-        nonlocal level
-        level += 1
-        text = collect(elem, p)
-        level -= 1
-        return text
-
-    @p.route(lambda e: e.tag == "dt")
-    def _(elem: HtmlElement) -> str:
-        return f"{elem.text_content().strip()}\n"
-
-    @p.route(lambda e: e.tag == "dd")
-    def _(elem: HtmlElement) -> str:
-        # INFO: dd is actually the same as dl, the only difference is
-        # dl increase indent level, but dd will not.
-        return collect(elem, p)
-
-    @p.route(lambda e: e.tag == "ul")
-    def _(elem: HtmlElement) -> str:
-        texts: list[str] = list()
-        texts.append(f".RS {2 * level}")
-        for item in elem:
-            assert item.tag == "li", f"Unknown tag {item.tag} in unordered list"
-            texts.append(r'.IP "◦" 2n')
-            texts.append(f"{item.text_content().strip()}")
-        texts.append(r".RE")
-        return f"\n{'\n'.join(texts)}\n"
-
-    @p.route(lambda e: e.tag == "ol")
-    def _(elem: HtmlElement) -> str:
-        texts = list[str]()
-        texts.append(rf".nr step{level} 0 1")
-        texts.append(f".RS {2 * level}")
-        for item in elem:
-            assert item.tag == "li", f"Unknown tag {item.tag} in ordered list"
-            texts.append(rf".IP \n+[step{level}] 2n")
-            texts.append(rf"{item.text_content().strip()}")
-        texts.append(r".RE")
-        return f"\n{'\n'.join(texts)}\n"
-
-    @p.route(lambda e: e.tag in ("i", "sup"))
-    def _(elem: HtmlElement) -> str:
-        return f'.I "{elem.text_content().strip()}"\n'
-
-    @p.route()
-    def _(elem: HtmlElement) -> str:
-        return f"{elem.text_content().strip()}\n.sp"
-
-    return re.sub(r"\n+", "\n", collect(desc, p))
+    return _NEWLINES.sub("\n", collect(desc, _processor, Context(2, processor)))
@@ -7,8 +7,10 @@ from cppref.core.processor import Processor
 
 processor = Processor[[], str]()
 
+_T_LI = re.compile(r"t-li(\d)")
 
-@processor.route(lambda e: "t-example" in e.get("class", ""))
+
+@processor.route(klass="t-example")
 def _(element: HtmlElement) -> str:
     # remove 'run this code' button
     for e in element.find_class("t-example-live-link"):
@@ -16,22 +18,22 @@ def _(element: HtmlElement) -> str:
     return f"\n.nf\n{element.text_content().replace('\\', r'\e')}\n"
 
 
-@processor.route(lambda e: "mw-geshi" in e.get("class", ""))
+@processor.route(klass="mw-geshi")
 def _(element: HtmlElement) -> str:
     return f"\n.nf\n{element.text_content().replace('\\', r'\e')}\n"
 
 
-@processor.route(lambda e: "t-noexcept-full" in e.get("class", ""))
+@processor.route(klass="t-noexcept-full")
 def _(element: HtmlElement) -> str:
     return f"\n.nf\n{element.text_content().replace('\\', r'\e')}\n"
 
 
-@processor.route(lambda e: "t-noexcept-inline" in e.get("class", ""))
+@processor.route(klass="t-noexcept-inline")
 def _(element: HtmlElement) -> str:
     return element.text_content().strip()
 
 
-@processor.route(lambda e: "t-inherited" in e.get("class", ""))
+@processor.route(klass="t-inherited")
 def _(element: HtmlElement) -> str:
     h2 = element.find(".//h2")
     assert h2 is not None, "Get non h2 in t-inherited"
@@ -40,13 +42,13 @@ def _(element: HtmlElement) -> str:
 
 @processor.route(lambda e: "t-li" in e.get("class", ""))
 def _(element: HtmlElement) -> str:
-    matched = re.search(r"t-li(\d)", element.get("class", ""))
+    matched = _T_LI.search(element.get("class", ""))
     assert matched is not None, "t-li suffixed with no number"
     level = int(matched.group(1))
     return f"\n.in +{2 * level}n \n{element.text_content().strip()}\n.in\n"
 
 
-@processor.route(lambda e: "mainpagediv" in e.get("class", ""))
+@processor.route(klass="mainpagediv")
 def _(element: HtmlElement) -> str:
     # For https://en.cppreference.com/w/cpp/index.html
     strip_tags(element, "p")
@@ -1,5 +1,6 @@
 from lxml.etree import strip_tags
 from lxml.html import HtmlElement
+from cppref.core.cppreference.table.base import Table
 from cppref.core.cppreference.table.t_dcl_begin import TDclBegin
 from cppref.core.cppreference.table.t_dsc_begin import TDscBegin
 from cppref.core.cppreference.table.t_general import DscTable, GeneralTable, WikiTable
@@ -18,39 +19,39 @@ def _(table: HtmlElement, width: int) -> TabInfo:
     return GeneralTable(table).nested(width, _tabinfo)
 
 
-@_tabinfo.route(lambda e: "dsctable" in e.get("class", ""))
+@_tabinfo.route(klass="dsctable")
 def _(table: HtmlElement, width: int) -> TabInfo:
     return DscTable(table).nested(width, _tabinfo)
 
 
-@_tabinfo.route(lambda e: "wikitable" in e.get("class", ""))
+@_tabinfo.route(klass="wikitable")
 def _(table: HtmlElement, width: int) -> TabInfo:
     return WikiTable(table).nested(width, _tabinfo)
 
 
-@_tabinfo.route(lambda e: "t-dcl-begin" in e.get("class", ""))
+@_tabinfo.route(klass="t-dcl-begin")
 def _(table: HtmlElement, width: int) -> TabInfo:
     for element in table.find_class("t-dcl-sep"):
         element.drop_tree()
     return TDclBegin(table).nested(width, _tabinfo)
 
 
-@_tabinfo.route(lambda e: "t-dsc-begin" in e.get("class", ""))
+@_tabinfo.route(klass="t-dsc-begin")
 def _(table: HtmlElement, width: int) -> TabInfo:
     return TDscBegin(table).nested(width, _tabinfo)
 
 
-@_tabinfo.route(lambda e: "t-par-begin" in e.get("class", ""))
+@_tabinfo.route(klass="t-par-begin")
 def _(table: HtmlElement, width: int) -> TabInfo:
     return TParBegin(table).nested(width, _tabinfo)
 
 
-@_tabinfo.route(lambda e: "t-rev-begin" in e.get("class", ""))
+@_tabinfo.route(klass="t-rev-begin")
 def _(table: HtmlElement, width: int) -> TabInfo:
     return TRevBegin(table).nested(width, _tabinfo)
 
 
-@_tabinfo.route(lambda e: "t-sdsc-begin" in e.get("class", ""))
+@_tabinfo.route(klass="t-sdsc-begin")
 def _(table: HtmlElement, width: int) -> TabInfo:
     for td in table.find_class("t-sdsc-sep"):
         parent = td.getparent()
@@ -67,39 +68,39 @@ def _(table: HtmlElement) -> str:
     return GeneralTable.process(table, _tabinfo)
 
 
-@_table.route(lambda e: "dsctable" in e.get("class", ""))
+@_table.route(klass="dsctable")
 def _(table: HtmlElement) -> str:
     return DscTable.process(table, _tabinfo)
 
 
-@_table.route(lambda e: "wikitable" in e.get("class", ""))
+@_table.route(klass="wikitable")
 def _(table: HtmlElement) -> str:
     return WikiTable.process(table, _tabinfo)
 
 
-@_table.route(lambda e: "t-dcl-begin" in e.get("class", ""))
+@_table.route(klass="t-dcl-begin")
 def _(table: HtmlElement) -> str:
     for element in table.find_class("t-dcl-sep"):
         element.drop_tree()
     return TDclBegin.process(table, _tabinfo)
 
 
-@_table.route(lambda e: "t-dsc-begin" in e.get("class", ""))
+@_table.route(klass="t-dsc-begin")
 def _(table: HtmlElement) -> str:
     return TDscBegin.process(table, _tabinfo)
 
 
-@_table.route(lambda e: "t-par-begin" in e.get("class", ""))
+@_table.route(klass="t-par-begin")
 def _(table: HtmlElement) -> str:
     return TParBegin.process(table, _tabinfo)
 
 
-@_table.route(lambda e: "t-rev-begin" in e.get("class", ""))
+@_table.route(klass="t-rev-begin")
 def _(table: HtmlElement) -> str:
     return TRevBegin.process(table, _tabinfo)
 
 
-@_table.route(lambda e: "t-sdsc-begin" in e.get("class", ""))
+@_table.route(klass="t-sdsc-begin")
 def _(table: HtmlElement) -> str:
     for td in table.find_class("t-sdsc-sep"):
         parent = td.getparent()
@@ -110,7 +111,7 @@ def _(table: HtmlElement) -> str:
 
 def table(table: HtmlElement) -> str:
     strip_tags(table, "tbody")
-    if len(table.text_content().strip()) == 0:
+    if Table.blank(table):
         return ""
     if "mw-collapsible" in table.get("class", ""):
         return "\n.I there should be a table, but its crowded.\n"
@@ -1,11 +1,12 @@
 import re
-from collections import deque
 
 from lxml.html import HtmlElement
 
 from cppref.core.cppreference.table.typing_ import RowSpec, RowText, TabInfo
 from cppref.core.processor import Processor
 
+_NEWLINES = re.compile(r"\n+")
+
 
 class Table:
     def __init__(self, table: HtmlElement) -> None:
@@ -13,14 +14,18 @@ class Table:
 
     @staticmethod
     def text(e: HtmlElement):
-        return re.sub(r"\n+", "\n.br\n", e.text_content().strip())
+        return _NEWLINES.sub("\n.br\n", e.text_content().strip())
+
+    @staticmethod
+    def blank(e: HtmlElement) -> bool:
+        """Whether there is no text in e, stops at the first text instead of collecting all."""
+        return all(len(t.strip()) == 0 for t in e.itertext())
 
     @staticmethod
     def to_table(info: TabInfo) -> str:
         specs, texts = info
-        specs = "\n".join(map(" ".join, specs))
-        texts = map(lambda r: map(lambda t: f"T{{\n{t}\nT}}", r), texts)
-        texts = "\n".join(map(";".join, texts))
+        specs = "\n".join([" ".join(spec) for spec in specs])
+        texts = "\n".join([";".join([f"T{{\n{t}\nT}}" for t in text]) for text in texts])
         return f"{specs}.\n{texts}"
 
     @staticmethod
@@ -28,8 +33,8 @@ class Table:
         specs, texts = list[RowSpec](), list[RowText]()
         nested_tables = list(td.iterchildren("table"))
         if len(nested_tables) == 0:
-            spec = deque[str]([default, *["s" for _ in range(width - 1)]])
-            text = deque[str]([Table.text(td)])
+            spec = [default] + ["s"] * (width - 1)
+            text = [Table.text(td)]
             specs.append(spec)
             texts.append(text)
             return specs, texts
@@ -43,10 +48,10 @@ class Table:
             else:
                 hanging = "".join(hanging).strip()
                 if len(hanging) > 0:
-                    spec, text = deque[str](), deque[str]()
+                    spec, text = list[str](), list[str]()
                     spec.append(default)
-                    text.append(re.sub(r"\n+", "\n.br\n", hanging))
-                    spec.extend(["s" for _ in range(width - 1)])
+                    text.append(_NEWLINES.sub("\n.br\n", hanging))
+                    spec.extend(["s"] * (width - 1))
                     specs.append(spec)
                     texts.append(text)
                 hanging = list[str]()
@@ -57,10 +62,10 @@ class Table:
                 hanging.append(element.tail)
         hanging = "".join(hanging).strip()
         if len(hanging) > 0:
-            spec, text = deque[str](), deque[str]()
+            spec, text = list[str](), list[str]()
             spec.append(default)
-            text.append(re.sub(r"\n+", "\n.br\n", hanging))
-            spec.extend(["s" for _ in range(width - 1)])
+            text.append(_NEWLINES.sub("\n.br\n", hanging))
+            spec.extend(["s"] * (width - 1))
             specs.append(spec)
             texts.append(text)
 
@@ -1,4 +1,3 @@
-from collections import deque
 from typing import override
 
 from lxml.html import HtmlElement
@@ -40,7 +39,7 @@ class TDclBegin(Table):
     def normal(self, width: int, p: Processor[[int], TabInfo]) -> TabInfo:
         specs, texts = list[RowSpec](), list[RowText]()
         for row in self._table:
-            specs.append(deque[str](["-" for _ in range(width)]))
+            specs.append(["-"] * width)
             spec, text = Table.td(row[0], width - 2, "lx", p)
             specs.extend(spec)
             texts.extend(text)
@@ -63,9 +62,9 @@ class TDclBegin(Table):
                 text.extend(["", ""])
 
         # append seperate line
-        specs.append(deque[str](["-" for _ in range(width)]))
-        specs.append(deque[str](["l" for _ in range(width)]))
-        texts.append(deque[str](["" for _ in range(width)]))
+        specs.append(["-"] * width)
+        specs.append(["l"] * width)
+        texts.append([""] * width)
 
         return specs, texts
 
@@ -1,4 +1,3 @@
-from collections import deque
 from typing import override
 
 from lxml.html import HtmlElement
@@ -15,13 +14,13 @@ class TDscBegin(Table):
         specs, texts = list[RowSpec](), list[RowText]()
         for row in self._table:
             if (ncols := len(row)) == 1:
-                specs.append(deque[str](["cbd", *["s" for _ in range(width - 1)]]))
-                texts.append(deque[str]([Table.text(row)]))
+                specs.append(["cbd"] + ["s"] * (width - 1))
+                texts.append([Table.text(row)])
                 continue
             assert ncols == 2, f"t-dsc-begin unexpected {ncols=}"
             spec, text = TDscBegin.nested_column1(row[0])
-            specs.append(deque[str]([spec]))
-            texts.append(deque[str]([text]))
+            specs.append([spec])
+            texts.append([text])
 
             spec, text = Table.td(row[1], width - 1, "l", p)
             it = zip(spec, text, strict=True)
@@ -29,8 +28,8 @@ class TDscBegin(Table):
             specs[-1].extend(spec)
             texts[-1].extend(text)
             for spec, text in it:
-                specs.append(deque[str](["^", *spec]))
-                texts.append(deque[str](["", *text]))
+                specs.append(["^", *spec])
+                texts.append(["", *text])
 
         return specs, texts
 
@@ -41,15 +40,15 @@ class TDscBegin(Table):
             prev_ncols = ncols
             if (ncols := len(row)) == 1:
                 if isinstance(prev_ncols, int) and prev_ncols == 1:
-                    specs.append(deque[str](["-", "-", *["-" for _ in range(width - 2)]]))  # fmt: off
+                    specs.append(["-"] * width)
                 else:
-                    specs.append(deque[str](["-", "-", "|", *["-" for _ in range(width - 2)]]))  # fmt: off
-                specs.append(deque[str](["lbd", "s", *["s" for _ in range(width - 2)]]))
-                texts.append(deque[str]([Table.text(row)]))
-                specs.append(deque[str](["^", "s", *["s" for _ in range(width - 2)]]))
-                texts.append(deque[str]([""]))
+                    specs.append(["-", "-", "|"] + ["-"] * (width - 2))
+                specs.append(["lbd"] + ["s"] * (width - 1))
+                texts.append([Table.text(row)])
+                specs.append(["^"] + ["s"] * (width - 1))
+                texts.append([""])
                 continue
-            specs.append(deque[str](["-", "-", "|", *["-" for _ in range(width - 2)]]))
+            specs.append(["-", "-", "|"] + ["-"] * (width - 2))
             assert ncols == 2, f"t-dsc-begin unexpected {ncols=}"
             spec, text = TDscBegin.column1(row[0])
             specs.append(spec)
@@ -60,10 +59,10 @@ class TDscBegin(Table):
             specs[-1].extend(["|", *spec])
             texts[-1].extend(text)
             for spec, text in it:
-                specs.append(deque[str](["^", "^", "|", *["-" for _ in range(width - 2)]]))  # fmt: off
-                texts.append(deque[str](["", ""]))
-                specs.append(deque[str](["^", "^", "|", *spec]))
-                texts.append(deque[str](["", "", *text]))
+                specs.append(["^", "^", "|"] + ["-"] * (width - 2))
+                texts.append(["", ""])
+                specs.append(["^", "^", "|", *spec])
+                texts.append(["", "", *text])
 
         return specs[1:], texts
 
@@ -92,17 +91,17 @@ class TDscBegin(Table):
     def column1(td: HtmlElement) -> tuple[RowSpec, RowText]:
         tlines = td.find_class("t-lines")
         if (ntlines := len(tlines)) == 0:
-            return deque[str](["l", "s"]), deque[str]([Table.text(td)])
+            return ["l", "s"], [Table.text(td)]
 
         if ntlines == 1:
             texts = [s.text_content().strip() for s in tlines[0]]
-            return deque[str](["l", "s"]), deque[str](["\n.br\n".join(texts)])
+            return ["l", "s"], ["\n.br\n".join(texts)]
 
         if ntlines == 2:
             texts = list[list[str]]()
             texts.append([s.text_content().strip() for s in tlines[0]])
             texts.append([s.text_content().strip() for s in tlines[1]])
-            return deque[str](["l", "l"]), deque[str](map("\n.br\n".join, texts))
+            return ["l", "l"], list(map("\n.br\n".join, texts))
 
         assert False, f"Unexpected len(tlines)={ntlines}"
 
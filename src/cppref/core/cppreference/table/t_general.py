@@ -1,4 +1,3 @@
-from collections import deque
 from typing import Optional, override
 
 from lxml.html import HtmlElement
@@ -29,12 +28,12 @@ class GeneralTable(Table):
             caption.drop_tree()
 
         if title is not None:
-            specs.append(deque[str](["cb", *["s" for _ in range(ncols - 1)]]))
-            texts.append(deque[str](title))
+            specs.append(["cb"] + ["s"] * (ncols - 1))
+            texts.append(list(title))
 
         for row in self._table:
             col_index = 0
-            spec, text = deque[str](), deque[str]()
+            spec, text = list[str](), list[str]()
             for col in row:
                 while spans[col_index] > 0:
                     spans[col_index] -= 1
@@ -47,7 +46,7 @@ class GeneralTable(Table):
                 spans[col_index] = rowspan - 1
                 bold = "b" if self.bold(col) else ""
                 spec.append(f"c{bold}")
-                spec.extend(["s" for _ in range(colspan - 1)])
+                spec.extend(["s"] * (colspan - 1))
                 text.append(Table.text(col))
                 col_index += colspan
             while col_index < ncols:
@@ -76,12 +75,12 @@ class GeneralTable(Table):
             caption.drop_tree()
 
         if title is not None:
-            specs.append(deque[str](["cb", *["s" for _ in range(ncols - 1)]]))
-            texts.append(deque[str]([title]))
+            specs.append(["cb"] + ["s"] * (ncols - 1))
+            texts.append([title])
 
         for row in self._table:
             col_index = 0
-            spec, text = deque[str](), deque[str]()
+            spec, text = list[str](), list[str]()
             for col in row:
                 while spans[col_index] > 0:
                     spans[col_index] -= 1
@@ -95,7 +94,7 @@ class GeneralTable(Table):
                 bold = "b" if self.bold(col) else ""
                 extend = "x" if self.extend(col_index, ncols) else ""
                 spec.append(f"c{bold}{extend}")
-                spec.extend(["s" for _ in range(colspan - 1)])
+                spec.extend(["s"] * (colspan - 1))
                 text.append(Table.text(col))
                 col_index += colspan
             while col_index < ncols:
@@ -1,4 +1,3 @@
-from collections import deque
 from typing import override
 
 from lxml.html import HtmlElement
@@ -16,20 +15,20 @@ class TParBegin(Table):
 
         for row in self._table:
             if (ncols := len(row)) == 1:
-                specs.append(deque[str](["lt", *["s" for _ in range(width - 1)]]))
-                texts.append(deque[str]([Table.text(row)]))
+                specs.append(["lt"] + ["s"] * (width - 1))
+                texts.append([Table.text(row)])
                 continue
             assert ncols == 3, f"t-par-begin unexpected {ncols=}"
-            specs.append(deque[str](["rt"]))
-            texts.append(deque[str]([Table.text(row[0])]))
+            specs.append(["rt"])
+            texts.append([Table.text(row[0])])
             spec, text = Table.td(row[2], width - 1, "l", p)
             it = zip(spec, text, strict=True)
             spec, text = next(it)
             specs[-1].extend(spec)
             texts[-1].extend(text)
             for spec, text in it:
-                specs.append(deque[str](["^", *spec]))
-                texts.append(deque[str](["", *text]))
+                specs.append(["^", *spec])
+                texts.append(["", *text])
 
         return specs, texts
 
@@ -37,22 +36,22 @@ class TParBegin(Table):
     def normal(self, width: int, p: Processor[[int], TabInfo]) -> TabInfo:
         specs, texts = list[RowSpec](), list[RowText]()
         for row in self._table:
-            specs.append(deque[str](["-" for _ in range(width)]))
+            specs.append(["-"] * width)
             if (ncols := len(row)) == 1:
-                specs.append(deque[str](["lt", *["s" for _ in range(width - 1)]]))
-                texts.append(deque[str]([Table.text(row)]))
+                specs.append(["lt"] + ["s"] * (width - 1))
+                texts.append([Table.text(row)])
                 continue
             assert ncols == 3, f"t-par-begin unexpected {ncols=}"
-            specs.append(deque[str](["rt"]))
-            texts.append(deque[str]([Table.text(row[0])]))
+            specs.append(["rt"])
+            texts.append([Table.text(row[0])])
             spec, text = Table.td(row[2], width - 1, "lx", p)
             it = zip(spec, text, strict=True)
             spec, text = next(it)
             specs[-1].extend(spec)
             texts[-1].extend(text)
             for spec, text in it:
-                specs.append(deque[str](["^", *spec]))
-                texts.append(deque[str](["", *text]))
+                specs.append(["^", *spec])
+                texts.append(["", *text])
         return specs[1:], texts
 
     @staticmethod
@@ -1,4 +1,3 @@
-from collections import deque
 from typing import override
 
 from lxml.html import HtmlElement
@@ -32,7 +31,7 @@ class TSdscBegin(Table):
         specs, texts = list[RowSpec](), list[RowText]()
         for row in self._table:
             assert (ncols := len(row)) == 3, f"t-sdsc-begin unexpected {ncols=}"
-            specs.append(deque[str](["-" for _ in range(width)]))
+            specs.append(["-"] * width)
             spec, text = Table.td(row[0], width - 1, "lx", p)
             specs.extend(spec)
             texts.extend(text)
@@ -1,5 +1,3 @@
-from collections import deque
-
-type RowSpec = deque[str]
-type RowText = deque[str]
+type RowSpec = list[str]
+type RowText = list[str]
 type TabInfo = tuple[list[RowSpec], list[RowText]]
@@ -43,18 +43,18 @@ def _width(meta: TableMeta, is_nested: bool):
 
 
 _nested.route()(_default)
-_nested.route(lambda e: "t-dcl-begin" in e.get("class", ""))(_width(_t_dcl_begin, True))
-_nested.route(lambda e: "t-dsc-begin" in e.get("class", ""))(_width(_t_dsc_begin, True))
-_nested.route(lambda e: "t-rev-begin" in e.get("class", ""))(_width(_t_rev_begin, True))
-_nested.route(lambda e: "t-par-begin" in e.get("class", ""))(_width(_t_par_begin, True))
-_nested.route(lambda e: "t-sdsc-begin" in e.get("class", ""))(_width(_t_sdsc_begin, True))  # fmt: off
+_nested.route(klass="t-dcl-begin")(_width(_t_dcl_begin, True))
+_nested.route(klass="t-dsc-begin")(_width(_t_dsc_begin, True))
+_nested.route(klass="t-rev-begin")(_width(_t_rev_begin, True))
+_nested.route(klass="t-par-begin")(_width(_t_par_begin, True))
+_nested.route(klass="t-sdsc-begin")(_width(_t_sdsc_begin, True))
 
 normal.route()(_default)
-normal.route(lambda e: "t-dcl-begin" in e.get("class", ""))(_width(_t_dcl_begin, False))
-normal.route(lambda e: "t-dsc-begin" in e.get("class", ""))(_width(_t_dsc_begin, False))
-normal.route(lambda e: "t-rev-begin" in e.get("class", ""))(_width(_t_rev_begin, False))
-normal.route(lambda e: "t-par-begin" in e.get("class", ""))(_width(_t_par_begin, False))
-normal.route(lambda e: "t-sdsc-begin" in e.get("class", ""))(_width(_t_sdsc_begin, False))  # fmt: off
+normal.route(klass="t-dcl-begin")(_width(_t_dcl_begin, False))
+normal.route(klass="t-dsc-begin")(_width(_t_dsc_begin, False))
+normal.route(klass="t-rev-begin")(_width(_t_rev_begin, False))
+normal.route(klass="t-par-begin")(_width(_t_par_begin, False))
+normal.route(klass="t-sdsc-begin")(_width(_t_sdsc_begin, False))
 
 
 def table_width(table: HtmlElement):
@@ -1,3 +1,5 @@
+from typing import Callable
+
 from lxml.html import HtmlElement
 
 from cppref.core.processor import Processor
@@ -17,14 +19,28 @@ from cppref.core.processor import Processor
 #         return "".join(texts).strip()
 
 
-def collect(elem: HtmlElement, processor: Processor[[], str]) -> str:
-    texts: list[str] = list()
+def collect_into[**P](
+    elem: HtmlElement,
+    processor: Processor[P, str],
+    write: Callable[[str], object],
+    *args: P.args,
+    **kwargs: P.kwargs,
+):
     if elem.text is not None and len(elem.text.strip()) > 0:
-        texts.append(elem.text)
+        write(elem.text)
 
     for element in elem:
-        texts.append(processor.process(element))
+        write(processor.process(element, *args, **kwargs))
         if element.tail is not None and len(element.tail.strip()) > 0:
-            texts.append(element.tail)
+            write(element.tail)
 
+
+def collect[**P](
+    elem: HtmlElement,
+    processor: Processor[P, str],
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> str:
+    texts: list[str] = list()
+    collect_into(elem, processor, texts.append, *args, **kwargs)
     return "".join(texts)
@@ -1,34 +1,73 @@
 from __future__ import annotations
 
 from copy import deepcopy
-from typing import Callable, Concatenate, Dict, Optional
+from typing import Any, Callable, Concatenate, Dict, Optional
 
 from lxml.html import HtmlElement
 
 type Handler[**P, R] = Callable[Concatenate[HtmlElement, P], R]
 
+type Predicate = Callable[[HtmlElement], bool]
+
+# (predicate evaluated per element or None if always matched, handler)
+type Candidate[**P, R] = tuple[Optional[Predicate], Handler[P, R]]
+
 
 class Matcher:
-    def __init__(self, fn: Callable[[HtmlElement], bool]) -> None:
+    """Match an element by tag, class token and/or an arbitrary predicate.
+
+    ``tag`` and ``klass`` only depend on the tag and the class attribute of an
+    element, which lets the processor resolve them once per distinct pair and
+    index the routes by them. ``fn`` is evaluated for every element.
+    """
+
+    def __init__(
+        self,
+        fn: Optional[Predicate] = None,
+        *,
+        tag: Optional[str | tuple[str, ...]] = None,
+        klass: Optional[str] = None,
+    ) -> None:
         self._fn = fn
+        self._tags = (tag,) if isinstance(tag, str) else tag
+        self._klass = klass
+
+    @property
+    def fn(self) -> Optional[Predicate]:
+        return self._fn
+
+    @property
+    def tags(self) -> Optional[tuple[str, ...]]:
+        return self._tags
+
+    @property
+    def klass(self) -> Optional[str]:
+        return self._klass
 
     @property
     def code(self):
-        return self._fn.__code__.co_code
+        return None if self._fn is None else self._fn.__code__.co_code
 
     @property
     def argcount(self):
-        return self._fn.__code__.co_argcount
+        return None if self._fn is None else self._fn.__code__.co_argcount
 
     @property
     def consts(self):
-        return self._fn.__code__.co_consts
+        return None if self._fn is None else self._fn.__code__.co_consts
+
+    def accepts(self, tag: Any, tokens: list[str]) -> bool:
+        if self._tags is not None and tag not in self._tags:
+            return False
+        return self._klass is None or self._klass in tokens
 
     def __call__(self, element: HtmlElement) -> bool:
-        return self._fn(element)
+        if not self.accepts(element.tag, element.get("class", "").split()):
+            return False
+        return self._fn is None or self._fn(element)
 
     def __hash__(self):
-        return hash((self.code, self.argcount))
+        return hash((self.code, self.argcount, self._tags, self._klass))
 
     def __eq__(self, o):
         if not isinstance(o, Matcher):
@@ -37,6 +76,8 @@ class Matcher:
             self.code == o.code
             and self.argcount == o.argcount
             and self.consts == o.consts
+            and self._tags == o._tags
+            and self._klass == o._klass
         )
 
 
@@ -44,26 +85,79 @@ class Processor[**P, R]:
     def __init__(self) -> None:
         self._routes: Dict[Matcher, Handler[P, R]] = {}
         self._default: Optional[Handler[P, R]] = None
-
-    def route(self, matcher: Optional[Callable[[HtmlElement], bool]] = None):
+        # (tag, class attribute) -> candidates in registration order
+        self._memo: Dict[tuple[Any, Optional[str]], list[Candidate[P, R]]] = {}
+        self._index: Optional[tuple[Dict[Any, list[int]], Dict[str, list[int]], list[int]]] = None  # fmt: off
+
+    def route(
+        self,
+        matcher: Optional[Predicate] = None,
+        *,
+        tag: Optional[str | tuple[str, ...]] = None,
+        klass: Optional[str] = None,
+    ):
         def decorator(fn: Handler[P, R]) -> Handler[P, R]:
-            if matcher is None:
+            if matcher is None and tag is None and klass is None:
                 assert self._default is None, "Duplicate default processor"
                 self._default = fn
             else:
-                self._routes[Matcher(matcher)] = fn
+                self._routes[Matcher(matcher, tag=tag, klass=klass)] = fn
+            self._memo.clear()
+            self._index = None
             return fn
 
         return decorator
 
+    def resolve(self, element: HtmlElement) -> Optional[Handler[P, R]]:
+        """The handler element is routed to, None if neither matched nor defaulted."""
+        key = (element.tag, element.get("class"))
+        if (candidates := self._memo.get(key)) is None:
+            candidates = self._memo[key] = self._compile(*key)
+        for predicate, handler in candidates:
+            if predicate is None or predicate(element):
+                return handler
+        return self._default
+
     def process(self, element: HtmlElement, *args: P.args, **kwargs: P.kwargs) -> R:
-        for matcher, handler in self._routes.items():
-            if matcher(element):
-                return handler(element, *args, **kwargs)
-        assert self._default is not None, (
+        handler = self.resolve(element)
+        assert handler is not None, (
             f"No fallback for element: tag={element.tag}, class={element.get('class')}"
         )
-        return self._default(element, *args, **kwargs)
+        return handler(element, *args, **kwargs)
+
+    def _compile(self, tag: Any, klass: Optional[str]) -> list[Candidate[P, R]]:
+        if self._index is None:
+            self._index = self._build_index()
+        by_tag, by_class, anywhere = self._index
+        tokens = [] if klass is None else klass.split()
+
+        indices = set(anywhere)
+        indices.update(by_tag.get(tag, ()))
+        for token in tokens:
+            indices.update(by_class.get(token, ()))
+
+        routes = list(self._routes.items())
+        candidates = list[Candidate[P, R]]()
+        for index in sorted(indices):
+            matcher, handler = routes[index]
+            if not matcher.accepts(tag, tokens):
+                continue
+            candidates.append((matcher.fn, handler))
+            if matcher.fn is None:
+                break  # routes after an unconditional match are unreachable
+        return candidates
+
+    def _build_index(self):
+        by_tag, by_class, anywhere = dict[Any, list[int]](), dict[str, list[int]](), list[int]()  # fmt: off
+        for index, matcher in enumerate(self._routes):
+            if matcher.tags is not None:
+                for tag in matcher.tags:
+                    by_tag.setdefault(tag, []).append(index)
+            elif matcher.klass is not None:
+                by_class.setdefault(matcher.klass, []).append(index)
+            else:
+                anywhere.append(index)
+        return by_tag, by_class, anywhere
 
     def clone(self) -> Processor[P, R]:
         ret = Processor()
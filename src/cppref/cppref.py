@@ -1,15 +1,31 @@
 #!/usr/bin/env python3
 
 import asyncio
+import os
+import sqlite3
 import sys
+import threading
+from collections import Counter
+from contextlib import ExitStack
+from functools import partial
+from multiprocessing import Pool
 from subprocess import Popen
+from pathlib import Path
+from typing import Any, Callable, Iterator, Literal, Optional
 
 from tqdm import tqdm
 
-from cppref import Record, Source
+from cppref import Engine, Record, Source
+from cppref.archive import ArchiveContext
+from cppref.browser import BrowserService
 from cppref.conf import ConfContext
+from cppref.fetch import FetchContext
 from cppref.fzf import FzfContext
-from cppref.utils import Utils
+from cppref.index import Crawler, IndexContext
+from cppref.journal import Entry, JournalContext, Validators
+from cppref.manifest import ManifestContext
+from cppref.shard import ShardContext
+from cppref.utils import Backoff, Hedge, Limiter, Links, Recycle, RequestError, Utils
 
 
 class CppRef:
@@ -37,11 +53,15 @@ class CppRef:
         except BrokenPipeError:
             pass  # the process piped to has been closed.
 
-    def man(self, *, timeout: float = 10000):
+    def man(self, *, timeout: float = 10000, engine: Engine = "browser", wait: str = "domcontentloaded"):  # fmt: off
         """Lookup a manual page interactively.
 
+        The fetch engine is started while selecting, unless every page is cached.
+
         Args:
             timeout: timeout of requesting webpage.
+            engine: http requests the webpage directly, falling back to the browser for an invalid page.
+            wait: load state or selector of an element the webpage is ready with.
         """
         source = ConfContext.read_source()
         dbfile = ConfContext.dbfile()
@@ -53,70 +73,184 @@ class CppRef:
         except AssertionError as e:
             return print(str(e), file=sys.stderr)
 
-        with FzfContext("+m") as fzf:
-            assert fzf.add_option(*records)
-            selected = fzf.get_selection()
-            if len(selected) == 0:
-                return print("Canceled.")
-            record = records[Record.parse_id(selected[0]) - 1]
-
-        filename = man3.joinpath(f"{source}{record.id}.3.gz")
-        filename.parent.mkdir(parents=True, exist_ok=True)
+        cached = set[str]()
+        for root in filter(lambda root: root.is_dir(), (man3, html)):
+            cached.update(os.listdir(root))
+        warm = any(f"{source}{r.id}.3.gz" not in cached and f"{source}{r.id}.html" not in cached for r in records)  # fmt: off
+        origin = records[0].url if len(records) > 0 else None
 
-        if not filename.exists():
-            htmlname = html.joinpath(f"{source}{record.id}.html")
-            if htmlname.exists():
-                webpage = Utils.read_file(htmlname)
-            else:
-                webpage = Utils.fetch(record, timeout)
-
-            Utils.write_file(filename, Utils.html_handler(source)(webpage, record))
+        with FetchContext(engine, timeout, wait, Utils.html_validator(source), origin, warm) as fetcher:  # fmt: off
+            with FzfContext("+m") as fzf:
+                assert fzf.add_option(*records)
+                selected = fzf.get_selection()
+                if len(selected) == 0:
+                    return print("Canceled.")
+                record = records[Record.parse_id(selected[0]) - 1]
+
+            filename = man3.joinpath(f"{source}{record.id}.3.gz")
+            filename.parent.mkdir(parents=True, exist_ok=True)
+
+            if not filename.exists():
+                htmlname = html.joinpath(f"{source}{record.id}.html")
+                render = Utils.html_renderer(source)
+                if htmlname.exists():
+                    with Utils.map_file(htmlname) as webpage:
+                        Utils.stream_man3(filename, partial(render, webpage, record))
+                else:
+                    webpage = fetcher.fetch(record)
+                    Utils.stream_man3(filename, partial(render, webpage, record))
 
         process = Popen(f"man {filename}", shell=True)
         process.wait()
 
-    def fetch(self, *, force: bool = False, timeout: float = 10000, limit: int = 5):
+    def browser(self, action: Literal["start", "stop", "status"] = "status", *, idle: float = 600):  # fmt: off
+        """Manage the browser kept in the background, which fetching connects to instead of launching one.
+
+        Args:
+            action: start, stop or show the status of the browser.
+            idle: seconds the browser keeps running without being used.
+        """
+        if action == "start":
+            try:
+                return print(f"Browser running at {BrowserService.start(idle)}")
+            except AssertionError as e:
+                return print(str(e), file=sys.stderr)
+        if action == "stop":
+            return print("Browser stopped." if BrowserService.stop() else "No browser running.")  # fmt: off
+        endpoint = BrowserService.endpoint()
+        print("No browser running." if endpoint is None else f"Browser running at {endpoint}")  # fmt: off
+
+    def fetch(self, *, force: bool = False, timeout: float = 10000, limit: int | Literal["auto"] = 5, engine: Engine = "browser", wait: str = "domcontentloaded", attempts: int = 3, floor: int = 1, ceiling: int = 32, hedge: float = 0, hedge_budget: float = 5, workers: int = 1, recycle: int = 100, rss: int = 0):  # fmt: off
         """Fetch web pages from source and save it to the cache.
 
         Args:
             force: whether or not overwrite the existing web pages
             timeout: timeout of single url.
-            limit: number of concurrent requests
+            limit: number of concurrent requests, or auto to adapt it to the latency and errors.
+            engine: http requests the pages directly, falling back to the browser for invalid pages.
+            wait: load state or selector of an element the browser takes a page as ready with, e.g. '#mw-content-text'.
+            attempts: tries of a page failing transiently, i.e. timeouts, 429 and 5xx responses.
+            floor: least number of concurrent requests if limit is auto.
+            ceiling: most number of concurrent requests if limit is auto.
+            hedge: percentile of the latencies a request is duplicated after, 0 to never duplicate.
+            hedge_budget: most duplicated requests, in percent of the requests.
+            workers: number of processes the pages are fetched in, each with its own engine and limit.
+            recycle: navigations of a browser page before it is replaced by a new one.
+            rss: MiB of memory of the browser past which its pages and their context are replaced, once per excess, 0 for no limit.
         """
         source = ConfContext.read_source()
         html = ConfContext.html_root()
+        man3 = ConfContext.man3_root()
 
         # Get required records
         try:
             records = Utils.query(source, ConfContext.dbfile())
         except AssertionError as e:
             return print(f"Unexpected Error: {e}", file=sys.stderr)
-        if not force:
-            records = list(filter(lambda r: not html.joinpath(f"{source}{r.id}.html").exists(), records))  # fmt: off
-            records = list(records)
-        records = list(records)
-        if (length := len(records)) == 0:
-            return print("Nothing to fetch.", file=sys.stderr)
-
-        pbar = tqdm(total=length)
-
-        def on_success(record: Record, resp: str):
-            Utils.write_file(html.joinpath(f"{source}{record.id}.html"), resp)
-            pbar.update()
-
-        def on_failed(record: Record, exec: Exception):
-            print(f"Error={type(exec).__name__}({exec}): {record}", file=sys.stderr)
-            pbar.update()
+        with JournalContext(source, ConfContext.journal()) as journal:
+            entries = journal.entries(records, lambda r: html.joinpath(f"{source}{r.id}.html"), lambda r: man3.joinpath(f"{source}{r.id}.3.gz"))  # fmt: off
+            if not force:
+                # the pending records are the ones an interrupted run left unfinished
+                records = [r for r in records if (e := entries.get(r.id)) is None or e.html is None or e.state in ("pending", "failed")]  # fmt: off
+            if (length := len(records)) == 0:
+                return print("Nothing to fetch.", file=sys.stderr)
+
+            pbar, failed, links = tqdm(total=length), 0, Links()
+
+            def on_success(record: Record, resp: str):
+                journal.fetched(record, links.write_file(html.joinpath(f"{source}{record.id}.html"), resp), Validators.of(resp))  # fmt: off
+                journal.resolved(record, _resolved(record, resp))
+
+            def on_failed(record: Record, exec: Exception):
+                nonlocal failed
+                print(f"Error={type(exec).__name__}({exec}): {record}", file=sys.stderr)
+                journal.failed(record, f"{type(exec).__name__}({exec})")
+                failed += 1
+
+            html.mkdir(parents=True, exist_ok=True)
+            journal.pending(records)
+            limiter = partial(Limiter.of, limit, floor, ceiling)
+            stats = _afetch(records, pbar, workers, limiter, on_success, on_failed, canonical=_canonical(entries), timeout=timeout, engine=engine, validate=Utils.html_validator(source), wait=wait, backoff=Backoff(attempts), hedge=Hedge(hedge, hedge_budget) if hedge > 0 else None, recycle=Recycle(recycle, rss * 2**20 if rss > 0 else None))  # fmt: off
+            pbar.close()
+            stats["linked"] = links.linked
+            print(f"Fetched {length - failed} page(s), {Utils.summary(stats, failed)}.")
+
+    def refresh(self, *, timeout: float = 10000, limit: int | Literal["auto"] = 5, attempts: int = 3, floor: int = 1, ceiling: int = 32):  # fmt: off
+        """Revalidate the cached pages, rewriting and rendering again only the ones modified.
+
+        The pages are requested with the validators they were fetched with, and
+        the ones the server tells unchanged are not downloaded at all.
 
-        html.mkdir(parents=True, exist_ok=True)
-        asyncio.run(Utils.afetch(*records, timeout=timeout, limit=limit, on_success=on_success, on_failed=on_failed))  # fmt: off
+        Args:
+            timeout: timeout of single url.
+            limit: number of concurrent requests, or auto to adapt it to the latency and errors.
+            attempts: tries of a page failing transiently, i.e. timeouts, 429 and 5xx responses.
+            floor: least number of concurrent requests if limit is auto.
+            ceiling: most number of concurrent requests if limit is auto.
+        """
+        source = ConfContext.read_source()
+        html = ConfContext.html_root()
+        man3 = ConfContext.man3_root()
+        try:
+            records = Utils.query(source, ConfContext.dbfile())
+        except AssertionError as e:
+            return print(f"Unexpected Error: {e}", file=sys.stderr)
 
-    def parse(self, force: bool = False, interact: bool = False):
+        with ManifestContext(source, ConfContext.manifest()) as manifest, JournalContext(source, ConfContext.journal()) as journal:  # fmt: off
+            entries = journal.entries(records, lambda r: html.joinpath(f"{source}{r.id}.html"), lambda r: man3.joinpath(f"{source}{r.id}.3.gz"))  # fmt: off
+            records = [r for r in records if r.id in entries and (entries[r.id].html is not None or entries[r.id].man3 is not None)]  # fmt: off
+            if (length := len(records)) == 0:
+                return print("Nothing to refresh.", file=sys.stderr)
+
+            pbar, counts, links = tqdm(total=length), Counter[str](), Links()
+
+            def headers(record: Record) -> dict[str, str]:
+                validators = entries[record.id].validators
+                return {} if validators is None else validators.headers()
+
+            def digest(record: Record) -> Optional[str]:
+                if (validators := entries[record.id].validators) is not None:
+                    return validators.digest
+                # cached before there were validators, the manifest knows the rendered ones
+                return None if (entry := manifest.get(record)) is None else entry[0]
+
+            def on_success(record: Record, resp: str):
+                validators, entry = Validators.of(resp), entries[record.id]
+                if validators.digest == digest(record):
+                    journal.validated(record, validators)
+                    counts["unchanged"] += 1
+                    return
+                if entry.html is not None:
+                    journal.fetched(record, links.write_file(html.joinpath(f"{source}{record.id}.html"), resp), validators)  # fmt: off
+                if entry.man3 is not None:
+                    journal.rendered(record, Utils.write_bytes(man3.joinpath(f"{source}{record.id}.3.gz"), _render(source, record, resp)[2]), validators)  # fmt: off
+                    manifest.update([(record, validators.digest)])
+                journal.resolved(record, _resolved(record, resp))
+                counts["modified"] += 1
+
+            def on_failed(record: Record, exec: Exception):
+                if isinstance(exec, RequestError) and exec.status == 304:
+                    counts["unchanged"] += 1
+                    return
+                print(f"Error={type(exec).__name__}({exec}): {record}", file=sys.stderr)
+                counts["failed"] += 1
+
+            limiter = partial(Limiter.of, limit, floor, ceiling)
+            stats = _afetch(records, pbar, 1, limiter, on_success, on_failed, canonical=_canonical(entries), timeout=timeout, engine="http", validate=Utils.html_validator(source), backoff=Backoff(attempts), headers=headers)  # fmt: off
+            stats["linked"] = links.linked
+            pbar.close()
+            print(f"Refreshed {length - counts['failed']} page(s), {counts['unchanged']} unchanged, {counts['modified']} modified, {Utils.summary(stats, counts['failed'])}.")  # fmt: off
+
+    def parse(self, force: bool = False, interact: bool = False, jobs: Optional[int] = None):  # fmt: off
         """Parse the fetched pages in the cache, and save the results to manual directory.
 
+        Only the pages whose web page or renderer changed since they were parsed
+        are parsed again, unless forced.
+
         Args:
             force: whether or not overwrite the existing manual pages.
             interact: select the manual pages to parse interactively.
+            jobs: number of worker processes, defaults to the number of CPUs.
         """
         source = ConfContext.read_source()
         html = ConfContext.html_root()
@@ -131,38 +265,72 @@ class CppRef:
             records = Utils.query(source, ConfContext.dbfile())
         except AssertionError as e:
             return print(str(e), file=sys.stderr)
-        records = list(filter(lambda r: html.joinpath(f"{source}{r.id}.html").exists(), records))  # fmt: off
+        with JournalContext(source, ConfContext.journal()) as journal:
+            entries = journal.entries(records, lambda r: html.joinpath(f"{source}{r.id}.html"), lambda r: man3.joinpath(f"{source}{r.id}.3.gz"))  # fmt: off
+        records = [r for r in records if r.id in entries and entries[r.id].html is not None]  # fmt: off
         if interact:
             with FzfContext("-m") as fzf:
                 assert fzf.add_option(*records)
                 selected = fzf.get_selection()
                 records = [records[Record.parse_id(s) - 1] for s in selected]
-        elif not force:
-            records = list(filter(lambda r: not man3.joinpath(f"{source}{r.id}.3.gz").exists(), records))  # fmt: off
-        if len(records) == 0:
-            return print("Nothing to parse.")
-
-        # Parse
-        man3.mkdir(parents=True, exist_ok=True)
-        total, process = len(records), Utils.html_handler(source)
-        for r in tqdm(records, desc="Processing", total=total, file=sys.stdout):
-            document = Utils.read_file(html.joinpath(f"{source}{r.id}.html"))
-            try:
-                document = process(document, r)
-            except AssertionError as e:
-                print(f"{e}, record={r}", file=sys.stderr)
-            except Exception as e:
-                print(f"record={r}, Unexpected error {e}", file=sys.stderr)
-            else:
-                Utils.write_man3(man3.joinpath(f"{source}{r.id}.3.gz"), document)
 
-    def cache(self, force: bool = False, timeout: float = 10000, limit: int = 5):
+        with ManifestContext(source, ConfContext.manifest()) as manifest, JournalContext(source, ConfContext.journal()) as journal:  # fmt: off
+            digests = dict[int, str]()
+            for record in records:
+                try:
+                    digests[record.id] = ManifestContext.digest(html.joinpath(f"{source}{record.id}.html").read_bytes())  # fmt: off
+                except OSError as e:  # removed since it was journaled
+                    print(f"{e}, record={record}", file=sys.stderr)
+                    journal.failed(record, f"{e}")
+            records = [r for r in records if r.id in digests]
+            if not interact and not force:
+                # every web page is read anyway, the manual pages are looked up along
+                records = list(filter(lambda r: manifest.outdated(r, digests[r.id]) or entries[r.id].man3 is None or not man3.joinpath(f"{source}{r.id}.3.gz").exists(), records))  # fmt: off
+            if len(records) == 0:
+                return print("Nothing to parse.")
+
+            # Parse
+            man3.mkdir(parents=True, exist_ok=True)
+            jobs = max(1, jobs or os.cpu_count() or 1)
+            # small chunks keep the progress bar smooth, large ones keep the IPC cheap
+            size = max(1, min(32, len(records) // (4 * jobs)))
+            chunks = [records[i : i + size] for i in range(0, len(records), size)]
+            render = partial(Utils.render, source, html, man3)
+            pbar = tqdm(desc="Processing", total=len(records), file=sys.stdout)
+            with ExitStack() as stack:
+                if jobs == 1 or len(chunks) == 1:
+                    results = map(render, chunks)
+                else:
+                    # the workers import the handler once and write the pages themselves
+                    pool = stack.enter_context(Pool(jobs, Utils.html_renderer, (source,)))  # fmt: off
+                    results = pool.imap(render, chunks)
+                for chunk, (sizes, failures) in zip(chunks, results):
+                    for failure, error in failures:
+                        print(error, file=sys.stderr)
+                        journal.failed(failure, error)
+                    for record, size in sizes:
+                        journal.rendered(record, size)
+                    manifest.update((r, digests[r.id]) for r, _ in sizes)
+                    pbar.update(len(chunk))
+            pbar.close()
+
+    def cache(self, force: bool = False, timeout: float = 10000, limit: int | Literal["auto"] = 5, engine: Engine = "browser", wait: str = "domcontentloaded", attempts: int = 3, floor: int = 1, ceiling: int = 32, hedge: float = 0, hedge_budget: float = 5, workers: int = 1, recycle: int = 100, rss: int = 0):  # fmt: off
         """Basically the combination of fetch and parse, except for save the webpages to the cache.
 
         Args:
             force: whether or not overwrite the existing manual pages
             timeout: timeout of single url
-            limit: number of concurrent requests
+            limit: number of concurrent requests, or auto to adapt it to the latency and errors.
+            engine: http requests the pages directly, falling back to the browser for invalid pages.
+            wait: load state or selector of an element the browser takes a page as ready with, e.g. '#mw-content-text'.
+            attempts: tries of a page failing transiently, i.e. timeouts, 429 and 5xx responses.
+            floor: least number of concurrent requests if limit is auto.
+            ceiling: most number of concurrent requests if limit is auto.
+            hedge: percentile of the latencies a request is duplicated after, 0 to never duplicate.
+            hedge_budget: most duplicated requests, in percent of the requests.
+            workers: number of processes the pages are fetched in, each with its own engine and limit.
+            recycle: navigations of a browser page before it is replaced by a new one.
+            rss: MiB of memory of the browser past which its pages and their context are replaced, once per excess, 0 for no limit.
         """
         source = ConfContext.read_source()
         man3 = ConfContext.man3_root()
@@ -170,26 +338,351 @@ class CppRef:
             records = Utils.query(source, ConfContext.dbfile())
         except AssertionError as e:
             return print(f"Unexpected Error: {e}", file=sys.stderr)
-        if not force:
-            records = list(filter(lambda r: not man3.joinpath(f"{source}{r.id}.3.gz").exists(), records))  # fmt: off
-            records = list(records)
-        records = list(records)
-        if (length := len(records)) == 0:
-            return print("Nothing to fetch.", file=sys.stderr)
-
-        pbar, process = tqdm(total=length), Utils.html_handler(source)
-
-        def on_success(record: Record, resp: str):
-            document = process(resp, record)
-            Utils.write_man3(man3.joinpath(f"{source}{record.id}.3.gz"), document)
+
+        html = ConfContext.html_root()
+        with ManifestContext(source, ConfContext.manifest()) as manifest, JournalContext(source, ConfContext.journal()) as journal:  # fmt: off
+            entries = journal.entries(records, lambda r: html.joinpath(f"{source}{r.id}.html"), lambda r: man3.joinpath(f"{source}{r.id}.3.gz"))  # fmt: off
+            if not force:
+                records = [r for r in records if (e := entries.get(r.id)) is None or e.man3 is None or e.state in ("pending", "failed") or manifest.outdated(r)]  # fmt: off
+            if (length := len(records)) == 0:
+                return print("Nothing to fetch.", file=sys.stderr)
+
+            pbar, failed = tqdm(total=length), 0
+
+            def on_success(record: Record, rendered: tuple[Validators, str, bytes]):
+                validators, canonical, content = rendered
+                journal.rendered(record, Utils.write_bytes(man3.joinpath(f"{source}{record.id}.3.gz"), content), validators)  # fmt: off
+                journal.resolved(record, canonical)
+                manifest.update([(record, validators.digest)])
+
+            def on_failed(record: Record, exec: Exception):
+                nonlocal failed
+                print(f"Error={type(exec).__name__}({exec}): {record}", file=sys.stderr)
+                journal.failed(record, f"{type(exec).__name__}({exec})")
+                failed += 1
+
+            man3.mkdir(parents=True, exist_ok=True)
+            journal.pending(records)
+            limiter = partial(Limiter.of, limit, floor, ceiling)
+            # rendered where the page is fetched, i.e. in the workers if there are
+            stats = _afetch(records, pbar, workers, limiter, on_success, on_failed, partial(_render, source), _canonical(entries), timeout=timeout, engine=engine, validate=Utils.html_validator(source), wait=wait, backoff=Backoff(attempts), hedge=Hedge(hedge, hedge_budget) if hedge > 0 else None, recycle=Recycle(recycle, rss * 2**20 if rss > 0 else None))  # fmt: off
+            pbar.close()
+            print(f"Cached {length - failed} page(s), {Utils.summary(stats, failed)}.")
+
+    def index(self, seed: str = "https://en.cppreference.com/w/cpp", *, scope: Optional[str] = None, mirror: Optional[str] = None, output: Optional[str] = None, depth: Optional[int] = None, timeout: float = 10000, limit: int | Literal["auto"] = 5, attempts: int = 3, floor: int = 1, ceiling: int = 32):  # fmt: off
+        """Build the index of the records by crawling the site breadth first, from seed.
+
+        Every page under scope with a heading is a record titled by it. A url keeps
+        the id it has in the current index, so that the ids are stable across the
+        rebuilds, and the records not reached anymore are removed unless some
+        pages failed.
+
+        Args:
+            seed: url of the page the crawl starts from.
+            scope: url of the pages crawled, defaults to the seed.
+            mirror: directory of a mirror of the site, read instead of requesting the pages.
+            output: database the index is written to, defaults to the current index.
+            depth: most links followed from the seed, no limit by default.
+            timeout: timeout of single url.
+            limit: number of concurrent requests, or auto to adapt it to the latency and errors.
+            attempts: tries of a page failing transiently, i.e. timeouts, 429 and 5xx responses.
+            floor: least number of concurrent requests if limit is auto.
+            ceiling: most number of concurrent requests if limit is auto.
+        """
+        source = ConfContext.read_source()
+        path = ConfContext.dbfile() if output is None else Path(output).expanduser()
+        root = None if mirror is None else Path(mirror).expanduser()
+        if root is not None and not root.is_dir():
+            return print(f"{root} is not a directory", file=sys.stderr)
+
+        with IndexContext(source, path, [ConfContext.dbfile()]) as index:
+            pbar, failed = tqdm(desc="Indexing", unit="page"), 0
+
+            def on_page(title: str, url: str):
+                index.add(title, url)
+                pbar.update()
+
+            def on_failed(url: str, exec: Exception):
+                nonlocal failed
+                print(f"Error={type(exec).__name__}({exec}): {url}", file=sys.stderr)
+                failed += 1
+
+            crawler = Crawler(seed, scope, root, depth)
+            stats = crawler.crawl(on_page, on_failed, timeout, Limiter.of(limit, floor, ceiling), Backoff(attempts))  # fmt: off
+            pbar.close()
+            removed = index.prune() if failed == 0 else 0
+            print(f"Indexed {pbar.n} page(s) to {path}, {index.added} new, {removed} removed, {Utils.summary(stats, failed)}.")  # fmt: off
+
+    def update(self, *, dry_run: bool = False, keep: bool = False, timeout: float = 10000, limit: int | Literal["auto"] = 5, engine: Engine = "browser", wait: str = "domcontentloaded", attempts: int = 3, floor: int = 1, ceiling: int = 32, workers: int = 1, **newer: str):  # fmt: off
+        """Replace the index by a newer one, doing only the work its differences call for.
+
+        The pages of the records added or moved to another url are fetched and
+        rendered, those of the records removed are deleted, and the records only
+        renamed are left as they are. Those whose url is only written otherwise
+        are rendered again, since their pages show it, from the cache if there.
+        The differences are shown first.
+
+        Args:
+            from: the newer index, e.g. downloaded from a newer release.
+            dry_run: only show the differences.
+            keep: whether or not save the web pages of the records added to the cache as well.
+            timeout: timeout of single url.
+            limit: number of concurrent requests, or auto to adapt it to the latency and errors.
+            engine: http requests the pages directly, falling back to the browser for invalid pages.
+            wait: load state or selector of an element the browser takes a page as ready with, e.g. '#mw-content-text'.
+            attempts: tries of a page failing transiently, i.e. timeouts, 429 and 5xx responses.
+            floor: least number of concurrent requests if limit is auto.
+            ceiling: most number of concurrent requests if limit is auto.
+            workers: number of processes the pages are fetched in, each with its own engine and limit.
+        """
+        source = ConfContext.read_source()
+        dbfile = ConfContext.dbfile()
+        html = ConfContext.html_root()
+        man3 = ConfContext.man3_root()
+        # from is a keyword, so it is taken as the only keyword argument left
+        if set(newer) != {"from"}:
+            return print("Usage: cppref update --from NEW_INDEX [--dry-run]", file=sys.stderr)
+        path = Path(newer["from"]).expanduser()
+        try:
+            diff = IndexContext.diff(source, dbfile, path)
+        except (AssertionError, sqlite3.Error) as e:
+            return print(f"Unexpected Error: {e}", file=sys.stderr)
+        print(f"Updating from {path}: {diff}.")
+        if dry_run:
+            return
+        if path.resolve() == dbfile.resolve():
+            return print("Nothing to update.", file=sys.stderr)
+
+        with ManifestContext(source, ConfContext.manifest()) as manifest, JournalContext(source, ConfContext.journal()) as journal:  # fmt: off
+            entries = journal.entries(diff.moved + diff.rewritten, lambda r: html.joinpath(f"{source}{r.id}.html"), lambda r: man3.joinpath(f"{source}{r.id}.3.gz"))  # fmt: off
+            cached = {r.id for r in diff.moved + diff.rewritten if (e := entries.get(r.id)) is not None and e.html is not None} | ({r.id for r in diff.added} if keep else set())  # fmt: off
+            # the rewritten are rendered again from their web pages, fetched only if not cached
+            rewritten = [r for r in diff.rewritten if r.id in cached and html.joinpath(f"{source}{r.id}.html").exists()]  # fmt: off
+            records = diff.added + diff.moved + [r for r in diff.rewritten if r not in rewritten]
+
+            for record in diff.removed:
+                html.joinpath(f"{source}{record.id}.html").unlink(missing_ok=True)
+                man3.joinpath(f"{source}{record.id}.3.gz").unlink(missing_ok=True)
+            manifest.remove(diff.removed + diff.moved + diff.rewritten)
+            # what the moved were resolved to is of their old urls, they are pending until fetched again
+            journal.remove(diff.removed + diff.moved)
+            journal.pending(records)
+            journal.flush()
+            # swapped before fetching, an interrupted update is resumed by fetch or cache
+            Utils.write_bytes(dbfile, path.read_bytes())
+            man3.mkdir(parents=True, exist_ok=True)
+            sizes, failures = Utils.render(source, html, man3, rewritten)
+            for failure, error in failures:
+                print(error, file=sys.stderr)
+                journal.failed(failure, error)
+            for record, size in sizes:
+                journal.rendered(record, size)
+            manifest.update((r, ManifestContext.digest(html.joinpath(f"{source}{r.id}.html").read_bytes())) for r, _ in sizes)  # fmt: off
+            again = f", rendered {len(sizes)} again from the cache" if len(rewritten) > 0 else ""
+            if (length := len(records)) == 0:
+                return print(f"Removed the pages of {len(diff.removed)} record(s){again}, nothing to fetch.")  # fmt: off
+
+            if len(cached) > 0:
+                html.mkdir(parents=True, exist_ok=True)
+            pbar, failed, links = tqdm(total=length), 0, Links()
+
+            def on_success(record: Record, rendered: tuple[Validators, str, bytes, str]):
+                validators, canonical, content, page = rendered
+                if record.id in cached:
+                    journal.fetched(record, links.write_file(html.joinpath(f"{source}{record.id}.html"), page), validators)  # fmt: off
+                journal.rendered(record, Utils.write_bytes(man3.joinpath(f"{source}{record.id}.3.gz"), content), validators)  # fmt: off
+                journal.resolved(record, canonical)
+                manifest.update([(record, validators.digest)])
+
+            def on_failed(record: Record, exec: Exception):
+                nonlocal failed
+                print(f"Error={type(exec).__name__}({exec}): {record}", file=sys.stderr)
+                journal.failed(record, f"{type(exec).__name__}({exec})")
+                failed += 1
+
+            limiter = partial(Limiter.of, limit, floor, ceiling)
+            stats = _afetch(records, pbar, workers, limiter, on_success, on_failed, partial(_render_kept, source), timeout=timeout, engine=engine, validate=Utils.html_validator(source), wait=wait, backoff=Backoff(attempts))  # fmt: off
+            pbar.close()
+            stats["linked"] = links.linked
+            print(f"Updated {length - failed} page(s){again}, removed the pages of {len(diff.removed)} record(s), {Utils.summary(stats, failed)}.")  # fmt: off
+
+    def ingest(self, archive: str, *, force: bool = False, keep: bool = False, jobs: Optional[int] = None):  # fmt: off
+        """Render the pages of an offline copy of the site, e.g. the html book of cppreference, without any network.
+
+        The records are told their pages by the paths of the urls, and the pages
+        are read out of the archive one by one as they are rendered.
+
+        Args:
+            archive: directory, zip or tar (compressed or not) of the web pages.
+            force: whether or not overwrite the existing manual pages.
+            keep: whether or not save the web pages to the cache as well.
+            jobs: number of worker processes, defaults to the number of CPUs.
+        """
+        source = ConfContext.read_source()
+        html = ConfContext.html_root()
+        man3 = ConfContext.man3_root()
+        try:
+            records = Utils.query(source, ConfContext.dbfile())
+            context = ArchiveContext(Path(archive).expanduser())
+        except AssertionError as e:
+            return print(str(e), file=sys.stderr)
+
+        with context, ManifestContext(source, ConfContext.manifest()) as manifest, JournalContext(source, ConfContext.journal()) as journal:  # fmt: off
+            matched = ArchiveContext.match(records, context.names())
+            missing = len(records) - sum(map(len, matched.values()))
+            if not force:
+                entries = journal.entries(records, lambda r: html.joinpath(f"{source}{r.id}.html"), lambda r: man3.joinpath(f"{source}{r.id}.3.gz"))  # fmt: off
+                outdated = lambda r: (e := entries.get(r.id)) is None or e.man3 is None or manifest.outdated(r)  # fmt: off
+                matched = {name: group for name, group in ((n, list(filter(outdated, g))) for n, g in matched.items()) if len(group) > 0}  # fmt: off
+            if (length := sum(map(len, matched.values()))) == 0:
+                return print(f"Nothing to ingest, {missing} record(s) not in the archive.", file=sys.stderr)  # fmt: off
+
+            man3.mkdir(parents=True, exist_ok=True)
+            if keep:
+                html.mkdir(parents=True, exist_ok=True)
+            jobs = max(1, jobs or os.cpu_count() or 1)
+            # the pages read ahead of the workers are bounded, the archive is not loaded into memory
+            slots = threading.Semaphore(4 * jobs)
+
+            def pages() -> Iterator[tuple[str, Record, bytes]]:
+                for name, content in context.read(matched.keys()):
+                    slots.acquire()
+                    yield name, matched[name], content
+
+            pbar, failed, links = tqdm(desc="Ingesting", total=length, file=sys.stdout), 0, Links()  # fmt: off
+            with ExitStack() as stack:
+                # a page is read once, and rendered for each of its records
+                render = partial(_ingest, source, keep)
+                if jobs == 1:
+                    results = map(render, pages())
+                else:
+                    pool = stack.enter_context(Pool(jobs, Utils.html_renderer, (source,)))  # fmt: off
+                    # unblocks the pages being read ahead, so that the pool is torn down on an error
+                    stack.callback(slots.release, 4 * jobs)
+                    results = pool.imap_unordered(render, pages())
+                for name, validators, content, rendered in results:
+                    slots.release()
+                    for record, manual in zip(matched[name], rendered, strict=True):
+                        if isinstance(manual, str):
+                            print(f"{manual}, record={record}", file=sys.stderr)
+                            journal.failed(record, manual)
+                            failed += 1
+                            continue
+                        if content is not None:
+                            journal.fetched(record, links.write_bytes(html.joinpath(f"{source}{record.id}.html"), content), validators)  # fmt: off
+                        journal.rendered(record, Utils.write_bytes(man3.joinpath(f"{source}{record.id}.3.gz"), manual), validators)  # fmt: off
+                        manifest.update([(record, validators.digest)])
+                    pbar.update(len(matched[name]))
+            pbar.close()
+            # nothing is retried offline, so the counts of afetch do not apply
+            text = f"Ingested {length - failed} page(s), {missing} not in the archive, {failed} failed"
+            if links.linked > 0:
+                text += f", {links.linked} file(s) hard linked"
+            print(f"{text}.")
+
+
+def _ingest(source: Source, keep: bool, page: tuple[str, list[Record], bytes]) -> tuple[str, Validators, Optional[bytes], list[bytes | str]]:  # fmt: off
+    """The validators of the page, itself if kept, and the gzipped manual page of each of its records or the error it failed with."""  # fmt: off
+    name, records, content = page
+    validators, rendered = Validators(None, None, ManifestContext.digest(content)), list[bytes | str]()  # fmt: off
+    for record in records:
+        try:
+            render = partial(Utils.html_renderer(source), content, record)
+            rendered.append(Utils.pack_man3(f"{source}{record.id}.3", render))
+        except Exception as e:
+            rendered.append(f"{type(e).__name__}({e})")
+    return name, validators, content if keep else None, rendered
+
+
+def _render(source: Source, record: Record, resp: str) -> tuple[Validators, str, bytes]:
+    """The validators of the page, its canonical url and its gzipped manual page."""
+    render = partial(Utils.html_renderer(source), resp, record)
+    return Validators.of(resp), _resolved(record, resp), Utils.pack_man3(f"{source}{record.id}.3", render)  # fmt: off
+
+
+def _canonical(entries: dict[int, Entry]) -> Callable[[Record], str]:
+    """The canonical url of a record, the one its last fetch resolved to if there was one."""
+    return lambda r: e.canonical if (e := entries.get(r.id)) is not None and e.canonical is not None else Utils.canonical(r.url)  # fmt: off
+
+
+def _resolved(record: Record, resp: str) -> str:
+    """The canonical url of the page of record, after the redirects it was fetched through."""
+    return Utils.canonical(getattr(resp, "url", None) or record.url)
+
+
+def _render_kept(source: Source, record: Record, resp: str) -> tuple[Validators, str, bytes, str]:
+    """What _render makes of the page, and the page itself to be cached as well."""
+    return *_render(source, record, resp), resp
+
+
+def _prepared(prepare: Callable[[Record, str], Any], followers: dict[int, list[Record]], record: Record, resp: str) -> list[Any]:  # fmt: off
+    """What prepare makes of the page of record, for record and then each of the records coalesced with it."""  # fmt: off
+    return [prepare(member, resp) for member in (record, *followers.get(record.id, ()))]
+
+
+def _afetch(
+    records: list[Record],
+    pbar: tqdm,
+    workers: int,
+    limiter: Callable[[], Limiter],
+    on_success: Callable[[Record, Any], None],
+    on_failed: Callable[[Record, Exception], None],
+    prepare: Optional[Callable[[Record, str], Any]] = None,
+    canonical: Callable[[Record], str] = lambda r: Utils.canonical(r.url),
+    **options,
+) -> Counter[str]:
+    """Fetch the records by afetch, sharded over workers processes if more than one.
+
+    The pages are handed to on_success as made by prepare, which runs in the
+    workers, while the callbacks and the progress stay in this process. The
+    records of the same canonical url are fetched once, by the first of them
+    (coalesced), and the page is prepared for each of them all the same.
+    """
+    groups = dict[str, list[Record]]()
+    for record in records:
+        groups.setdefault(canonical(record), []).append(record)
+    members = {group[0].id: group for group in groups.values()}
+    leaders = [group[0] for group in groups.values()]
+    # the records coalesced with each leader, for the workers to prepare their pages too
+    prepared = None if prepare is None else partial(_prepared, prepare, {g[0].id: g[1:] for g in groups.values() if len(g) > 1})  # fmt: off
+
+    def success(record: Record, resp: Any):
+        payloads = resp if prepared is not None else [resp] * len(members[record.id])
+        for member, payload in zip(members[record.id], payloads, strict=True):
+            try:
+                on_success(member, payload)
+            except Exception as e:
+                on_failed(member, e)
             pbar.update()
 
-        def on_failed(record: Record, exec: Exception):
-            print(f"Error={type(exec).__name__}({exec}): {record}", file=sys.stderr)
+    def failed(record: Record, exec: Exception):
+        for member in members[record.id]:
+            on_failed(member, exec)
             pbar.update()
 
-        man3.mkdir(parents=True, exist_ok=True)
-        asyncio.run(Utils.afetch(*records, timeout=timeout, limit=limit, on_success=on_success, on_failed=on_failed))  # fmt: off
+    if workers <= 1:
+        limit = limiter()
+
+        def fetched(record: Record, resp: str):
+            pbar.set_postfix(concurrency=limit.limit, refresh=False)
+            success(record, resp if prepared is None else prepared(record, resp))
+
+        def unfetched(record: Record, exec: Exception):
+            pbar.set_postfix(concurrency=limit.limit, refresh=False)
+            failed(record, exec)
+
+        stats = asyncio.run(Utils.afetch(*leaders, limit=limit, on_success=fetched, on_failed=unfetched, **options))  # fmt: off
+    else:
+        with ShardContext(workers, leaders, limiter, prepared, **options) as shards:
+            for record, resp in shards:
+                pbar.set_postfix(concurrency=shards.limit, refresh=False)
+                if isinstance(resp, Exception):
+                    failed(record, resp)
+                else:
+                    success(record, resp)
+        stats = shards.stats
+    stats["coalesced"] = len(records) - len(leaders)
+    return stats
 
 
 def main():
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from contextlib import AsyncExitStack
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+from cppref.typing_ import Engine, Record
+from cppref.utils import Fetcher, Utils
+
+
+class FetchContext:
+    """A fetch engine running on an event loop of its own thread.
+
+    The engine is started in the background on entering if warm, so that it is
+    ready by the time a page is needed, and on the first fetch otherwise.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        timeout: float,
+        wait: str,
+        validate: Callable[[str], bool],
+        origin: Optional[str] = None,
+        warm: bool = True,
+    ) -> None:
+        self._engine, self._timeout, self._wait = engine, timeout, wait
+        self._validate, self._origin, self._warm = validate, origin, warm
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._stack = AsyncExitStack()
+        self._started: Optional[Future[Fetcher]] = None
+
+    def __enter__(self) -> FetchContext:
+        self._thread.start()
+        if self._warm:
+            self._start()
+        return self
+
+    def __exit__(self, __1__, __2__, __3__):
+        asyncio.run_coroutine_threadsafe(self._close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        return False
+
+    def fetch(self, record: Record) -> str:
+        started = self._start()
+        return asyncio.run_coroutine_threadsafe(self._fetch(started, record), self._loop).result()  # fmt: off
+
+    def _start(self) -> Future[Fetcher]:
+        if self._started is None:
+            self._started = asyncio.run_coroutine_threadsafe(self._launch(), self._loop)
+        return self._started
+
+    async def _launch(self) -> Fetcher:
+        if self._engine == "browser":
+            fetchers = await self._stack.enter_async_context(Utils.browser(self._timeout, 1, self._wait))  # fmt: off
+        else:
+            origin = None if self._origin is None else urlsplit(self._origin)._replace(path="/", query="", fragment="").geturl()  # fmt: off
+            fetchers = await self._stack.enter_async_context(Utils.session(self._timeout, 1, origin))  # fmt: off
+        return fetchers[0]
+
+    async def _fetch(self, started: Future[Fetcher], record: Record) -> str:
+        content = await (await asyncio.wrap_future(started))(record)
+        if self._engine == "browser" or self._validate(content):
+            return content
+        async with Utils.browser(self._timeout, 1, self._wait) as fetchers:
+            return await fetchers[0](record)
+
+    async def _close(self):
+        if self._started is not None:
+            try:
+                await asyncio.wrap_future(self._started)
+            except Exception:
+                pass  # failed to start, nothing to close
+        await self._stack.aclose()
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterable, NamedTuple, Optional
+from urllib.parse import unquote, urldefrag, urljoin, urlsplit
+
+from lxml import etree, html
+
+from cppref.typing_ import Record, Source
+from cppref.utils import Backoff, Document, Limiter, Utils
+
+_PARSER = html.HTMLParser(encoding="utf-8", no_network=True, remove_comments=True, remove_pis=True)  # fmt: off
+
+
+class Diff(NamedTuple):
+    """The records of a newer index by how they differ from those of the current one."""
+
+    added: list[Record]  # the ids not in the current index
+    moved: list[Record]  # the ids of another page now
+    renamed: list[Record]  # the ids of the same page with another title
+    removed: list[Record]  # the ids not in the newer index, as they were
+    unchanged: int
+    rewritten: list[Record]  # of the renamed, those whose url is written otherwise, which their pages show
+
+    def __str__(self) -> str:
+        return f"{len(self.added)} added, {len(self.moved)} moved, {len(self.renamed)} renamed, {len(self.removed)} removed, {self.unchanged} unchanged"  # fmt: off
+
+
+class IndexContext:
+    """The table of the records of a source, as read by Utils.query, written in batches.
+
+    A url keeps the id it had in the table, or in the tables of known if it is
+    not in the table yet, so that the ids are stable across the rebuilds. The
+    other urls are given ids past all of those.
+    """
+
+    def __init__(self, source: Source, path: Path, known: Iterable[Path] = (), batch: int = 256) -> None:  # fmt: off
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._table = f'"{source}.com"'
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {self._table} (id INTEGER PRIMARY KEY, title TEXT, url TEXT)")  # fmt: off
+        self._conn.commit()
+        self._ids = {Utils.canonical(url): id for id, url in self._conn.execute(f"SELECT id, url FROM {self._table}")}  # fmt: off
+        taken = set(self._ids.values())
+        for other in filter(lambda p: p.exists() and p.resolve() != path.resolve(), known):
+            for record in Utils.query(source, other):
+                if record.id not in taken and Utils.canonical(record.url) not in self._ids:
+                    self._ids[Utils.canonical(record.url)] = record.id
+                    taken.add(record.id)
+        self._next = max(taken, default=0) + 1
+        self._batch = batch
+        self._rows = list[tuple[int, str, str]]()
+        self._seen = set[int]()
+        self.added = 0  # the urls never indexed before
+
+    def __enter__(self) -> IndexContext:
+        return self
+
+    def __exit__(self, __1__, __2__, __3__):
+        self.flush()
+        self._conn.close()
+        return False
+
+    def add(self, title: str, url: str) -> Record:
+        """The record of the page at url titled title, with the id of its url."""
+        url = Utils.canonical(url)
+        if (id := self._ids.get(url)) is None:
+            id, self._next = self._next, self._next + 1
+            self._ids[url] = id
+            self.added += 1
+        self._seen.add(id)
+        self._rows.append((id, title, url))
+        if len(self._rows) >= self._batch:
+            self.flush()
+        return Record(id, title, url)
+
+    def prune(self) -> int:
+        """Remove the records not added since opened, returns how many there were."""
+        self.flush()
+        ids = [id for (id,) in self._conn.execute(f"SELECT id FROM {self._table}") if id not in self._seen]  # fmt: off
+        with self._conn:
+            self._conn.executemany(f"DELETE FROM {self._table} WHERE id = ?", ((id,) for id in ids))  # fmt: off
+        return len(ids)
+
+    @staticmethod
+    def diff(source: Source, current: Path, newer: Path) -> Diff:
+        """How the records of newer differ from those of current, compared in a single query each."""  # fmt: off
+        assert newer.exists() and newer.is_file(), f"{newer} does not exists!"
+        if not current.exists():
+            return Diff(Utils.query(source, newer), [], [], [], 0, [])
+        table = f'"{source}.com"'
+        with sqlite3.connect(current) as conn:
+            conn.execute("ATTACH DATABASE ? AS newer", (str(newer),))
+            changed = conn.execute(
+                f"SELECT n.id, n.title, n.url, o.id IS NULL, o.url FROM newer.{table} AS n "
+                f"LEFT JOIN main.{table} AS o ON o.id = n.id "
+                "WHERE o.id IS NULL OR o.url IS NOT n.url OR o.title IS NOT n.title ORDER BY n.id"
+            ).fetchall()
+            removed = conn.execute(f"SELECT id, title, url FROM main.{table} WHERE id NOT IN (SELECT id FROM newer.{table}) ORDER BY id").fetchall()  # fmt: off
+            total = conn.execute(f"SELECT COUNT(*) FROM newer.{table}").fetchone()[0]
+        conn.close()
+
+        diff = Diff([], [], [], [Record(*row) for row in removed], total - len(changed), [])
+        for id, title, url, added, old in changed:
+            if added:
+                diff.added.append(Record(id, title, url))
+            elif Utils.canonical(old or "") != Utils.canonical(url or ""):
+                diff.moved.append(Record(id, title, url))
+            else:  # the title, or the url only up to its canonical form
+                diff.renamed.append(Record(id, title, url))
+                if old != url:
+                    diff.rewritten.append(diff.renamed[-1])
+        return diff
+
+    def flush(self):
+        """Write the records added so far in a single transaction."""
+        if len(self._rows) > 0:
+            query = (
+                f"INSERT INTO {self._table} (id, title, url) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET title = excluded.title, url = excluded.url"
+            )
+            with self._conn:
+                self._conn.executemany(query, self._rows)
+            self._rows.clear()
+
+
+class Crawler:
+    """Breadth first crawl of the pages under scope, from seed.
+
+    The pages are requested over http, or read from the files of a mirror of the
+    site if given, e.g. made by wget --mirror --adjust-extension, where the page
+    of https://host/a/b is mirror/a/b.html, mirror/a/b/index.html or either of
+    them under mirror/host.
+    """
+
+    def __init__(self, seed: str, scope: Optional[str] = None, mirror: Optional[Path] = None, depth: Optional[int] = None) -> None:  # fmt: off
+        self.seed = Utils.canonical(seed)
+        self.scope = Utils.canonical(scope or self.seed).rstrip("/")
+        self.mirror = mirror
+        self.depth = depth
+
+    def within(self, url: str) -> bool:
+        return url == self.scope or url.startswith(f"{self.scope}/")
+
+    def links(self, url: str, doc: html.HtmlElement) -> set[str]:
+        """The canonical urls of the pages within scope that doc at url links to."""
+        links = set[str]()
+        for href in doc.xpath("//a/@href"):
+            link, _ = urldefrag(urljoin(url, str(href).strip()))
+            parts = urlsplit(link)
+            if parts.scheme not in ("http", "https") or parts.query != "":
+                continue  # e.g. mailto: or the edit and history views of the pages
+            name = parts.path.rsplit("/", 1)[-1]
+            if self.mirror is not None and name.endswith(".html") and name != "index.html":
+                link = link.removesuffix(".html")  # the extension the mirror added
+            elif "." in name and not name.endswith((".html", ".htm")):
+                continue  # e.g. stylesheets and images
+            if self.within(link := Utils.canonical(link)):
+                links.add(link)
+        return links
+
+    @staticmethod
+    def title(doc: html.HtmlElement) -> Optional[str]:
+        """The text of the first heading of doc, None if it has none."""
+        headings = doc.xpath("//h1")
+        return None if len(headings) == 0 else " ".join(headings[0].text_content().split())  # fmt: off
+
+    def crawl(
+        self,
+        on_page: Callable[[str, str], None],
+        on_failed: Callable[[str, Exception], None],
+        timeout: float = 10000,
+        limit: int | Limiter = 5,
+        backoff: Backoff = Backoff(),
+    ) -> Counter[str]:
+        """Visit every page reachable within scope, handing on_page the title and the url of those titled.
+
+        The pages of a level are fetched limit at a time, and the next level is
+        what they link to and was not visited.
+        """
+        seen, level, depth, stats = {self.seed}, [self.seed], 0, Counter[str]()
+        visited = set[str]()  # the pages, after the redirects
+        while len(level) > 0 and (self.depth is None or depth <= self.depth):
+            found = list[str]()
+
+            def on_success(record: Record, resp: str):
+                # the url redirected to, or of the file read, is the one the links are relative to
+                base = getattr(resp, "url", None) or record.url
+                url = record.url if self.mirror is not None else Utils.canonical(base)
+                if url in visited:
+                    return  # redirected to a page visited already
+                seen.add(url)
+                visited.add(url)
+                try:
+                    doc = html.document_fromstring(resp.encode("utf-8"), parser=_PARSER)
+                except etree.ParserError:
+                    return  # an empty page
+                if self.within(url) and (title := Crawler.title(doc)) is not None:
+                    on_page(title, url)
+                for link in sorted(self.links(base, doc) - seen):
+                    seen.add(link)
+                    found.append(link)
+
+            records = [Record(i, "", url) for i, url in enumerate(level)]
+            if self.mirror is None:
+                stats.update(asyncio.run(Utils.afetch(*records, timeout=timeout, limit=limit, on_success=on_success, on_failed=lambda r, e: on_failed(r.url, e), engine="http", backoff=backoff)))  # fmt: off
+            else:
+                for record in records:  # nothing to wait for
+                    try:
+                        content = self._read(record.url)
+                    except OSError as e:
+                        on_failed(record.url, e)
+                        continue
+                    on_success(record, content)
+            level, depth = found, depth + 1
+        return stats
+
+    def _read(self, url: str) -> Document:
+        """The page of url in the mirror, with the url of its file, which its links are relative to."""  # fmt: off
+        assert self.mirror is not None
+        parts = urlsplit(url)
+        path = unquote(parts.path).strip("/")
+        for root in (self.mirror, self.mirror.joinpath(parts.netloc)):
+            for candidate in (f"{path}.html", f"{path}/index.html", path):
+                if (file := root.joinpath(candidate)).is_file():
+                    return Document(file.read_text(encoding="utf-8", errors="replace"), url=f"{parts.scheme}://{parts.netloc}/{candidate}")  # fmt: off
+        raise FileNotFoundError(f"{url} is not in {self.mirror}")
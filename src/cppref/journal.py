@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Literal, NamedTuple, Optional
+
+from cppref.typing_ import Record, Source
+
+type State = Literal["pending", "fetched", "rendered", "failed"]
+
+
+class Validators(NamedTuple):
+    """What tells a web page changed, i.e. the validators of its response and its digest."""
+
+    etag: Optional[str]
+    modified: Optional[str]  # the Last-Modified header as is
+    digest: str
+
+    @staticmethod
+    def of(document: str) -> Validators:
+        """The validators of a document fetched, the headers are attached to it if there were any."""  # fmt: off
+        digest = hashlib.sha256(document.encode("utf-8")).hexdigest()
+        return Validators(getattr(document, "etag", None), getattr(document, "modified", None), digest)  # fmt: off
+
+    def headers(self) -> dict[str, str]:
+        """The headers of a request of the page, answered with 304 if it was not modified."""  # fmt: off
+        headers = dict[str, str]()
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.modified is not None:
+            headers["If-Modified-Since"] = self.modified
+        return headers
+
+
+class Entry(NamedTuple):
+    state: State
+    attempts: int  # runs the record was started in
+    fetched: Optional[float]  # timestamp the web page was written at
+    rendered: Optional[float]  # timestamp the manual page was written at
+    html: Optional[int]  # bytes of the web page, None if there is none
+    man3: Optional[int]  # bytes of the manual page, None if there is none
+    error: Optional[str]  # of the last failure
+    validators: Optional[Validators]  # of the web page last fetched
+    canonical: Optional[str]  # url of the page the record resolved to, after the redirects
+
+
+class JournalContext:
+    """The state of every record across the runs, so that an interrupted run is resumed from it.
+
+    A record is marked pending once it is started, and it stays so unless its
+    page is fully written, i.e. a run interrupted meanwhile is told by the pending
+    records. The updates are written in a transaction per batch of them, or per
+    interval seconds, and all at once on exiting.
+    """
+
+    def __init__(self, source: Source, path: Path, batch: int = 256, interval: float = 1.0) -> None:  # fmt: off
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._table = f'"{source}.com"'
+        self._conn = sqlite3.connect(path)
+        # readers are not blocked by the writes, and a commit does not wait for the disk
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._table} "
+            "(id INTEGER PRIMARY KEY, state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "fetched REAL, rendered REAL, html INTEGER, man3 INTEGER, error TEXT, "
+            "etag TEXT, modified TEXT, digest TEXT, canonical TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({self._table})")}  # fmt: off
+        for column in ("etag", "modified", "digest", "canonical"):  # journals made before these were
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE {self._table} ADD COLUMN {column} TEXT")
+        self._conn.commit()
+        self._batch, self._interval = batch, interval
+        self._updates = list[tuple[str, tuple]]()
+        self._flushed = time.monotonic()
+
+    def __enter__(self) -> JournalContext:
+        return self
+
+    def __exit__(self, __1__, __2__, __3__):
+        self.flush()
+        self._conn.close()
+        return False
+
+    def get(self, record: Record) -> Optional[Entry]:
+        return self.entries([record]).get(record.id)
+
+    def entries(
+        self,
+        records: Iterable[Record],
+        html: Optional[Callable[[Record], Path]] = None,
+        man3: Optional[Callable[[Record], Path]] = None,
+    ) -> dict[int, Entry]:
+        """The entries of records by id, the ones never started are missing.
+
+        The records missing are looked up in the files at html and man3 if given,
+        e.g. written before there was a journal, and journaled if there are any.
+        The entries adopted so, i.e. never started by a run since, are looked up
+        again as the journal did not write their files, which may have been
+        removed meanwhile. Only these records are ever statted.
+        """
+        self.flush()
+        records = list(records)
+        ids = {r.id for r in records}
+        query = f"SELECT id, state, attempts, fetched, rendered, html, man3, error, etag, modified, digest, canonical FROM {self._table}"  # fmt: off
+        entries = {row[0]: Entry(*row[1:8], None if row[10] is None else Validators(*row[8:11]), row[11]) for row in self._conn.execute(query) if row[0] in ids}  # fmt: off
+        if html is None and man3 is None:
+            return entries
+
+        query = (
+            f"INSERT INTO {self._table} (id, state, fetched, rendered, html, man3) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET state = excluded.state, fetched = excluded.fetched, rendered = excluded.rendered, html = excluded.html, man3 = excluded.man3"  # fmt: off
+        )
+        with self._conn:
+            for record in (r for r in records if (e := entries.get(r.id)) is None or JournalContext._adopted(e)):  # fmt: off
+                page = JournalContext._stat(None if html is None else html(record))
+                manual = JournalContext._stat(None if man3 is None else man3(record))
+                if page is None and manual is None:
+                    if entries.pop(record.id, None) is not None:
+                        self._conn.execute(f"DELETE FROM {self._table} WHERE id = ?", (record.id,))  # fmt: off
+                    continue
+                entry = Entry(
+                    state="fetched" if manual is None else "rendered",
+                    attempts=0,
+                    fetched=None if page is None else page.st_mtime,
+                    rendered=None if manual is None else manual.st_mtime,
+                    html=None if page is None else page.st_size,
+                    man3=None if manual is None else manual.st_size,
+                    error=None,
+                    validators=None,
+                    canonical=None,
+                )
+                if (adopted := entries.get(record.id)) is not None:
+                    entry = entry._replace(error=adopted.error, validators=adopted.validators, canonical=adopted.canonical)  # fmt: off
+                self._conn.execute(query, (record.id, entry.state, entry.fetched, entry.rendered, entry.html, entry.man3))  # fmt: off
+                entries[record.id] = entry
+        return entries
+
+    def pending(self, records: Iterable[Record]):
+        query = (
+            f"INSERT INTO {self._table} (id, state, attempts) VALUES (?, 'pending', 1) "
+            "ON CONFLICT (id) DO UPDATE SET state = 'pending', attempts = attempts + 1"
+        )
+        for record in records:
+            self._update(query, (record.id,))
+
+    def fetched(self, record: Record, size: int, validators: Optional[Validators] = None):
+        query = (
+            f"INSERT INTO {self._table} (id, state, fetched, html) VALUES (?, 'fetched', ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET state = 'fetched', fetched = excluded.fetched, html = excluded.html, error = NULL"  # fmt: off
+        )
+        self._update(query, (record.id, time.time(), size))
+        if validators is not None:
+            self.validated(record, validators)
+
+    def rendered(self, record: Record, size: int, validators: Optional[Validators] = None):
+        query = (
+            f"INSERT INTO {self._table} (id, state, rendered, man3) VALUES (?, 'rendered', ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET state = 'rendered', rendered = excluded.rendered, man3 = excluded.man3, error = NULL"  # fmt: off
+        )
+        self._update(query, (record.id, time.time(), size))
+        if validators is not None:
+            self.validated(record, validators)
+
+    def validated(self, record: Record, validators: Validators):
+        """Keep the validators of the web page of record, which is journaled already."""
+        query = f"UPDATE {self._table} SET etag = ?, modified = ?, digest = ? WHERE id = ?"  # fmt: off
+        self._update(query, (*validators, record.id))
+
+    def resolved(self, record: Record, canonical: str):
+        """Keep the canonical url of record, which is journaled already."""
+        self._update(f"UPDATE {self._table} SET canonical = ? WHERE id = ?", (canonical, record.id))  # fmt: off
+
+    def failed(self, record: Record, error: str):
+        query = (
+            f"INSERT INTO {self._table} (id, state, error) VALUES (?, 'failed', ?) "
+            "ON CONFLICT (id) DO UPDATE SET state = 'failed', error = excluded.error"
+        )
+        self._update(query, (record.id, error))
+
+    def remove(self, records: Iterable[Record]):
+        """Forget records, e.g. removed from the index or moved to another page."""
+        for record in records:
+            self._update(f"DELETE FROM {self._table} WHERE id = ?", (record.id,))
+
+    @staticmethod
+    def _adopted(entry: Entry) -> bool:
+        """Whether the files of entry were found on disk rather than written by a run."""
+        return entry.attempts == 0 and entry.state in ("fetched", "rendered")
+
+    @staticmethod
+    def _stat(path: Optional[Path]) -> Optional[os.stat_result]:
+        if path is None:
+            return None
+        try:
+            return path.stat()
+        except FileNotFoundError:
+            return None
+
+    def flush(self):
+        """Write the updates so far in a single transaction."""
+        if len(self._updates) > 0:
+            with self._conn:
+                for query, params in self._updates:
+                    self._conn.execute(query, params)
+            self._updates.clear()
+        self._flushed = time.monotonic()
+
+    def _update(self, query: str, params: tuple):
+        self._updates.append((query, params))
+        if len(self._updates) >= self._batch or time.monotonic() - self._flushed >= self._interval:  # fmt: off
+            self.flush()
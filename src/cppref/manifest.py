@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from functools import cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+import cppref.core
+from cppref.typing_ import Record, Source
+
+
+class ManifestContext:
+    """Digests of the cached web pages and the renderer each manual page was built from."""
+
+    def __init__(self, source: Source, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._table = f'"{source}.com"'
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._table} "
+            "(id INTEGER PRIMARY KEY, digest TEXT NOT NULL, renderer TEXT NOT NULL)"
+        )
+
+    def __enter__(self) -> ManifestContext:
+        return self
+
+    def __exit__(self, __1__, __2__, __3__):
+        self._conn.commit()
+        self._conn.close()
+        return False
+
+    def get(self, record: Record) -> Optional[tuple[str, str]]:
+        query = f"SELECT digest, renderer FROM {self._table} WHERE id = ?"
+        return self._conn.execute(query, (record.id,)).fetchone()
+
+    def outdated(self, record: Record, digest: Optional[str] = None) -> bool:
+        """Whether the manual page of record was rendered from another page or renderer.
+
+        The web page is not compared if its digest is None, i.e., not fetched yet.
+        """
+        if (entry := self.get(record)) is None:
+            return True
+        return entry[1] != ManifestContext.renderer() or digest not in (None, entry[0])
+
+    def update(self, rows: Iterable[tuple[Record, str]]):
+        query = f"INSERT OR REPLACE INTO {self._table} (id, digest, renderer) VALUES (?, ?, ?)"  # fmt: off
+        renderer = ManifestContext.renderer()
+        self._conn.executemany(query, ((r.id, d, renderer) for r, d in rows))
+
+    def remove(self, records: Iterable[Record]):
+        self._conn.executemany(f"DELETE FROM {self._table} WHERE id = ?", ((r.id,) for r in records))  # fmt: off
+
+    @staticmethod
+    def digest(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    @cache
+    def renderer() -> str:
+        """Fingerprint of the handler sources, changes whenever a handler is modified."""
+        root, sha256 = Path(cppref.core.__file__).parent, hashlib.sha256()
+        for path in sorted(root.rglob("*.py")):
+            sha256.update(path.relative_to(root).as_posix().encode("utf-8"))
+            sha256.update(path.read_bytes())
+        return sha256.hexdigest()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import pickle
+import queue
+from collections import Counter
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+from cppref.typing_ import Record
+from cppref.utils import Limiter, Utils
+
+# spawned rather than forked, the workers start their own threads, browsers and
+# event loops, which are not safe to inherit from a parent that runs threads
+_CONTEXT = multiprocessing.get_context("spawn")
+
+# what a worker sends to the parent:
+# (worker, record, payload or error, limit of the worker) for every record,
+# (worker, None, stats of the worker, limit of the worker) once the worker is done
+type Event = tuple[int, Optional[Record], Any, int]
+
+
+class ShardContext:
+    """Fetch the records in worker processes, each with an engine and an event loop of its own.
+
+    The records are dealt to the workers in turn. A worker hands the page of each
+    record to prepare, e.g. to render it, and sends the result back, so that the
+    CPU bound work is spread over the workers while the parent does the writes.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        records: Sequence[Record],
+        limiter: Callable[[], Limiter],
+        prepare: Optional[Callable[[Record, str], Any]] = None,
+        **options,
+    ) -> None:
+        self._shards = [list(records[i::workers]) for i in range(workers)]
+        self._shards = [shard for shard in self._shards if len(shard) > 0]
+        self._events: multiprocessing.Queue[Event] = _CONTEXT.Queue()
+        self._processes = [
+            _CONTEXT.Process(target=ShardContext._work, args=(i, shard, self._events, limiter, prepare, options), daemon=True)  # fmt: off
+            for i, shard in enumerate(self._shards)
+        ]
+        self._limits = [0] * len(self._shards)
+        self._stats = Counter[str]()
+
+    def __enter__(self) -> ShardContext:
+        for process in self._processes:
+            process.start()
+        return self
+
+    def __exit__(self, __1__, __2__, __3__):
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        self._events.close()
+        return False
+
+    @property
+    def limit(self) -> int:
+        """Requests in flight allowed over all of the workers."""
+        return sum(self._limits)
+
+    @property
+    def stats(self) -> Counter[str]:
+        """The counts of afetch summed over the workers, complete once iterated."""
+        return self._stats
+
+    def __iter__(self) -> Iterator[tuple[Record, Any]]:
+        """The records with what prepare made of their pages, or their errors, as they come."""
+        pending = [{r.id: r for r in shard} for shard in self._shards]
+        done = [False] * len(self._shards)
+        while not all(done):
+            try:
+                worker, record, payload, limit = self._events.get(timeout=0.5)
+            except queue.Empty:
+                for i, process in enumerate(self._processes):
+                    if done[i] or process.is_alive() or process.exitcode is None:
+                        continue
+                    # died without telling, e.g. killed or out of memory
+                    done[i] = True
+                    error = RuntimeError(f"Worker {i} exited with {process.exitcode}")
+                    for record in pending[i].values():
+                        yield record, error
+                continue
+            if record is None:
+                done[worker] = True
+                self._stats.update(payload)
+                continue
+            self._limits[worker] = limit
+            if pending[worker].pop(record.id, None) is not None:
+                yield record, payload
+
+    @staticmethod
+    def _work(
+        worker: int,
+        records: list[Record],
+        events: multiprocessing.Queue[Event],
+        limiter: Callable[[], Limiter],
+        prepare: Optional[Callable[[Record, str], Any]],
+        options: dict[str, Any],
+    ):
+        limit = limiter()
+
+        def on_success(record: Record, resp: str):
+            events.put((worker, record, resp if prepare is None else prepare(record, resp), limit.limit))  # fmt: off
+
+        def on_failed(record: Record, e: Exception):
+            events.put((worker, record, ShardContext._portable(e), limit.limit))
+
+        stats = asyncio.run(Utils.afetch(*records, limit=limit, on_success=on_success, on_failed=on_failed, **options))  # fmt: off
+        events.put((worker, None, stats, limit.limit))
+        events.close()
+        events.join_thread()
+
+    @staticmethod
+    def _portable(e: Exception) -> Exception:
+        """e if it survives being sent to the parent, a RuntimeError telling about it otherwise."""
+        try:
+            pickle.loads(pickle.dumps(e))
+            return e
+        except Exception:
+            return RuntimeError(f"{type(e).__name__}: {e}")
@@ -5,6 +5,10 @@ type Source = Literal["cppreference", "cplusplus"]
 
 type Format = Literal["html", "man"]
 
+type Engine = Literal["http", "browser"]
+
+type LoadState = Literal["commit", "domcontentloaded", "load", "networkidle"]
+
 type ConfKey = Literal["source", "path"]
 
 type ConfVal = Union[str, Source]
@@ -1,16 +1,212 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
+import email.utils
 import gzip
+import hashlib
+import io
+import math
+import mmap
+import os
+import random
 import sqlite3
+import time
 from asyncio import Queue
+from collections import Counter
+from collections.abc import Buffer
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
 from pathlib import Path
-from typing import Callable
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Mapping, NamedTuple, Optional, Sequence, cast, get_args
+from urllib.parse import urlsplit, urlunsplit
 
-from playwright.async_api import Page, async_playwright
-from playwright.sync_api import sync_playwright
+import aiohttp
+from playwright import async_api
+from playwright.async_api import Browser, BrowserContext, Page, async_playwright
 
-from cppref.typing_ import Record, Source
+from cppref.browser import BrowserService
+from cppref.typing_ import Engine, LoadState, Record, Source
+
+type Fetcher = Callable[[Record], Awaitable[str]]
+
+_LOAD_STATES: tuple[LoadState, ...] = get_args(LoadState.__value__)
+
+
+class Document(str):
+    """A fetched web page, with the validators the server sent along, if any, and the url it was redirected to."""  # fmt: off
+
+    etag: Optional[str]
+    modified: Optional[str]
+    url: Optional[str]
+
+    def __new__(cls, content: str, etag: Optional[str] = None, modified: Optional[str] = None, url: Optional[str] = None) -> Document:  # fmt: off
+        document = super().__new__(cls, content)
+        document.etag, document.modified, document.url = etag, modified, url
+        return document
+
+
+class RequestError(Exception):
+    """A response that is not ok, with the seconds to wait before retrying if the server told so."""  # fmt: off
+
+    def __init__(self, message: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    def __reduce__(self):
+        return RequestError, (str(self), self.status, self.retry_after)
+
+    @staticmethod
+    def of(record: Record, status: int, reason: str, headers: Mapping[str, str]) -> RequestError:  # fmt: off
+        retry_after = None
+        if (value := headers.get("retry-after")) is not None:  # seconds or a date
+            try:
+                retry_after = float(value)
+            except ValueError:
+                try:
+                    retry_after = max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())  # fmt: off
+                except (TypeError, ValueError):
+                    pass
+        return RequestError(f"Request failed: {record}, status={reason}", status, retry_after)  # fmt: off
+
+    @property
+    def retryable(self) -> bool:
+        return self.status == 429 or self.status >= 500
+
+
+class Crashed(Exception):
+    """The page or the browser crashed while fetching, the record is fetched again on a new one."""
+
+
+class Backoff(NamedTuple):
+    """Retries of the transient failures, with exponential backoff and full jitter."""
+
+    attempts: int = 3  # tries in total, including the first one
+    base: float = 0.5  # seconds
+    cap: float = 30.0
+
+    @staticmethod
+    def retryable(e: Exception) -> bool:
+        if isinstance(e, RequestError):
+            return e.retryable
+        return isinstance(e, (Crashed, TimeoutError, async_api.TimeoutError, aiohttp.ServerDisconnectedError))  # fmt: off
+
+    def delay(self, attempt: int, e: Exception) -> float:
+        """Seconds to wait before trying again after the attempt-th try failed with e."""
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+        if isinstance(e, RequestError) and e.retry_after is not None:
+            return max(delay, e.retry_after)
+        return delay
+
+
+class Hedge(NamedTuple):
+    """Duplicate requests running longer than percentile of the latencies, within budget."""
+
+    percentile: float = 95.0
+    budget: float = 5.0  # the most duplicates, in percent of the requests
+    samples: int = 20  # latencies to see before hedging
+
+    def spare(self, limit: int) -> int:
+        """Workers kept for the duplicates besides the limit ones."""
+        return max(1, math.ceil(limit * self.budget / 100))
+
+
+class Recycle(NamedTuple):
+    """When the pages of the browser and their contexts are replaced by new ones, so that the memory of long runs stays flat."""  # fmt: off
+
+    navigations: int = 100  # of a page
+    rss: Optional[int] = None  # bytes resident of the browser processes, measured on Linux only
+    interval: float = 1.0  # seconds between the measures of rss
+    pages: int = 10  # replaced after their navigations in a context, before the context is replaced as well
+
+
+class Links:
+    """Write every content once, the paths of the same content later written are hard linked to the first.
+
+    The files are only ever replaced, never written in place, so a file linked
+    is not changed by another path written afterwards.
+    """
+
+    def __init__(self) -> None:
+        self._written = dict[str, Path]()  # digest of a content -> the path it was written to
+        self._digests = dict[Path, str]()  # the other way around, of the paths written
+        self.linked = 0
+
+    def write_file(self, path: Path, content: str) -> int:
+        return self.write_bytes(path, content.encode("utf-8"))
+
+    def write_bytes(self, path: Path, content: bytes) -> int:
+        digest = hashlib.sha256(content).hexdigest()
+        if (first := self._written.get(digest)) is not None and first != path and Utils.link(first, path):  # fmt: off
+            self.linked += 1
+            return len(content)
+        if (replaced := self._digests.pop(path, None)) is not None:
+            del self._written[replaced]  # path does not hold that content anymore
+        size = Utils.write_bytes(path, content)
+        self._written[digest], self._digests[path] = path, digest
+        return size
+
+
+class Limiter:
+    """The number of requests in flight, either fixed or adapted to how the server copes.
+
+    An adaptive limit grows by one per request until the first congestion
+    (slow start), then by one per limit requests, and is halved on congestion:
+    a transient failure, or the average latency getting tolerance times the
+    lowest one seen. It is decreased at most once per limit requests, and kept
+    within floor and ceiling.
+    """
+
+    def __init__(self, floor: int, ceiling: int, adaptive: bool = False, tolerance: float = 2.0) -> None:  # fmt: off
+        assert 1 <= floor <= ceiling, f"Invalid limits: floor={floor}, ceiling={ceiling}"
+        self.floor, self.ceiling, self.adaptive = floor, ceiling, adaptive
+        self._window = float(floor if adaptive else ceiling)
+        self._threshold = float(ceiling)  # of the slow start
+        self._tolerance = tolerance
+        self._fastest = float("inf")
+        self._average = 0.0  # moving average of the latency, so a single slow request is not congestion
+        self._cooldown = 0
+        self._inflight = 0
+        self._condition = asyncio.Condition()
+
+    @staticmethod
+    def of(limit: int | str, floor: int = 1, ceiling: int = 32) -> Limiter:
+        if limit == "auto":
+            return Limiter(floor, ceiling, adaptive=True)
+        return Limiter(int(limit), int(limit))
+
+    @property
+    def limit(self) -> int:
+        return int(self._window)
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._inflight < self.limit)
+            self._inflight += 1
+
+    async def release(self, latency: float, congested: bool, ok: bool = True):
+        """Release a request that took latency seconds, and was ok or failed with or without congestion."""  # fmt: off
+        async with self._condition:
+            self._inflight -= 1
+            if self.adaptive and (ok or congested):
+                self._adapt(latency, congested)
+            self._condition.notify_all()
+
+    def _adapt(self, latency: float, congested: bool):
+        if not congested:
+            self._fastest = min(self._fastest, latency)
+            self._average = latency if self._average == 0 else 0.8 * self._average + 0.2 * latency
+            congested = self._average > self._tolerance * self._fastest
+        self._cooldown = max(0, self._cooldown - 1)
+        if congested:
+            if self._cooldown == 0:
+                self._threshold = self._window = max(float(self.floor), self._window / 2)
+                self._cooldown = self.limit
+        elif self._window < self._threshold:
+            self._window = min(float(self.ceiling), self._window + 1)
+        else:
+            self._window = min(float(self.ceiling), self._window + 1 / self._window)
 
 
 class Utils:
@@ -25,45 +221,389 @@ class Utils:
         return ret
 
     @staticmethod
-    def fetch(record: Record, timeout: float) -> str:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            resp = page.goto(record.url, timeout=timeout, wait_until="networkidle")
-            assert resp is not None, f"Timeout: {record}"
-            assert resp.ok, f"Request failed: status={resp.status_text}, {record}"
-            content = page.content()
-            page.close()
-            browser.close()
-            return content
+    def _readiness(wait: str) -> tuple[LoadState, Optional[str]]:
+        """The load state to navigate until, and the selector to wait for afterwards if any.
+
+        wait is either a load state, or the selector of an element the page is ready with.
+        """
+        if wait in _LOAD_STATES:
+            return cast(LoadState, wait), None
+        return "domcontentloaded", wait
+
+    @staticmethod
+    async def _ablock(route: async_api.Route):
+        # only the page itself is needed, not its images, fonts, stylesheets and scripts
+        if route.request.resource_type == "document":
+            await route.continue_()
+        else:
+            await route.abort()
 
     @staticmethod
     async def afetch(
         *records: Record,
         timeout: float,
-        limit: int,
+        limit: int | Limiter,
+        on_success: Callable[[Record, str], None],
+        on_failed: Callable[[Record, Exception], None],
+        engine: Engine = "browser",
+        validate: Optional[Callable[[str], bool]] = None,
+        wait: str = "domcontentloaded",
+        backoff: Backoff = Backoff(),
+        hedge: Optional[Hedge] = None,
+        recycle: Recycle = Recycle(),
+        headers: Optional[Callable[[Record], Mapping[str, str]]] = None,
+    ) -> Counter[str]:
+        """Fetch the web pages of records, limit at a time.
+
+        Returns the counts of the requests, of the records succeeded after a retry
+        (retried), of the duplicated requests (hedged) and the duplicates that
+        finished first (won).
+
+        The http engine requests the pages directly, those failing validate are
+        fetched again with the browser. The browser takes a page as ready once
+        wait, a load state or the selector of an element, is reached, and its pages
+        are replaced as told by recycle. The http requests are sent with the headers
+        of their records if given, e.g. to make them conditional.
+        """
+        limit = limit if isinstance(limit, Limiter) else Limiter(limit, limit)
+        browse = partial(Utils._browse, timeout=timeout, limit=limit, on_success=on_success, on_failed=on_failed, wait=wait, backoff=backoff, hedge=hedge, recycle=recycle)  # fmt: off
+        if engine == "browser":
+            return await browse(records)
+        assert engine == "http", f"Unknown engine: {engine}"
+
+        invalid = list[Record]()
+
+        def on_fetched(record: Record, resp: str):
+            if validate is None or validate(resp):
+                on_success(record, resp)
+            else:
+                invalid.append(record)
+
+        stats = await Utils._request(records, timeout, limit, on_fetched, on_failed, backoff, hedge, headers)  # fmt: off
+        if len(invalid) > 0:
+            stats.update(await browse(invalid))
+        return stats
+
+    @staticmethod
+    async def _browse(
+        records: Sequence[Record],
+        timeout: float,
+        limit: Limiter,
+        on_success: Callable[[Record, str], None],
+        on_failed: Callable[[Record, Exception], None],
+        wait: str,
+        backoff: Backoff,
+        hedge: Optional[Hedge],
+        recycle: Recycle,
+    ) -> Counter[str]:
+        spare = 0 if hedge is None else hedge.spare(limit.ceiling)
+        async with Utils.browser(timeout, limit.ceiling + spare, wait, recycle) as fetchers:
+            return await Utils._drain(records, fetchers, on_success, on_failed, backoff, limit, hedge)  # fmt: off
+
+    @staticmethod
+    async def _request(
+        records: Sequence[Record],
+        timeout: float,
+        limit: Limiter,
         on_success: Callable[[Record, str], None],
         on_failed: Callable[[Record, Exception], None],
-    ):
+        backoff: Backoff,
+        hedge: Optional[Hedge],
+        headers: Optional[Callable[[Record], Mapping[str, str]]],
+    ) -> Counter[str]:
+        spare = 0 if hedge is None else hedge.spare(limit.ceiling)
+        async with Utils.session(timeout, limit.ceiling + spare, headers=headers) as fetchers:
+            return await Utils._drain(records, fetchers, on_success, on_failed, backoff, limit, hedge)  # fmt: off
+
+    @staticmethod
+    @asynccontextmanager
+    async def browser(timeout: float, limit: int, wait: str, recycle: Recycle = Recycle()) -> AsyncIterator[list[Fetcher]]:  # fmt: off
+        """A fetcher per page of a browser, the shared one if it answers, a new one otherwise.
+
+        The pages are opened on their first use, and replaced by new ones after
+        the navigations of recycle. Their context is replaced after the pages of
+        recycle, and both are once the browser goes past its rss. A page crashed
+        is replaced as well, so is the browser if it is gone, and the fetch fails
+        with Crashed so that the record is tried again.
+        """
+        state, selector = Utils._readiness(wait)
+        loop = asyncio.get_running_loop()
+        pages, crashed, lock = set[Page](), set[Page](), asyncio.Lock()
+        browser: Optional[Browser] = None
+        context: Optional[BrowserContext] = None
+        retired = set[BrowserContext]()  # closed once their last page is
+        root = os.getpid()  # the processes of the browser descend from
+        # bumped whenever the browser goes past its rss, the pages and the context opened before are replaced
+        epoch, measured, armed = 0, -math.inf, True
+        recycled, renewed = 0, 0  # pages of the context replaced after their navigations, epoch it was opened in
+
+        async def launch(p: async_api.Playwright):
+            nonlocal browser, context, root
+            browser, context = None, None
+            retired.clear()  # gone with the browser
+            if (endpoint := BrowserService.endpoint()) is not None:
+                try:
+                    browser = await p.chromium.connect_over_cdp(endpoint)
+                    root = BrowserService.pid() or os.getpid()
+                except async_api.Error:
+                    pass  # gone meanwhile, or not a browser after all
+            if browser is None:
+                browser = await p.chromium.launch(headless=True)
+                root = os.getpid()
+            await renew()
+
+        async def renew():
+            nonlocal context, recycled, renewed
+            assert browser is not None
+            if (old := context) is not None:
+                retired.add(old)
+            context = await browser.new_context(service_workers="block")
+            await context.route("**/*", Utils._ablock)
+            recycled, renewed = 0, epoch
+            if old is not None:
+                await release(old)
+
+        async def release(old: BrowserContext):
+            if old not in retired or any(page.context is old for page in pages):
+                return
+            retired.discard(old)
+            try:
+                await old.close()
+            except async_api.Error:
+                pass  # gone with the browser
+
+        async def close(page: Page):
+            pages.discard(page)
+            crashed.discard(page)
+            try:
+                await page.close()
+            except async_api.Error:
+                pass  # crashed, or gone with the browser
+            await release(page.context)
+
+        def swollen() -> int:
+            nonlocal epoch, measured, armed
+            if recycle.rss is None or loop.time() - measured < recycle.interval:
+                return epoch
+            measured = loop.time()
+            if (rss := Utils.rss(root)) is None:
+                return epoch
+            # once per breach, a browser which stays past its rss is not recycled over and over
+            if rss <= recycle.rss:
+                armed = True
+            elif armed:
+                epoch, armed = epoch + 1, False
+            return epoch
+
+        def fetcher(p: async_api.Playwright) -> Fetcher:
+            page: Optional[Page] = None
+            navigations, opened = 0, 0
+
+            async def fetch(record: Record) -> str:
+                nonlocal page, navigations, opened, recycled
+                async with lock:
+                    if browser is None or not browser.is_connected():
+                        await launch(p)
+                assert browser is not None and context is not None
+                current = swollen()
+                if page is not None and (page.is_closed() or page in crashed or page.context is not context or navigations >= recycle.navigations or opened < current):  # fmt: off
+                    recycled += page.context is context and navigations >= recycle.navigations
+                    await close(page)
+                    page = None
+                if page is None:
+                    async with lock:
+                        if recycled >= recycle.pages or renewed < current:
+                            await renew()
+                    assert context is not None
+                    page = await context.new_page()
+                    page.once("crash", crashed.add)
+                    pages.add(page)
+                    navigations, opened = 0, current
+                navigations += 1
+                BrowserService.touch()  # keeps the shared browser, if any, alive
+                try:
+                    resp = await page.goto(record.url, timeout=timeout, wait_until=state)
+                    assert resp is not None, f"Timeout: {record}"
+                    if not resp.ok:
+                        raise RequestError.of(record, resp.status, resp.status_text, resp.headers)  # fmt: off
+                    if selector is not None:
+                        await page.wait_for_selector(selector, state="attached", timeout=timeout)  # fmt: off
+                    return Document(await page.content(), resp.headers.get("etag"), resp.headers.get("last-modified"), page.url)  # fmt: off
+                except async_api.Error as e:
+                    if page in crashed or page.is_closed() or not browser.is_connected():
+                        raise Crashed(f"Crashed: {record}") from e
+                    raise
+
+            return fetch
+
+        async with async_playwright() as p:
+            await launch(p)
+            try:
+                yield [fetcher(p) for _ in range(limit)]
+            finally:
+                for page in list(pages):
+                    await close(page)
+                if browser is not None and browser.is_connected():
+                    assert context is not None
+                    await context.close()  # the retired ones went with their last page
+                    await browser.close()
+
+    @staticmethod
+    def rss(root: int) -> Optional[int]:
+        """Bytes resident in memory of the processes descending from root, None without /proc."""
+        proc = Path("/proc")
+        if not proc.is_dir():
+            return None
+        children = dict[int, list[int]]()
+        for entry in proc.iterdir():
+            if not entry.name.isdigit():
+                continue
+            try:
+                stat = entry.joinpath("stat").read_text()
+            except OSError:
+                continue  # exited meanwhile
+            # the command in parentheses may contain spaces, the fields after it are the state and the parent
+            ppid = int(stat[stat.rindex(")") + 2 :].split()[1])
+            children.setdefault(ppid, []).append(int(entry.name))
+
+        total, pending = 0, list(children.get(root, ()))
+        while len(pending) > 0:
+            pid = pending.pop()
+            pending.extend(children.get(pid, ()))
+            try:
+                total += int(proc.joinpath(str(pid), "statm").read_text().split()[1]) * mmap.PAGESIZE  # fmt: off
+            except OSError:
+                continue
+        return total
+
+    @staticmethod
+    @asynccontextmanager
+    async def session(timeout: float, limit: int, origin: Optional[str] = None, headers: Optional[Callable[[Record], Mapping[str, str]]] = None) -> AsyncIterator[list[Fetcher]]:  # fmt: off
+        """limit fetchers sharing a pool of HTTP connections, with one to origin opened ahead if given.
+
+        A page requested with the headers of its record and not modified fails
+        with a RequestError of status 304.
+        """
+        # the connections are kept alive and reused, at most limit of them per host
+        connector = aiohttp.TCPConnector(limit_per_host=limit)
+        defaults = {"Accept-Encoding": "gzip, deflate, br"}
+        async with aiohttp.ClientSession(connector=connector, headers=defaults, timeout=aiohttp.ClientTimeout(total=timeout / 1000)) as session:  # fmt: off
+
+            async def fetch(record: Record) -> str:
+                async with session.get(record.url, headers=None if headers is None else headers(record)) as resp:  # fmt: off
+                    if not resp.ok or resp.status == 304:
+                        raise RequestError.of(record, resp.status, resp.reason or "", resp.headers)  # fmt: off
+                    content = await resp.text(encoding=resp.charset or "utf-8")
+                    return Document(content, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), str(resp.url))  # fmt: off
+
+            if origin is not None:
+                try:
+                    async with session.head(origin):
+                        pass
+                except Exception:
+                    pass  # it was only to save the handshake
+            yield [fetch] * limit
+
+    @staticmethod
+    async def _drain(
+        records: Sequence[Record],
+        fetchers: list[Fetcher],
+        on_success: Callable[[Record, str], None],
+        on_failed: Callable[[Record, Exception], None],
+        backoff: Backoff,
+        limit: Limiter,
+        hedge: Optional[Hedge] = None,
+    ) -> Counter[str]:
+        """Fetch the records with the fetchers, limit at a time, the results are handled as they come.
+
+        The fetchers in use are taken from the top of the pool, so that as few of
+        them as the limit reached are used. A record failed transiently is put back
+        to the queue once its backoff elapsed, instead of holding a worker meanwhile.
+        A request running late is duplicated on an idle fetcher if hedge, outside of
+        the limit but within the budget, and the first to finish is taken.
+        """
+        loop = asyncio.get_running_loop()
         _records = Queue[Record]()
         for recrod in records:
             _records.put_nowait(recrod)
 
         _results = Queue[tuple[Record, Exception | str]]()
+        attempts, stats, latencies = dict[Record, int](), Counter[str](), list[float]()
+        # the fetchers besides the ones of the producers, a duplicate takes one of them
+        spare, hedging = len(fetchers) - limit.ceiling, 0
+
+        def requeue(record: Record):
+            _records.put_nowait(record)
+            _records.task_done()  # the failed attempt, only done once the retry is queued
+
+        pool = list(reversed(fetchers))
+
+        async def request(fetch: Fetcher, record: Record, limited: bool = True) -> str:
+            """Fetch record with fetch taken from the pool, released to the limit if limited."""
+            start = loop.time()
+            try:
+                content = await fetch(record)
+            except asyncio.CancelledError:
+                if limited:
+                    await limit.release(loop.time() - start, False, ok=False)
+                raise
+            except Exception as e:
+                if limited:
+                    await limit.release(loop.time() - start, Backoff.retryable(e), ok=False)  # fmt: off
+                raise
+            else:
+                if limited:
+                    await limit.release(loop.time() - start, False)
+                bisect.insort(latencies, loop.time() - start)
+                return content
+            finally:
+                pool.append(fetch)
 
-        async def producer(page: Page):
-            while not _records.empty():
-                record = _records.get_nowait()
+        async def hedged(primary: asyncio.Task[str], record: Record) -> str:
+            nonlocal hedging
+            assert hedge is not None
+            if len(latencies) < hedge.samples:
+                return await primary
+            late = latencies[round(hedge.percentile / 100 * (len(latencies) - 1))]
+            done, _ = await asyncio.wait((primary,), timeout=late)
+            if len(done) > 0 or hedging >= spare or stats["hedged"] + 1 > hedge.budget / 100 * stats["requests"]:  # fmt: off
+                return await primary
+
+            stats["hedged"] += 1
+            hedging += 1
+            secondary = asyncio.create_task(request(pool.pop(), record, limited=False))
+            racing = {primary, secondary}
+            try:
+                while True:
+                    done, racing = await asyncio.wait(racing, return_when=asyncio.FIRST_COMPLETED)  # fmt: off
+                    if (winner := next((t for t in done if t.exception() is None), None)) is not None:  # fmt: off
+                        stats["won"] += winner is secondary
+                        return winner.result()
+                    if len(racing) == 0:  # both failed
+                        return done.pop().result()
+            finally:
+                for task in racing:
+                    task.cancel()
+                await asyncio.gather(*racing, return_exceptions=True)
+                hedging -= 1
+
+        async def producer():
+            while True:
+                record = await _records.get()
+                attempt = attempts[record] = attempts.get(record, 0) + 1
+                await limit.acquire()
+                stats["requests"] += 1
+                primary = asyncio.create_task(request(pool.pop(), record))
                 try:
-                    resp = await page.goto(record.url, timeout=timeout, wait_until="networkidle")  # fmt: off
-                    assert resp is not None, f"Timeout: {record}"
-                    assert resp.ok, f"Request failed: {record}, status={resp.status_text}"  # fmt: off
+                    content = await (primary if hedge is None else hedged(primary, record))
                 except Exception as e:
+                    if attempt < backoff.attempts and Backoff.retryable(e):
+                        loop.call_later(backoff.delay(attempt, e), requeue, record)
+                        continue
                     _results.put_nowait((record, e))
                 else:
-                    _results.put_nowait((record, await page.content()))
-                finally:
-                    _records.task_done()
+                    _results.put_nowait((record, content))
+                _records.task_done()
 
         async def customer():
             while True:
@@ -73,29 +613,24 @@ class Utils:
                         on_success(record, resp)
                     except Exception as e:
                         on_failed(record, e)
+                    else:
+                        stats["retried"] += attempts[record] > 1
                 else:
                     on_failed(record, resp)
                 _results.task_done()
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            pages = [await browser.new_page() for _ in range(limit)]
-            producers = [asyncio.create_task(producer(pages[i])) for i in range(limit)]
-            customers = [asyncio.create_task(customer()) for _ in range(limit)]
-            await _records.join()
-            for p in producers:
-                p.cancel()
-            await _results.join()
-            for c in customers:
-                c.cancel()
-
-            await asyncio.gather(*producers, return_exceptions=True)
-            await asyncio.gather(*customers, return_exceptions=True)
-
-            for page in pages:
-                await page.close()
+        producers = [asyncio.create_task(producer()) for _ in range(limit.ceiling)]
+        customers = [asyncio.create_task(customer()) for _ in range(limit.ceiling)]
+        await _records.join()
+        for p in producers:
+            p.cancel()
+        await _results.join()
+        for c in customers:
+            c.cancel()
 
-            await browser.close()
+        await asyncio.gather(*producers, return_exceptions=True)
+        await asyncio.gather(*customers, return_exceptions=True)
+        return stats
 
     @staticmethod
     def html_handler(source: Source) -> Callable[[str, Record], str]:
@@ -105,17 +640,125 @@ class Utils:
             return process
         raise NotImplementedError(f"{source} is not supported for now.")
 
+    @staticmethod
+    def summary(stats: Counter[str], failed: int) -> str:
+        """The counts of a run of afetch, for its closing line."""
+        text = f"{stats['retried']} after retrying, {failed} failed"
+        if stats["hedged"] > 0:
+            text += f", {stats['hedged']} of {stats['requests']} request(s) hedged, {stats['won']} won"  # fmt: off
+        if stats["coalesced"] > 0:
+            text += f", {stats['coalesced']} fetch(es) saved"
+        if stats["linked"] > 0:
+            text += f", {stats['linked']} file(s) hard linked"
+        return text
+
+    @staticmethod
+    def canonical(url: str) -> str:
+        """url without what tells apart the urls of the same page.
+
+        i.e. the fragment, a trailing index.html or slash, the default port and
+        the case of the scheme and the host.
+        """
+        parts = urlsplit(url)
+        scheme, host, port = parts.scheme.lower(), (parts.hostname or ""), parts.port
+        netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"  # fmt: off
+        path = parts.path.removesuffix("index.html") if parts.path.endswith("/index.html") else parts.path  # fmt: off
+        return urlunsplit((scheme, netloc, path.rstrip("/") or "/", parts.query, ""))
+
+    @staticmethod
+    def html_validator(source: Source) -> Callable[[str], bool]:
+        if source == "cppreference":
+            from cppref.core.cppreference import valid
+
+            return valid
+        raise NotImplementedError(f"{source} is not supported for now.")
+
+    @staticmethod
+    def html_renderer(source: Source) -> Callable[[str | Buffer, Record, Callable[[str], object]], None]:  # fmt: off
+        if source == "cppreference":
+            from cppref.core.cppreference import render
+
+            return render
+        raise NotImplementedError(f"{source} is not supported for now.")
+
+    @staticmethod
+    def render(source: Source, html: Path, man3: Path, records: list[Record]) -> tuple[list[tuple[Record, int]], list[tuple[Record, str]]]:  # fmt: off
+        """Render the cached web pages of records to man3, returns the sizes of the rendered and the failed records."""  # fmt: off
+        render, sizes, errors = Utils.html_renderer(source), list[tuple[Record, int]](), list[tuple[Record, str]]()  # fmt: off
+        for r in records:
+            try:
+                with Utils.map_file(html.joinpath(f"{source}{r.id}.html")) as document:
+                    sizes.append((r, Utils.stream_man3(man3.joinpath(f"{source}{r.id}.3.gz"), partial(render, document, r))))  # fmt: off
+            except AssertionError as e:
+                errors.append((r, f"{e}, record={r}"))
+            except Exception as e:
+                errors.append((r, f"record={r}, Unexpected error {e}"))
+        return sizes, errors
+
     @staticmethod
     def read_file(path: Path) -> str:
         with open(path, "r", encoding="utf-8") as file:
             return file.read()
 
     @staticmethod
-    def write_file(path: Path, content: str):
-        with open(path, "w", encoding="utf-8") as file:
-            file.write(content)
+    @contextmanager
+    def map_file(path: Path) -> Iterator[mmap.mmap]:
+        """Map the file read-only, so that its bytes are parsed without being read into a copy."""
+        with open(path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    @staticmethod
+    def write_file(path: Path, content: str) -> int:
+        return Utils.write_bytes(path, content.encode("utf-8"))
+
+    @staticmethod
+    def write_bytes(path: Path, content: bytes) -> int:
+        """Write content aside and move it to path, so that path is never partially written, returns its size."""  # fmt: off
+        temp = path.with_name(f".{path.name}.part")
+        try:
+            temp.write_bytes(content)
+            temp.replace(path)
+        finally:
+            temp.unlink(missing_ok=True)
+        return len(content)
+
+    @staticmethod
+    def link(source: Path, path: Path) -> bool:
+        """Make path a hard link to source, replacing it at once, returns whether it could be linked."""  # fmt: off
+        temp = path.with_name(f".{path.name}.part")
+        try:
+            temp.unlink(missing_ok=True)
+            os.link(source, temp)
+            temp.replace(path)
+            return True
+        except OSError:
+            return False  # e.g. on another file system, or on one without hard links
+        finally:
+            temp.unlink(missing_ok=True)
+
+    @staticmethod
+    def pack_man3(name: str, render: Callable[[Callable[[str], object]], None]) -> bytes:
+        """The bytes stream_man3 writes for a page named name, kept in memory instead."""
+        fileobj = io.BytesIO()
+        with gzip.GzipFile(name, "w", fileobj=fileobj, mtime=0) as file:
+            render(lambda text: file.write(text.encode("utf-8")))
+        return fileobj.getvalue()
 
     @staticmethod
-    def write_man3(path: Path, content: str):
-        with gzip.open(path, "w") as file:
-            file.write(content.encode("utf-8"))
+    def stream_man3(path: Path, render: Callable[[Callable[[str], object]], None]) -> int:
+        """Compress the fragments written by render as they come, instead of the whole page.
+
+        The page is written aside and only moved to path once fully rendered,
+        returns its size.
+        """
+        temp = path.with_name(f".{path.name}.part")
+        try:
+            with open(temp, "wb") as fileobj:
+                with gzip.GzipFile(path.name, "w", fileobj=fileobj, mtime=0) as file:
+                    render(lambda text: file.write(text.encode("utf-8")))
+                size = fileobj.tell()
+            temp.replace(path)
+        finally:
+            temp.unlink(missing_ok=True)
+        return size
@@ -0,0 +1,47 @@
+import tempfile
+from pathlib import Path
+
+from lxml import etree
+
+from cppref.core.cppreference import process
+from cppref.core.cppreference.cppreference import _content
+from cppref.typing_ import Record
+from cppref.utils import Utils
+from tests.helpers import TestBase
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>std::size</title><script>var a = 1;</script></head>
+<body><div id="mw-head"><ul><li>sidebar</li></ul></div>
+<div id="cpp-content-base"><div id="content">
+<h1 id="firstHeading">std::size</h1>
+<div id="bodyContent"><div id="mw-content-text">
+<!-- comment --><p>Returns the size\xa0of the range.</p>
+</div></div></div></div>
+<div id="footer"><ul><li id="footer-info-lastmod">This page was last modified on 3 August 2024, at 10:00.</li></ul></div>
+</body></html>"""
+
+
+class CppReferenceTest(TestBase):
+    record = Record(1, "std::size", "https://en.cppreference.com/w/cpp/iterator/size")
+
+    def test_documents(self):
+        expected = process(PAGE, self.record)
+        self.assertIn('"std::size" 3 "2024-08-03"', expected)
+        self.assertIn("Returns the size of the range.", expected)
+        self.assertEqual(process(PAGE.encode("utf-8"), self.record), expected)
+        with tempfile.TemporaryDirectory() as temp:
+            path = Path(temp).joinpath("page.html")
+            path.write_text(PAGE, encoding="utf-8")
+            with Utils.map_file(path) as document:
+                self.assertEqual(process(document, self.record), expected)
+
+    def test_content(self):
+        content, date = _content(PAGE.encode("utf-8"))
+        self.assertEqual(date, "2024-08-03")
+        self.assertEqual(content.get("id"), "content")
+        # only the path down to the content is left of the document
+        root = content.getroottree().getroot()
+        self.assertEqual([e.tag for e in root.iter()][:3], ["html", "body", "div"])
+        self.assertEqual(len(root), 1)
+        self.assertEqual(len(root[0]), 1)
+        self.assertFalse(any(e.tag is etree.Comment for e in content.iter()))
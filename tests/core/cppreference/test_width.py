@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+from lxml.html import HtmlElement, fromstring
+
+from cppref.core.cppreference.table import table
+from cppref.core.cppreference.table import width
+from tests.helpers import TestBase
+
+
+def nested_tables(depth: int) -> HtmlElement:
+    inner = "leaf"
+    for i in range(depth):
+        match i % 3:
+            case 0:
+                inner = f'<table class="t-dsc-begin"><tr><td>name{i}</td><td>desc {inner}</td></tr><tr><td>x</td><td>y</td></tr></table>'  # fmt: off
+            case 1:
+                inner = f'<table class="t-rev-begin"><tr><td>rev {inner}</td><td>(C++11)</td></tr></table>'  # fmt: off
+            case _:
+                inner = f'<table class="t-par-begin"><tr><td>T</td><td>-</td><td>par {inner}</td></tr></table>'  # fmt: off
+    return fromstring(inner)
+
+
+class WidthTest(TestBase):
+    def test_scaling(self):
+        # each nested table is measured once, however deep it is nested
+        for depth in (4, 8, 16, 32, 64):
+            with self.subTest(depth=depth):
+                with patch.object(width._nested, "process", wraps=width._nested.process) as measured:  # fmt: off
+                    width.table_width(nested_tables(depth))
+                    self.assertEqual(measured.call_count, depth - 1)
+
+    def test_render(self):
+        for depth in (4, 8, 16):
+            with self.subTest(depth=depth):
+                self.assertIn("leaf", table(nested_tables(depth)))
@@ -0,0 +1,65 @@
+from lxml.html import HtmlElement, fromstring
+
+from cppref.core.processor import Processor
+from tests.helpers import TestBase
+
+
+class ProcessorTest(TestBase):
+    def setUp(self) -> None:
+        p = Processor[[], str]()
+
+        @p.route()
+        def _(_: HtmlElement) -> str:
+            return "default"
+
+        @p.route(tag="p")
+        def _(_: HtmlElement) -> str:
+            return "p"
+
+        @p.route(lambda e: e.get("id") == "x", tag="div")
+        def _(_: HtmlElement) -> str:
+            return "div#x"
+
+        @p.route(klass="t-dsc-begin")
+        def _(_: HtmlElement) -> str:
+            return "t-dsc-begin"
+
+        @p.route(tag=("div", "span"))
+        def _(_: HtmlElement) -> str:
+            return "div|span"
+
+        @p.route(lambda e: "t-li" in e.get("class", ""))
+        def _(_: HtmlElement) -> str:
+            return "t-li"
+
+        self._p = p
+
+    def process(self, html: str) -> str:
+        return self._p.process(fromstring(html))
+
+    def test_dispatch(self):
+        self.assertEqual(self.process("<p>x</p>"), "p")
+        self.assertEqual(self.process('<div id="x"></div>'), "div#x")
+        self.assertEqual(self.process('<div id="y"></div>'), "div|span")
+        self.assertEqual(self.process("<span></span>"), "div|span")
+        self.assertEqual(self.process('<table class="a t-dsc-begin"></table>'), "t-dsc-begin")  # fmt: off
+        self.assertEqual(self.process('<table class="t-sdsc-begin"></table>'), "default")
+        self.assertEqual(self.process('<b class="t-li1"></b>'), "t-li")
+        self.assertEqual(self.process("<b></b>"), "default")
+
+    def test_first_match(self):
+        # registration order wins over the index the route is found by
+        self.assertEqual(self.process('<div id="x" class="t-dsc-begin"></div>'), "div#x")  # fmt: off
+        self.assertEqual(self.process('<div class="t-dsc-begin"></div>'), "t-dsc-begin")
+        self.assertEqual(self.process('<p class="t-dsc-begin"></p>'), "p")
+
+    def test_override(self):
+        p = self._p.clone()
+        self.assertEqual(self.process('<div class="t-dsc-begin"></div>'), "t-dsc-begin")
+
+        @p.route(klass="t-dsc-begin")
+        def _(_: HtmlElement) -> str:
+            return "overridden"
+
+        self.assertEqual(p.process(fromstring('<div class="t-dsc-begin"></div>')), "overridden")  # fmt: off
+        self.assertEqual(self.process('<div class="t-dsc-begin"></div>'), "t-dsc-begin")
@@ -1,5 +1,31 @@
+import asyncio
+import gzip
+import io
+import sqlite3
+import sys
+import tempfile
+import threading
 import unittest
+from collections import Counter
+from contextlib import ExitStack, redirect_stderr, redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from typing import Callable, Iterable, Optional
+from unittest.mock import patch
+
+import brotli
+
+from cppref.conf import ConfContext
+from cppref.typing_ import Record
+from cppref.utils import Utils
+
+
+def page(title: str) -> str:
+    return f"""<!DOCTYPE html>
+<html><head><title>{title}</title></head><body>
+<div id="cpp-content-base"><div id="content"><h1 id="firstHeading">{title}</h1>
+<div id="bodyContent"><div id="mw-content-text"><p>{title}\xa0≤ 42</p></div></div>
+</div></div></body></html>"""
 
 
 class TestBase(unittest.TestCase):
@@ -9,3 +35,142 @@ class TestBase(unittest.TestCase):
         while not path.joinpath("pyproject.toml").exists():
             path = path.parent
         return path
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # clients going away
+            super().handle_error(request, client_address)
+
+
+class HttpServer:
+    """A local stand-in of the web site, serving pages from a background thread.
+
+    Override respond to serve something else than the pages.
+    """
+
+    def __init__(self, pages: dict[str, str], encodings: tuple[str, ...] = ("br", "gzip")) -> None:  # fmt: off
+        self.pages = pages
+        self.encodings = encodings  # the content codings supported, preferred first
+        # (path, client port) of every request, the port tells the connections apart
+        self.requests = list[tuple[str, int]]()
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def records(self, paths: Iterable[str]) -> list[Record]:
+        """A record of the page at each path, titled by its path, numbered from 1."""
+        return [Record(i, path, self.url(path)) for i, path in enumerate(paths, 1)]
+
+    def respond(self, handler: BaseHTTPRequestHandler) -> tuple[int, dict[str, str], bytes]:  # fmt: off
+        if (page := self.pages.get(handler.path)) is None:
+            return 404, {}, b"Not Found"
+        body, headers = page.encode("utf-8"), {"Content-Type": "text/html; charset=UTF-8"}  # fmt: off
+        accepted = handler.headers.get("Accept-Encoding", "")
+        for encoding in filter(lambda e: e in accepted, self.encodings):
+            compress = brotli.compress if encoding == "br" else gzip.compress
+            body, headers["Content-Encoding"] = compress(body), encoding
+            break
+        return 200, headers, body
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True  # the body is written apart from the headers
+
+            def do_GET(self):
+                server.requests.append((self.path, self.client_address[1]))
+                status, headers, body = server.respond(self)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            do_HEAD = do_GET
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+def afetch(
+    server: HttpServer,
+    paths: Iterable[str],
+    on_success: Optional[Callable[[Record, str], None]] = None,
+    **options,
+) -> tuple[dict[int, str], dict[int, Exception], Counter[str]]:
+    """Fetch the pages at paths of server over http, 4 at a time unless told otherwise.
+
+    Returns the pages and the errors by the ids of the records, and the stats of
+    the fetch. on_success is called along, e.g. to look at the limit meanwhile.
+    """
+    succeeded, failed = dict[int, str](), dict[int, Exception]()
+
+    def fetched(record: Record, resp: str):
+        succeeded[record.id] = resp
+        if on_success is not None:
+            on_success(record, resp)
+
+    options = {"timeout": 5000, "limit": 4, "engine": "http", **options}
+    stats = asyncio.run(Utils.afetch(*server.records(paths), on_success=fetched, on_failed=lambda r, e: failed.__setitem__(r.id, e), **options))  # fmt: off
+    return succeeded, failed, stats
+
+
+class Sandbox:
+    """XDG directories of a temporary directory, with an index of records."""
+
+    def __init__(self, records: list[Record], source: str = "cppreference") -> None:
+        self.records, self.source = records, source
+        self._stack = ExitStack()
+
+    def __enter__(self):
+        self.root = Path(self._stack.enter_context(tempfile.TemporaryDirectory()))
+        for name in ("STATE", "CACHE", "SHARE", "CONF"):
+            self._stack.enter_context(patch.object(ConfContext, name, self.root.joinpath(name.lower())))  # fmt: off
+        self.index(ConfContext.dbfile(), self.records)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stack.close()
+
+    def index(self, path: Path, records: list[Record]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with sqlite3.connect(path) as conn:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.source}.com" (id INTEGER PRIMARY KEY, title TEXT, url TEXT)')  # fmt: off
+            conn.executemany(f'INSERT OR REPLACE INTO "{self.source}.com" VALUES (?, ?, ?)', records)  # fmt: off
+        conn.close()
+
+    def run(self, command: str, *args, **kwargs) -> str:
+        """Run command of the cli, returns the last line it printed."""
+        from cppref.cppref import CppRef
+
+        stdout = io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+            getattr(CppRef(), command)(*args, **kwargs)
+        return stdout.getvalue().strip().splitlines()[-1]
+
+    def html(self, record: Record) -> Path:
+        return ConfContext.html_root().joinpath(f"{self.source}{record.id}.html")
+
+    def man3(self, record: Record) -> Path:
+        return ConfContext.man3_root().joinpath(f"{self.source}{record.id}.3.gz")
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from cppref.browser import BrowserService
+from cppref.conf import ConfContext
+from tests.helpers import HttpServer, TestBase
+
+
+class BrowserServiceTest(TestBase):
+    def setUp(self) -> None:
+        self._temp = tempfile.TemporaryDirectory()
+        self._patch = patch.object(ConfContext, "STATE", Path(self._temp.name))
+        self._patch.start()
+        self.path = ConfContext.browser()
+        self.path.parent.mkdir(parents=True)
+
+    def tearDown(self) -> None:
+        self._patch.stop()
+        self._temp.cleanup()
+
+    def record(self, endpoint: str, pid: int):
+        self.path.write_text(json.dumps({"endpoint": endpoint, "pid": pid}))
+
+    def test_endpoint(self):
+        self.assertIsNone(BrowserService.endpoint())
+        with HttpServer({"/json/version": "{}"}) as browser, subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"]) as service:  # fmt: off
+            self.record(browser.url(""), service.pid)
+            os.utime(self.path, (0, 0))
+            self.assertEqual(BrowserService.endpoint(), browser.url(""))
+            # every use of the service postpones its idle timeout
+            self.assertGreater(self.path.stat().st_mtime, time.time() - 60)
+            self.assertTrue(BrowserService.stop())
+            service.wait(10)
+        # the state left behind by the service is dropped
+        self.assertIsNone(BrowserService.endpoint())
+        self.assertFalse(self.path.exists())
+        self.assertFalse(BrowserService.stop())
+
+    def test_stale(self):
+        # the pid of a service gone, taken by another process since
+        with HttpServer({}) as server, subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"]) as other:  # fmt: off
+            self.record(server.url(""), other.pid)
+            self.assertIsNone(BrowserService.endpoint())
+            self.assertFalse(self.path.exists())
+            self.record(server.url(""), other.pid)
+            self.assertFalse(BrowserService.stop())
+            self.assertIsNone(other.poll())
+            other.kill()
+
+    def test_port(self):
+        with tempfile.TemporaryDirectory() as profile:
+            Path(profile, "DevToolsActivePort").write_text("41234\n/devtools/browser/0\n")
+            self.assertEqual(BrowserService._port(Path(profile), 1), 41234)
+        with tempfile.TemporaryDirectory() as profile, self.assertRaises(AssertionError):
+            BrowserService._port(Path(profile), 0.1)
+
+    def test_corrupted(self):
+        self.path.write_text("{")
+        self.assertIsNone(BrowserService.endpoint())
+        self.assertFalse(self.path.exists())
@@ -0,0 +1,111 @@
+import gzip
+import tempfile
+from pathlib import Path
+
+from cppref.utils import Links, Utils
+from tests.helpers import HttpServer, Sandbox, TestBase, page
+
+
+class CanonicalTest(TestBase):
+    def test_canonical(self):
+        for url in (
+            "https://en.cppreference.com/w/cpp/container/vector",
+            "https://en.cppreference.com/w/cpp/container/vector/",
+            "https://en.cppreference.com/w/cpp/container/vector#Member_types",
+            "https://en.cppreference.com/w/cpp/container/vector/index.html",
+            "HTTPS://En.CppReference.com:443/w/cpp/container/vector",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(Utils.canonical(url), "https://en.cppreference.com/w/cpp/container/vector")  # fmt: off
+
+    def test_distinct(self):
+        self.assertEqual(Utils.canonical("https://en.cppreference.com/"), "https://en.cppreference.com/")  # fmt: off
+        self.assertEqual(Utils.canonical("http://127.0.0.1:8080/a?b=1#c"), "http://127.0.0.1:8080/a?b=1")  # fmt: off
+        self.assertNotEqual(Utils.canonical("https://x.org/w/index.html"), Utils.canonical("https://x.org/w/main.html"))  # fmt: off
+
+
+class LinksTest(TestBase):
+    def test_links(self):
+        with tempfile.TemporaryDirectory() as temp:
+            links, root = Links(), Path(temp)
+            self.assertEqual(links.write_bytes(root.joinpath("a"), b"same"), 4)
+            self.assertEqual(links.write_bytes(root.joinpath("b"), b"same"), 4)
+            links.write_bytes(root.joinpath("c"), b"other")
+            self.assertEqual(links.linked, 1)
+            self.assertEqual(root.joinpath("a").stat().st_ino, root.joinpath("b").stat().st_ino)  # fmt: off
+            self.assertNotEqual(root.joinpath("a").stat().st_ino, root.joinpath("c").stat().st_ino)  # fmt: off
+
+            # a path written again is replaced, the files linked to it are kept as they are
+            links.write_bytes(root.joinpath("a"), b"changed")
+            self.assertEqual(root.joinpath("b").read_bytes(), b"same")
+            links.write_bytes(root.joinpath("d"), b"same")
+            self.assertEqual(root.joinpath("d").read_bytes(), b"same")
+
+
+class RedirectingServer(HttpServer):
+    """Redirects the paths of moved to the paths they moved to."""
+
+    def __init__(self, pages: dict[str, str], moved: dict[str, str]) -> None:
+        super().__init__(pages)
+        self.moved = moved
+
+    def respond(self, handler):
+        if (location := self.moved.get(handler.path)) is not None:
+            return 301, {"Location": location}, b""
+        return super().respond(handler)
+
+
+class DedupeTest(TestBase):
+    def setUp(self) -> None:
+        self.pages = {"/w/cpp/vector.html": page("std::vector"), "/w/cpp/": page("C++"), "/w/cpp/map.html": page("std::map")}  # fmt: off
+
+    def test_coalesced(self):
+        with RedirectingServer(self.pages, {"/w/cpp/old-vector.html": "/w/cpp/vector.html"}) as server:  # fmt: off
+            paths = ["/w/cpp/vector.html", "/w/cpp/vector.html#Members", "/w/cpp/", "/w/cpp/index.html", "/w/cpp/map.html", "/w/cpp/old-vector.html"]  # fmt: off
+            records = server.records(paths)
+            with Sandbox(records) as sandbox:
+                summary = sandbox.run("fetch", engine="http")
+                self.assertIn("0 failed", summary)
+                self.assertIn("2 fetch(es) saved", summary)
+                # the redirect is only known once fetched, its page is written once all the same
+                self.assertIn("3 file(s) hard linked", summary)
+                self.assertEqual(sorted(p for p, _ in server.requests), sorted(["/w/cpp/vector.html", "/w/cpp/", "/w/cpp/map.html", "/w/cpp/old-vector.html", "/w/cpp/vector.html"]))  # fmt: off
+                inodes = [sandbox.html(r).stat().st_ino for r in records]
+                self.assertEqual(len({inodes[0], inodes[1], inodes[5]}), 1)
+                self.assertEqual(inodes[2], inodes[3])
+                self.assertEqual(len(set(inodes)), 3)
+
+                # the redirect is coalesced with its target from now on
+                server.requests.clear()
+                summary = sandbox.run("cache", engine="http", force=True)
+                self.assertTrue(summary.endswith("3 fetch(es) saved."))
+                self.assertEqual(sorted(p for p, _ in server.requests), ["/w/cpp/", "/w/cpp/map.html", "/w/cpp/vector.html"])  # fmt: off
+                # the page is rendered for each record all the same, with its own name and url
+                for record in records:
+                    manual = gzip.decompress(sandbox.man3(record).read_bytes()).decode()
+                    self.assertIn(f"cppreference{record.id} ", manual)
+                    self.assertIn(f'"{record.url}"', manual)
+                self.assertIn("std::vector", gzip.decompress(sandbox.man3(records[5]).read_bytes()).decode())  # fmt: off
+
+    def test_workers(self):
+        with HttpServer(self.pages) as server:
+            paths = ["/w/cpp/vector.html", "/w/cpp/vector.html#Members", "/w/cpp/", "/w/cpp/index.html", "/w/cpp/map.html"]  # fmt: off
+            records = server.records(paths)
+            with Sandbox(records) as sandbox:
+                # the records coalesced are rendered by the worker which fetched their page
+                self.assertTrue(sandbox.run("cache", engine="http", workers=2).endswith("0 failed, 2 fetch(es) saved."))  # fmt: off
+                self.assertEqual(len(server.requests), 3)
+                for record in records:
+                    self.assertIn(f"cppreference{record.id} ", gzip.decompress(sandbox.man3(record).read_bytes()).decode())  # fmt: off
+
+    def test_parse(self):
+        with HttpServer(self.pages) as server:
+            paths = ["/w/cpp/vector.html", "/w/cpp/vector.html#Members", "/w/cpp/map.html"]
+            records = server.records(paths)
+            with Sandbox(records) as sandbox:
+                sandbox.run("fetch", engine="http")
+                self.assertEqual(sandbox.html(records[0]).stat().st_ino, sandbox.html(records[1]).stat().st_ino)  # fmt: off
+                sandbox.run("parse", jobs=1)
+                for record in records:
+                    self.assertIn(f"cppreference{record.id} ", gzip.decompress(sandbox.man3(record).read_bytes()).decode())  # fmt: off
+                self.assertEqual(sandbox.run("parse", jobs=1), "Nothing to parse.")
@@ -0,0 +1,492 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+from unittest.mock import patch
+
+from playwright import async_api
+
+from cppref.fetch import FetchContext
+from cppref.typing_ import Record
+from cppref.utils import Backoff, Crashed, Hedge, Limiter, Recycle, RequestError, Utils
+from tests.helpers import HttpServer, TestBase, afetch, page
+
+
+class HttpEngineTest(TestBase):
+    def setUp(self) -> None:
+        self.pages = {f"/w/cpp/{i}.html": page(f"std::page{i}") for i in range(1, 21)}
+        self.pages["/w/cpp/challenge.html"] = "<html><body>Checking your browser</body></html>"  # fmt: off
+
+    def afetch(self, server: HttpServer, *paths: str):
+        return afetch(server, paths, validate=Utils.html_validator("cppreference"))
+
+    def test_fetch(self):
+        paths = list(self.pages)[:20]
+        with HttpServer(self.pages) as server:
+            succeeded, failed, _ = self.afetch(server, *paths, "/w/cpp/missing.html")
+
+        self.assertEqual(set(failed), {21})
+        self.assertIn("Request failed", str(failed[21]))
+        self.assertEqual(len(succeeded), 20)
+        for id, path in enumerate(paths, 1):
+            self.assertEqual(succeeded[id], self.pages[path])
+        # the connections are kept alive, at most limit of them
+        self.assertLessEqual(len({port for _, port in server.requests}), 4)
+
+    def test_encodings(self):
+        path = "/w/cpp/1.html"
+        for encodings in (("br",), ("gzip",), ()):
+            with self.subTest(encodings=encodings):
+                with HttpServer(self.pages, encodings) as server:
+                    succeeded, failed, _ = self.afetch(server, path)
+                self.assertEqual(failed, {})
+                self.assertEqual(succeeded[1], self.pages[path])
+
+    def test_fallback(self):
+        browsed = list[Record]()
+
+        async def browse(records, *, on_success, **_):
+            for record in records:
+                browsed.append(record)
+                on_success(record, page(record.title))
+            return Counter()
+
+        with HttpServer(self.pages) as server:
+            with patch.object(Utils, "_browse", browse):
+                succeeded, failed, _ = self.afetch(server, "/w/cpp/1.html", "/w/cpp/challenge.html")  # fmt: off
+
+        self.assertEqual(failed, {})
+        self.assertEqual([r.id for r in browsed], [2])
+        self.assertEqual(set(succeeded), {1, 2})
+
+
+class BrowserEngineTest(TestBase):
+    def test_readiness(self):
+        self.assertEqual(Utils._readiness("networkidle"), ("networkidle", None))
+        self.assertEqual(Utils._readiness("domcontentloaded"), ("domcontentloaded", None))
+        self.assertEqual(Utils._readiness("#mw-content-text"), ("domcontentloaded", "#mw-content-text"))  # fmt: off
+
+
+class FetchContextTest(TestBase):
+    def setUp(self) -> None:
+        self.pages = {"/": page("Main"), "/w/cpp/1.html": page("std::page1")}
+        self.pages["/w/cpp/challenge.html"] = "<html><body>Checking your browser</body></html>"  # fmt: off
+        self.validate = Utils.html_validator("cppreference")
+
+    def test_warm(self):
+        with HttpServer(self.pages) as server:
+            record = Record(1, "std::page1", server.url("/w/cpp/1.html"))
+            with FetchContext("http", 5000, "domcontentloaded", self.validate, record.url) as fetcher:  # fmt: off
+                fetcher._start().result(5)
+                # a connection is opened ahead while the user is selecting
+                self.assertEqual([path for path, _ in server.requests], ["/"])
+                self.assertEqual(fetcher.fetch(record), self.pages["/w/cpp/1.html"])
+            ports = {port for _, port in server.requests}
+        self.assertEqual(len(ports), 1)
+
+    def test_lazy(self):
+        with HttpServer(self.pages) as server:
+            record = Record(1, "std::page1", server.url("/w/cpp/1.html"))
+            with FetchContext("http", 5000, "domcontentloaded", self.validate, record.url, warm=False):  # fmt: off
+                pass  # canceled, or the page was cached
+            self.assertEqual(server.requests, [])
+            with FetchContext("http", 5000, "domcontentloaded", self.validate, record.url, warm=False) as fetcher:  # fmt: off
+                self.assertEqual(fetcher.fetch(record), self.pages["/w/cpp/1.html"])
+
+    def test_fallback(self):
+        @asynccontextmanager
+        async def browser(timeout, limit, wait):
+            async def fetch(record: Record) -> str:
+                return page(record.title)
+
+            yield [fetch] * limit
+
+        with HttpServer(self.pages) as server:
+            record = Record(2, "std::challenge", server.url("/w/cpp/challenge.html"))
+            with patch.object(Utils, "browser", browser):
+                with FetchContext("http", 5000, "domcontentloaded", self.validate, record.url) as fetcher:  # fmt: off
+                    self.assertEqual(fetcher.fetch(record), page("std::challenge"))
+
+
+class FlakyServer(HttpServer):
+    """Fails the first requests of a page with the given status."""
+
+    def __init__(self, pages: dict[str, str], failures: dict[str, list[tuple[int, dict[str, str]]]]) -> None:  # fmt: off
+        super().__init__(pages)
+        self.failures = failures
+        self.times = list[tuple[str, float]]()
+
+    def respond(self, handler):
+        self.times.append((handler.path, time.monotonic()))
+        if len(failures := self.failures.get(handler.path, [])) > 0:
+            status, headers = failures.pop(0)
+            return status, headers, b"Try again later"
+        return super().respond(handler)
+
+
+class RetryTest(TestBase):
+    def setUp(self) -> None:
+        self.pages = {f"/w/cpp/{i}.html": page(f"std::page{i}") for i in range(1, 5)}
+
+    def test_retry(self):
+        failures = {
+            "/w/cpp/1.html": [(503, {"Retry-After": "1"})],
+            "/w/cpp/2.html": [(429, {}), (500, {})],
+            "/w/cpp/3.html": [(404, {})],
+            "/w/cpp/4.html": [(502, {}), (502, {}), (502, {})],
+        }
+        with FlakyServer(self.pages, failures) as server:
+            succeeded, failed, stats = afetch(server, self.pages, limit=1, backoff=Backoff(3, base=0.01))  # fmt: off
+
+        self.assertEqual(set(succeeded), {1, 2})
+        self.assertEqual(stats["retried"], 2)
+        # not retryable, or out of attempts
+        self.assertEqual(set(failed), {3, 4})
+        self.assertEqual(failed[3].status, 404)
+        self.assertEqual(sum(path == "/w/cpp/3.html" for path, _ in server.times), 1)
+        self.assertEqual(sum(path == "/w/cpp/4.html" for path, _ in server.times), 3)
+        # the worker moved on while the first page was waiting for its retry
+        paths = [path for path, _ in server.times]
+        self.assertEqual(paths[:2], ["/w/cpp/1.html", "/w/cpp/2.html"])
+        first = [t for path, t in server.times if path == "/w/cpp/1.html"]
+        self.assertGreaterEqual(first[1] - first[0], 1)
+        self.assertGreater(paths.index("/w/cpp/1.html", 1), paths.index("/w/cpp/4.html"))
+
+    def test_retry_after(self):
+        headers = {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        record = Record(1, "std::page1", "http://localhost/")
+        self.assertEqual(RequestError.of(record, 503, "", headers).retry_after, 0)
+        self.assertEqual(RequestError.of(record, 503, "", {"retry-after": "12"}).retry_after, 12)  # fmt: off
+        self.assertIsNone(RequestError.of(record, 503, "", {"retry-after": "soon"}).retry_after)  # fmt: off
+        error = RequestError.of(record, 429, "", {"retry-after": "3"})
+        self.assertTrue(Backoff.retryable(error))
+        self.assertFalse(Backoff.retryable(RequestError.of(record, 403, "", {})))
+        for attempt in range(1, 10):
+            self.assertLessEqual(Backoff(base=1, cap=4).delay(attempt, TimeoutError()), 4)
+            self.assertGreaterEqual(Backoff(base=1, cap=4).delay(attempt, error), 3)
+
+
+class ThrottlingServer(HttpServer):
+    """Answers after latency up to capacity requests in flight, queues the ones above or throttles them with 429."""  # fmt: off
+
+    def __init__(self, pages: dict[str, str], capacity: int, latency: float, throttle: bool) -> None:  # fmt: off
+        super().__init__(pages)
+        self.capacity, self.latency, self.throttle = capacity, latency, throttle
+        self.inflight, self.throttled, self.peak = 0, 0, 0
+        self._lock = threading.Lock()
+
+    def respond(self, handler):
+        with self._lock:
+            self.inflight += 1
+            self.peak = max(self.peak, self.inflight)
+            inflight = self.inflight
+        try:
+            if inflight > self.capacity and self.throttle:
+                with self._lock:
+                    self.throttled += 1
+                return 429, {}, b"Too Many Requests"
+            time.sleep(self.latency * max(1, inflight / self.capacity))
+            return super().respond(handler)
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+
+class LimiterTest(TestBase):
+    def setUp(self) -> None:
+        self.pages = {f"/w/cpp/{i}.html": page(f"std::page{i}") for i in range(1, 201)}
+
+    def afetch(self, server: HttpServer, limiter: Limiter):
+        limits = list[int]()
+        succeeded, failed, _ = afetch(server, self.pages, lambda *_: limits.append(limiter.limit), limit=limiter, backoff=Backoff(8, base=0.01, cap=0.1))  # fmt: off
+        return succeeded, failed, limits
+
+    def test_grow(self):
+        async def drive(limiter: Limiter, congested: list[bool]) -> list[int]:
+            limits = list[int]()
+            for c in congested:
+                await limiter.acquire()
+                await limiter.release(0.02, c)
+                limits.append(limiter.limit)
+            return limits
+
+        # slow start, by one per request up to the ceiling
+        limits = asyncio.run(drive(Limiter.of("auto", 1, 16), [False] * 20))
+        self.assertEqual(limits, [*range(2, 17), 16, 16, 16, 16, 16])
+        # halved once per limit requests on congestion, then grown by one per limit requests
+        limits = asyncio.run(drive(Limiter.of("auto", 1, 16), [False] * 7 + [True] * 2 + [False] * 16))  # fmt: off
+        self.assertEqual(limits, [2, 3, 4, 5, 6, 7, 8, 4, 4, 4, 4, 4, 4, 5, 5, 5, 5, 5, 6, 6, 6, 6, 6, 6, 6])  # fmt: off
+
+        with ThrottlingServer(self.pages, capacity=64, latency=0.02, throttle=True) as server:  # fmt: off
+            succeeded, failed, limits = self.afetch(server, Limiter.of("auto", 1, 16))
+        self.assertEqual((len(succeeded), failed), (200, {}))
+        self.assertGreater(max(limits), 1)
+        self.assertLessEqual(server.peak, 16)
+
+    def test_throttled(self):
+        with ThrottlingServer(self.pages, capacity=4, latency=0.02, throttle=True) as server:  # fmt: off
+            succeeded, failed, limits = self.afetch(server, Limiter.of("auto", 2, 32))
+        self.assertEqual((len(succeeded), failed), (200, {}))
+        self.assertGreater(server.throttled, 0)
+        self.assertLess(server.throttled, 40)
+        # halved on the throttling, and kept around the capacity of the server
+        self.assertLessEqual(max(limits[len(limits) // 2 :]), 8)
+        self.assertGreaterEqual(min(limits), 2)
+
+    def test_queued(self):
+        with ThrottlingServer(self.pages, capacity=4, latency=0.02, throttle=False) as server:  # fmt: off
+            succeeded, failed, limits = self.afetch(server, Limiter.of("auto", 1, 32))
+        self.assertEqual((len(succeeded), failed), (200, {}))
+        # the latency grows with the requests queued by the server
+        self.assertLessEqual(max(limits[len(limits) // 2 :]), 16)
+
+    def test_fixed(self):
+        with ThrottlingServer(self.pages, capacity=4, latency=0.001, throttle=True) as server:  # fmt: off
+            succeeded, failed, limits = self.afetch(server, Limiter.of(3))
+        self.assertEqual((len(succeeded), failed), (200, {}))
+        self.assertEqual(set(limits), {3})
+        self.assertEqual(server.throttled, 0)
+        self.assertLessEqual(server.peak, 3)
+
+
+class StallingServer(HttpServer):
+    """Stalls the first request of the given pages, the ones after are answered at once."""
+
+    def __init__(self, pages: dict[str, str], stalled: set[str], stall: float) -> None:
+        super().__init__(pages)
+        self.stalled, self.stall = set(stalled), stall
+        self._lock = threading.Lock()
+
+    def respond(self, handler):
+        with self._lock:
+            stalled = handler.path in self.stalled
+            self.stalled.discard(handler.path)
+        time.sleep(self.stall if stalled else 0.005)
+        return super().respond(handler)
+
+
+class HedgeTest(TestBase):
+    def setUp(self) -> None:
+        self.pages = {f"/w/cpp/{i}.html": page(f"std::page{i}") for i in range(1, 101)}
+
+    def test_hedge(self):
+        stalled = {f"/w/cpp/{i}.html" for i in (30, 60, 90)}
+        with StallingServer(self.pages, stalled, stall=2) as server:
+            start = time.monotonic()
+            succeeded, failed, stats = afetch(server, self.pages, hedge=Hedge(99, budget=25))
+            elapsed = time.monotonic() - start
+        self.assertEqual((len(succeeded), failed), (100, {}))
+        self.assertEqual(succeeded[30], self.pages["/w/cpp/30.html"])
+        self.assertEqual(stats["requests"], 100)
+        self.assertGreaterEqual(stats["won"], 3)
+        # the stalled requests were not waited for
+        self.assertLess(elapsed, 2)
+
+    def test_budget(self):
+        stalled = {f"/w/cpp/{i}.html" for i in range(30, 101, 10)}
+        with StallingServer(self.pages, stalled, stall=0.2) as server:
+            succeeded, failed, stats = afetch(server, self.pages, hedge=Hedge(90, budget=5))
+        self.assertEqual((len(succeeded), failed), (100, {}))
+        self.assertLessEqual(stats["hedged"], 5)
+        # a duplicate canceled before it was sent never reaches the server
+        self.assertLessEqual(len(server.requests), 100 + stats["hedged"])
+
+    def test_disabled(self):
+        with StallingServer(self.pages, {"/w/cpp/30.html"}, stall=0.2) as server:
+            succeeded, _, stats = afetch(server, self.pages)
+        self.assertEqual(len(succeeded), 100)
+        self.assertEqual((stats["hedged"], stats["won"]), (0, 0))
+        self.assertEqual(len(server.requests), 100)
+
+
+class FakeResponse:
+    ok, status, status_text, headers = True, 200, "OK", {}
+
+
+class FakePage:
+    def __init__(self, browser: "FakeBrowser", context: object) -> None:
+        self.browser, self.context, self.closed = browser, context, False
+        self.handlers = dict[str, Callable]()
+        self.navigations = 0
+
+    def once(self, event: str, handler: Callable):
+        self.handlers[event] = handler
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def goto(self, url: str, **_):
+        self.navigations += 1
+        self.browser.chromium.visited.append(url)
+        crash = self.browser.chromium.crashes.pop(url, None)
+        if crash == "page":
+            self.handlers["crash"](self)
+            raise async_api.Error("Navigation failed because page crashed!")
+        if crash == "browser":
+            self.browser.connected = False
+            raise async_api.Error("Target page, context or browser has been closed")
+        self.url = url
+        return FakeResponse()
+
+    async def content(self) -> str:
+        return page(self.url)
+
+    async def close(self):
+        if not self.browser.connected:
+            raise async_api.Error("Target page, context or browser has been closed")
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, browser: "FakeBrowser") -> None:
+        self.browser, self.closed = browser, False
+
+    async def route(self, *_):
+        pass
+
+    async def new_page(self) -> FakePage:
+        page = FakePage(self.browser, self)
+        self.browser.chromium.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, chromium: "FakeChromium") -> None:
+        self.chromium, self.connected = chromium, True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def new_context(self, **_) -> FakeContext:
+        self.chromium.contexts.append(context := FakeContext(self))
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeChromium:
+    """Crashes the page or the whole browser on the first visit of the given urls."""
+
+    def __init__(self, crashes: dict[str, str]) -> None:
+        self.crashes, self.visited = crashes, list[str]()
+        self.browsers, self.pages = list[FakeBrowser](), list[FakePage]()
+        self.contexts = list[FakeContext]()
+
+    async def launch(self, **_) -> FakeBrowser:
+        self.browsers.append(browser := FakeBrowser(self))
+        return browser
+
+    async def connect_over_cdp(self, endpoint: str, **_) -> FakeBrowser:
+        raise async_api.Error(f"connect ECONNREFUSED {endpoint}")
+
+    @property
+    def chromium(self) -> "FakeChromium":
+        return self
+
+    @asynccontextmanager
+    async def playwright(self):
+        yield self
+
+
+class RecycleTest(TestBase):
+    def browse(self, chromium: FakeChromium, urls: list[str], recycle: Recycle, endpoint: Optional[str] = None):  # fmt: off
+        records = [Record(i, url, url) for i, url in enumerate(urls, 1)]
+        succeeded, failed = dict[int, str](), dict[int, Exception]()
+        with patch("cppref.utils.async_playwright", lambda: chromium.playwright()):
+            with patch("cppref.utils.BrowserService.endpoint", lambda: endpoint):
+                stats = asyncio.run(
+                    Utils.afetch(
+                        *records,
+                        timeout=5000,
+                        limit=2,
+                        on_success=lambda r, resp: succeeded.__setitem__(r.id, resp),
+                        on_failed=lambda r, e: failed.__setitem__(r.id, e),
+                        backoff=Backoff(3, base=0.01),
+                        recycle=recycle,
+                    )
+                )
+        return succeeded, failed, stats
+
+    def test_navigations(self):
+        chromium = FakeChromium({})
+        urls = [f"http://localhost/{i}" for i in range(40)]
+        succeeded, failed, _ = self.browse(chromium, urls, Recycle(navigations=5))
+        self.assertEqual((len(succeeded), failed), (40, {}))
+        self.assertEqual(len(chromium.pages), 8)
+        self.assertTrue(all(p.navigations <= 5 for p in chromium.pages))
+        self.assertTrue(all(p.closed for p in chromium.pages))
+
+    def test_contexts(self):
+        chromium = FakeChromium({})
+        urls = [f"http://localhost/{i}" for i in range(40)]
+        succeeded, failed, _ = self.browse(chromium, urls, Recycle(navigations=5, pages=2))  # fmt: off
+        self.assertEqual((len(succeeded), failed), (40, {}))
+        # a context is replaced after 2 pages of it were, its pages left with it
+        self.assertGreaterEqual(len(chromium.contexts), 3)
+        self.assertTrue(all(c.closed for c in chromium.contexts))
+        self.assertTrue(all(p.closed for p in chromium.pages))
+
+    def test_unreachable(self):
+        # a service which cannot be connected to is done without
+        chromium = FakeChromium({})
+        urls = [f"http://localhost/{i}" for i in range(4)]
+        succeeded, failed, _ = self.browse(chromium, urls, Recycle(), "http://127.0.0.1:9222")  # fmt: off
+        self.assertEqual((len(succeeded), failed), (4, {}))
+        self.assertEqual(len(chromium.browsers), 1)
+
+    def test_crashed(self):
+        chromium = FakeChromium({"http://localhost/3": "page", "http://localhost/7": "browser"})  # fmt: off
+        urls = [f"http://localhost/{i}" for i in range(12)]
+        succeeded, failed, stats = self.browse(chromium, urls, Recycle())
+        self.assertEqual((len(succeeded), failed), (12, {}))
+        self.assertEqual(succeeded[4], page("http://localhost/3"))
+        # the records were requeued, on a new page and a new browser
+        self.assertEqual(stats["retried"], 2)
+        self.assertEqual(len(chromium.browsers), 2)
+        self.assertGreaterEqual(len(chromium.pages), 4)
+        self.assertTrue(Backoff.retryable(Crashed()))
+
+    def test_rss(self):
+        chromium = FakeChromium({})
+        urls = [f"http://localhost/{i}" for i in range(10)]
+        with patch.object(Utils, "rss", lambda _: 2**30):
+            succeeded, _, _ = self.browse(chromium, urls, Recycle(rss=2**29, interval=0))  # fmt: off
+        self.assertEqual(len(succeeded), 10)
+        # recycled once, not on every navigation while the browser stays past its rss
+        self.assertEqual(len(chromium.pages), 2)
+        self.assertEqual(len(chromium.contexts), 2)
+
+        chromium = FakeChromium({})
+        measures = iter([2**20] * 3 + [2**30] * 3 + [2**20] * 2 + [2**30] * 100)
+        with patch.object(Utils, "rss", lambda _: next(measures)):
+            self.browse(chromium, urls, Recycle(rss=2**29, interval=0))
+        # once again after the rss fell back under the limit
+        self.assertEqual(len(chromium.contexts), 3)
+        self.assertTrue(all(c.closed for c in chromium.contexts))
+
+        chromium = FakeChromium({})
+        with patch.object(Utils, "rss", lambda _: 2**20):
+            self.browse(chromium, urls, Recycle(rss=2**29, interval=0))
+        self.assertEqual(len(chromium.pages), 2)
+
+    def test_measure(self):
+        child = subprocess.Popen([sys.executable, "-c", "import time; b = bytearray(64 << 20); time.sleep(30)"])  # fmt: off
+        try:
+            time.sleep(0.5)
+            rss = Utils.rss(os.getpid())
+        finally:
+            child.kill()
+            child.wait()
+        if rss is None:
+            self.skipTest("No /proc")
+        self.assertGreater(rss, 64 << 20)
+        self.assertEqual(Utils.rss(child.pid), 0)
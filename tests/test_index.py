@@ -0,0 +1,104 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from cppref.index import IndexContext
+from cppref.typing_ import Record
+from cppref.utils import Utils
+from tests.helpers import HttpServer, Sandbox, TestBase
+
+_SITE = "https://en.cppreference.com"
+
+
+def page(title: str, *hrefs: str) -> str:
+    links = "".join(f'<li><a href="{href}">{href}</a></li>' for href in hrefs)
+    return f"<!DOCTYPE html><html><body><h1> {title}\n</h1><ul>{links}</ul></body></html>"  # fmt: off
+
+
+class IndexContextTest(TestBase):
+    def test_stable(self):
+        with tempfile.TemporaryDirectory() as temp:
+            known, path = Path(temp, "index.db"), Path(temp, "new-index.db")
+            with IndexContext("cppreference", known) as index:
+                index.add("std::vector", f"{_SITE}/w/cpp/container/vector")
+                index.add("std::map", f"{_SITE}/w/cpp/container/map")
+                index.add("std::set", f"{_SITE}/w/cpp/container/set")
+
+            with IndexContext("cppreference", path, [known], batch=2) as index:
+                self.assertEqual(index.add("std::map", f"{_SITE}/w/cpp/container/map/"), Record(2, "std::map", f"{_SITE}/w/cpp/container/map"))  # fmt: off
+                self.assertEqual(index.add("std::list", f"{_SITE}/w/cpp/container/list").id, 4)  # fmt: off
+                self.assertEqual(index.add("std::vector", f"{_SITE}/w/cpp/container/vector#Notes").id, 1)  # fmt: off
+                self.assertEqual(index.added, 1)
+                # written a batch at a time
+                with sqlite3.connect(path) as conn:
+                    self.assertEqual(conn.execute('SELECT COUNT(*) FROM "cppreference.com"').fetchone(), (2,))  # fmt: off
+                conn.close()
+            self.assertEqual([r.id for r in Utils.query("cppreference", path)], [1, 2, 4])
+
+            with IndexContext("cppreference", known) as index:
+                index.add("std::vector", f"{_SITE}/w/cpp/container/vector")
+                self.assertEqual(index.prune(), 2)
+            self.assertEqual(Utils.query("cppreference", known), [Record(1, "std::vector", f"{_SITE}/w/cpp/container/vector")])  # fmt: off
+
+
+class IndexTest(TestBase):
+    def setUp(self) -> None:
+        self._temp = tempfile.TemporaryDirectory()
+        self.mirror = Path(self._temp.name)
+        # as wget --mirror --adjust-extension --convert-links saves the site
+        files = {
+            "w/cpp.html": page("C++ reference", "cpp/container.html", "cpp/container/vector.html#Notes", "c.html", "https://github.com/", "cpp/style.css"),  # fmt: off
+            "w/cpp/container/index.html": page("Containers library", "vector.html", "map.html", "../../cpp.html"),  # fmt: off
+            "w/cpp/container/vector.html": page("std::vector", "../container.html", "../../cpp.html", "../../index.php?title=cpp&action=edit"),  # fmt: off
+            "w/cpp/container/map.html": page("std::map", "missing.html"),
+            "w/c.html": page("C reference"),
+        }
+        for name, content in files.items():
+            self.mirror.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+            self.mirror.joinpath(name).write_text(content)
+
+    def tearDown(self) -> None:
+        self._temp.cleanup()
+
+    def test_mirror(self):
+        records = [Record(7, "std::vector", f"{_SITE}/w/cpp/container/vector"), Record(8, "std::gone", f"{_SITE}/w/cpp/gone")]  # fmt: off
+        with Sandbox(records) as sandbox:
+            summary = sandbox.run("index", f"{_SITE}/w/cpp", mirror=str(self.mirror))
+            # the page linked to but not in the mirror failed, so nothing is removed
+            self.assertRegex(summary, r"^Indexed 4 page\(s\) to .*index\.db, 3 new, 0 removed, 0 after retrying, 1 failed\.$")  # fmt: off
+            self.assertEqual(
+                Utils.query("cppreference", sandbox.root.joinpath("share", "cppref", "index.db")),  # fmt: off
+                [
+                    Record(7, "std::vector", f"{_SITE}/w/cpp/container/vector"),
+                    Record(8, "std::gone", f"{_SITE}/w/cpp/gone"),
+                    Record(9, "C++ reference", f"{_SITE}/w/cpp"),
+                    Record(10, "Containers library", f"{_SITE}/w/cpp/container"),
+                    Record(11, "std::map", f"{_SITE}/w/cpp/container/map"),
+                ],
+            )  # fmt: off
+
+            self.mirror.joinpath("w/cpp/container/map.html").write_text(page("std::map"))
+            output = sandbox.root.joinpath("new-index.db")
+            summary = sandbox.run("index", f"{_SITE}/w/cpp", mirror=str(self.mirror), output=str(output))  # fmt: off
+            self.assertIn("0 new, 0 removed, 0 after retrying, 0 failed.", summary)
+            self.assertEqual([r.id for r in Utils.query("cppreference", output)], [7, 9, 10, 11])  # fmt: off
+
+            summary = sandbox.run("index", f"{_SITE}/w/cpp", mirror=str(self.mirror))
+            self.assertIn("0 new, 1 removed", summary)
+
+    def test_http(self):
+        pages = {
+            "/w/cpp": page("C++ reference", "/w/cpp/a", "/w/cpp/b#x", "/w/c"),
+            "/w/cpp/a": page("A", "/w/cpp/b", "/w/cpp/a/c"),
+            "/w/cpp/b": page("B", "/w/cpp"),
+            "/w/cpp/a/c": page("C", "/w/cpp/a"),
+        }
+        with HttpServer(pages) as server, Sandbox([]) as sandbox:
+            summary = sandbox.run("index", server.url("/w/cpp"), depth=1, limit=2)
+            self.assertIn("Indexed 3 page(s)", summary)
+            summary = sandbox.run("index", server.url("/w/cpp/"), limit=2)
+            self.assertIn("Indexed 4 page(s)", summary)
+            self.assertIn("1 new, 0 removed, 0 after retrying, 0 failed.", summary)
+            # nothing out of the scope is requested, nor any page twice in a crawl
+            self.assertEqual(sorted(p for p, _ in server.requests), ["/w/cpp", "/w/cpp", "/w/cpp/a", "/w/cpp/a", "/w/cpp/a/c", "/w/cpp/b", "/w/cpp/b"])  # fmt: off
+            self.assertEqual([(r.id, r.title) for r in Utils.query("cppreference", sandbox.root.joinpath("share", "cppref", "index.db"))], [(1, "C++ reference"), (2, "A"), (3, "B"), (4, "C")])  # fmt: off
@@ -0,0 +1,102 @@
+import gzip
+import shutil
+import tempfile
+from pathlib import Path
+
+from cppref.archive import ArchiveContext
+from cppref.typing_ import Record
+from tests.helpers import Sandbox, TestBase, page
+
+_SITE = "https://en.cppreference.com"
+
+
+class ArchiveTest(TestBase):
+    def setUp(self) -> None:
+        self.names = [
+            "reference/en/cpp.html",
+            "reference/en/cpp/container/vector.html",
+            "reference/en/c/container/vector.html",
+            "reference/en/cpp/string/index.html",
+            "reference/common/site.css",
+        ]
+
+    def test_match(self):
+        records = [
+            Record(1, "C++", f"{_SITE}/w/cpp"),
+            Record(2, "std::vector", f"{_SITE}/w/cpp/container/vector"),
+            Record(3, "vector", f"{_SITE}/w/c/container/vector#Example"),
+            Record(4, "Strings", f"{_SITE}/w/cpp/string/"),
+            Record(5, "std::map", f"{_SITE}/w/cpp/container/map"),
+            Record(6, "std::vector", f"{_SITE}/w/cpp/container/vector/index.html"),
+        ]
+        matched = ArchiveContext.match(records, [n for n in self.names if n.endswith(".html")])  # fmt: off
+        self.assertEqual(matched, {
+            "reference/en/cpp.html": [records[0]],
+            "reference/en/cpp/container/vector.html": [records[1], records[5]],
+            "reference/en/c/container/vector.html": [records[2]],
+            "reference/en/cpp/string/index.html": [records[3]],
+        })  # fmt: off
+
+    def test_unrelated(self):
+        # only the whole path tells the page, a shared trailing part is a different page
+        names = ["reference/en/cpp/container/vector.html", "reference/en/cpp/string/basic_string/size.html"]  # fmt: off
+        records = [
+            Record(1, "vector", f"{_SITE}/w/c/container/vector"),
+            Record(2, "std::vector::size", f"{_SITE}/w/cpp/container/vector/size"),
+            Record(3, "size", f"{_SITE}/w/size"),
+            Record(4, "std::vector", "https://zh.cppreference.com/w/cpp/container/vector"),
+            Record(5, "std::vector", f"{_SITE}/cpp/container/vector"),
+        ]
+        self.assertEqual(ArchiveContext.match(records, names), {})
+        # wherever the directory of the language is in the archive
+        record, name = Record(6, "std::vector", f"{_SITE}/w/cpp/container/vector"), "html-book/reference/en/cpp/container/vector.html"  # fmt: off
+        self.assertEqual(ArchiveContext.match([record], [name]), {name: [record]})
+
+
+class IngestTest(TestBase):
+    def setUp(self) -> None:
+        self._temp = tempfile.TemporaryDirectory()
+        self.root = Path(self._temp.name)
+        self.paths = {f"reference/en/cpp/header/{i}.html": page(f"std::page{i}") for i in range(1, 9)}  # fmt: off
+        self.paths["reference/en/cpp/header/broken.html"] = "<html><body>Not a page</body></html>"  # fmt: off
+        self.paths["reference/common/site.css"] = "body {}"
+        book = self.root.joinpath("book")
+        for name, content in self.paths.items():
+            book.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+            book.joinpath(name).write_text(content)
+        self.archives = {
+            "dir": book,
+            "zip": Path(shutil.make_archive(str(self.root.joinpath("book")), "zip", book)),
+            "tar": Path(shutil.make_archive(str(self.root.joinpath("book")), "gztar", book)),
+        }  # fmt: off
+        self.records = [Record(i, f"std::page{i}", f"{_SITE}/w/cpp/header/{i}") for i in range(1, 9)]  # fmt: off
+        self.records.append(Record(9, "std::page1", f"{_SITE}/w/cpp/header/1.html#Example"))  # fmt: off
+        self.records.append(Record(10, "broken", f"{_SITE}/w/cpp/header/broken"))
+        self.records.append(Record(11, "missing", f"{_SITE}/w/cpp/header/missing"))
+
+    def tearDown(self) -> None:
+        self._temp.cleanup()
+
+    def test_ingest(self):
+        for kind, archive in self.archives.items():
+            with self.subTest(kind=kind), Sandbox(self.records) as sandbox:
+                summary = sandbox.run("ingest", str(archive), jobs=2)
+                self.assertEqual(summary, "Ingested 9 page(s), 1 not in the archive, 1 failed.")  # fmt: off
+                for record in self.records[:8]:
+                    self.assertIn(record.title, gzip.decompress(sandbox.man3(record).read_bytes()).decode())  # fmt: off
+                    self.assertFalse(sandbox.html(record).exists())
+                # the page of both is rendered for each of them
+                self.assertIn("cppreference9 ", gzip.decompress(sandbox.man3(self.records[8]).read_bytes()).decode())  # fmt: off
+                self.assertFalse(sandbox.man3(self.records[9]).exists())
+
+                # only the failed are tried again
+                summary = sandbox.run("ingest", str(archive), jobs=1)
+                self.assertEqual(summary, "Ingested 0 page(s), 1 not in the archive, 1 failed.")  # fmt: off
+
+    def test_keep(self):
+        with Sandbox(self.records) as sandbox:
+            sandbox.run("ingest", str(self.archives["zip"]), keep=True, jobs=1)
+            self.assertEqual(sandbox.html(self.records[1]).read_text(), self.paths["reference/en/cpp/header/2.html"])  # fmt: off
+            self.assertEqual(sandbox.html(self.records[0]).stat().st_ino, sandbox.html(self.records[8]).stat().st_ino)  # fmt: off
+            # the pages kept are parsed as they were ingested
+            self.assertEqual(sandbox.run("parse", jobs=1), "Nothing to parse.")
@@ -0,0 +1,113 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from cppref.conf import ConfContext
+from cppref.journal import JournalContext
+from cppref.typing_ import Record
+from cppref.utils import Utils
+from tests.helpers import Sandbox, TestBase, page
+
+
+class JournalTest(TestBase):
+    def setUp(self) -> None:
+        self.records = [Record(i, f"std::page{i}", f"https://en.cppreference.com/w/cpp/{i}.html") for i in range(1, 6)]  # fmt: off
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = Path(root).joinpath("cppref", "journal.db")
+            with JournalContext("cppreference", path) as journal:
+                journal.pending(self.records)
+                journal.fetched(self.records[0], 42)
+                journal.rendered(self.records[1], 7)
+                journal.failed(self.records[2], "TimeoutError()")
+                # interrupted before the others are done
+
+            with JournalContext("cppreference", path) as journal:
+                entries = journal.entries(self.records)
+                self.assertEqual([entries[r.id].state for r in self.records], ["fetched", "rendered", "failed", "pending", "pending"])  # fmt: off
+                self.assertEqual(entries[1].html, 42)
+                self.assertEqual(entries[2].man3, 7)
+                self.assertEqual(entries[3].error, "TimeoutError()")
+                self.assertIsNotNone(entries[1].fetched)
+
+                journal.pending(self.records[2:])
+                journal.fetched(self.records[2], 10)
+                entry = journal.get(self.records[2])
+                self.assertEqual((entry.state, entry.attempts, entry.error), ("fetched", 2, None))  # fmt: off
+                self.assertEqual(journal.get(self.records[0]).attempts, 1)
+
+            with sqlite3.connect(path) as conn:
+                self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_batch(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = Path(root).joinpath("journal.db")
+            with JournalContext("cppreference", path, batch=3, interval=3600) as journal:
+                journal.pending(self.records[:2])
+                with sqlite3.connect(path) as conn:
+                    self.assertEqual(conn.execute('SELECT COUNT(*) FROM "cppreference.com"').fetchone()[0], 0)  # fmt: off
+                    journal.fetched(self.records[0], 1)  # the third update flushes
+                    self.assertEqual(conn.execute('SELECT COUNT(*) FROM "cppreference.com"').fetchone()[0], 2)  # fmt: off
+                    journal.fetched(self.records[1], 1)
+                with sqlite3.connect(path) as conn:
+                    self.assertEqual(conn.execute('SELECT COUNT(*) FROM "cppreference.com" WHERE state = ?', ("fetched",)).fetchone()[0], 1)  # fmt: off
+            with sqlite3.connect(path) as conn:
+                self.assertEqual(conn.execute('SELECT COUNT(*) FROM "cppreference.com" WHERE state = ?', ("fetched",)).fetchone()[0], 2)  # fmt: off
+
+    def test_adopt(self):
+        with tempfile.TemporaryDirectory() as root:
+            html, man3 = Path(root, "html"), Path(root, "man3")
+            html.mkdir()
+            man3.mkdir()
+            Utils.write_file(html.joinpath("1.html"), "<html></html>")
+            Utils.write_file(html.joinpath("2.html"), "<html></html>")
+            Utils.write_bytes(man3.joinpath("2.3.gz"), Utils.pack_man3("2.3.gz", lambda write: write(".TH")))  # fmt: off
+            self.assertEqual(sorted(p.name for p in html.iterdir()), ["1.html", "2.html"])  # no leftovers
+
+            with JournalContext("cppreference", Path(root, "journal.db")) as journal:
+                journal.failed(self.records[2], "RequestError()")
+                entries = journal.entries(self.records, lambda r: html.joinpath(f"{r.id}.html"), lambda r: man3.joinpath(f"{r.id}.3.gz"))  # fmt: off
+                self.assertEqual(set(entries), {1, 2, 3})
+                self.assertEqual((entries[1].state, entries[1].html, entries[1].man3), ("fetched", 13, None))  # fmt: off
+                self.assertEqual(entries[2].state, "rendered")
+                self.assertEqual(entries[2].man3, man3.joinpath("2.3.gz").stat().st_size)
+                self.assertEqual(entries[3].state, "failed")
+
+                # the files adopted are looked up again, until a run writes them
+                man3.joinpath("2.3.gz").unlink()
+                entries = journal.entries(self.records, lambda r: html.joinpath(f"{r.id}.html"), lambda r: man3.joinpath(f"{r.id}.3.gz"))  # fmt: off
+                self.assertEqual((entries[2].state, entries[2].man3), ("fetched", None))
+                html.joinpath("1.html").unlink()
+                self.assertNotIn(1, journal.entries(self.records, lambda r: html.joinpath(f"{r.id}.html")))  # fmt: off
+
+                # the journal is trusted once a run started the record
+                journal.pending([self.records[1]])
+                journal.fetched(self.records[1], 13)
+                html.joinpath("2.html").unlink()
+                self.assertEqual(journal.entries(self.records, lambda r: html.joinpath(f"{r.id}.html"))[2].html, 13)  # fmt: off
+
+
+class ParseTest(TestBase):
+    def test_journaled(self):
+        records = [Record(1, "std::vector", "https://en.cppreference.com/w/cpp/container/vector"), Record(2, "std::map", "https://en.cppreference.com/w/cpp/container/map")]  # fmt: off
+        with Sandbox(records) as sandbox:
+            sandbox.html(records[0]).parent.mkdir(parents=True)
+            sandbox.html(records[0]).write_text(page("std::vector"), encoding="utf-8")
+            sandbox.html(records[1]).write_text("<html><body><p>std::map</p></body></html>", encoding="utf-8")  # fmt: off
+            with JournalContext("cppreference", ConfContext.journal()) as journal:
+                journal.pending(records[:1])  # fetched by a run, not adopted
+                journal.fetched(records[0], sandbox.html(records[0]).stat().st_size)
+            sandbox.run("parse", jobs=1)
+            with JournalContext("cppreference", ConfContext.journal()) as journal:
+                entries = journal.entries(records)
+            self.assertEqual(entries[1].state, "rendered")
+            self.assertEqual(entries[2].state, "failed")
+            self.assertIn("record=", entries[2].error)
+
+            # a manual page removed is rendered again, even though the journal has it
+            sandbox.html(records[1]).unlink()
+            sandbox.man3(records[0]).unlink()
+            sandbox.run("parse", jobs=1)
+            self.assertTrue(sandbox.man3(records[0]).exists())
+            self.assertEqual(sandbox.run("parse", jobs=1), "Nothing to parse.")
@@ -0,0 +1,66 @@
+import gzip
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import cppref.core
+from cppref.manifest import ManifestContext
+from cppref.typing_ import Record
+from tests.helpers import Sandbox, TestBase, page
+
+
+class ManifestTest(TestBase):
+    def test_outdated(self):
+        record = Record(1, "C++ reference", "https://en.cppreference.com/w/cpp.html")
+        digest = ManifestContext.digest(b"<html></html>")
+        with tempfile.TemporaryDirectory() as root:
+            path = Path(root).joinpath("cppref", "manifest.db")
+            with ManifestContext("cppreference", path) as manifest:
+                self.assertTrue(manifest.outdated(record, digest))
+                self.assertTrue(manifest.outdated(record))
+                manifest.update([(record, digest)])
+
+            with ManifestContext("cppreference", path) as manifest:
+                self.assertFalse(manifest.outdated(record, digest))
+                self.assertFalse(manifest.outdated(record))
+                self.assertTrue(manifest.outdated(record, ManifestContext.digest(b"")))
+                manifest._conn.execute('UPDATE "cppreference.com" SET renderer = ?', ("",))  # fmt: off
+                self.assertTrue(manifest.outdated(record, digest))
+
+    def test_renderer(self):
+        self.assertEqual(ManifestContext.renderer(), ManifestContext.renderer.__wrapped__())  # fmt: off
+        with tempfile.TemporaryDirectory() as root:
+            core = Path(root).joinpath("core")
+            shutil.copytree(Path(cppref.core.__file__).parent, core, ignore=shutil.ignore_patterns("__pycache__"))  # fmt: off
+            try:
+                with patch.object(cppref.core, "__file__", str(core.joinpath("__init__.py"))):  # fmt: off
+                    ManifestContext.renderer.cache_clear()
+                    before = ManifestContext.renderer()
+                    handler = core.joinpath("cppreference", "div.py")
+                    handler.write_text(f"{handler.read_text()}\n# changed\n")
+                    self.assertEqual(ManifestContext.renderer(), before)  # cached
+                    ManifestContext.renderer.cache_clear()
+                    self.assertNotEqual(ManifestContext.renderer(), before)
+            finally:
+                ManifestContext.renderer.cache_clear()
+
+
+class ParseTest(TestBase):
+    def test_outdated(self):
+        records = [Record(1, "std::vector", "https://en.cppreference.com/w/cpp/container/vector"), Record(2, "std::map", "https://en.cppreference.com/w/cpp/container/map")]  # fmt: off
+        with Sandbox(records) as sandbox:
+            for record in records:
+                sandbox.html(record).parent.mkdir(parents=True, exist_ok=True)
+                sandbox.html(record).write_text(page(record.title), encoding="utf-8")
+            sandbox.run("parse", jobs=1)
+            inodes = [sandbox.man3(r).stat().st_ino for r in records]
+            self.assertEqual(sandbox.run("parse", jobs=1), "Nothing to parse.")
+
+            # only the page changed is rendered again
+            sandbox.html(records[1]).write_text(page("std::multimap"), encoding="utf-8")
+            sandbox.run("parse", jobs=1)
+            self.assertEqual(sandbox.man3(records[0]).stat().st_ino, inodes[0])
+            self.assertNotEqual(sandbox.man3(records[1]).stat().st_ino, inodes[1])
+            self.assertIn(b"std::multimap", gzip.decompress(sandbox.man3(records[1]).read_bytes()))  # fmt: off
+            self.assertEqual(sandbox.run("parse", jobs=1), "Nothing to parse.")
@@ -0,0 +1,68 @@
+import gzip
+import hashlib
+
+from tests.helpers import HttpServer, Sandbox, TestBase, page
+
+
+class ValidatingServer(HttpServer):
+    """Sends the validators of the pages, and 304 to the requests they still match."""
+
+    def __init__(self, pages: dict[str, str], etags: bool = True) -> None:
+        super().__init__(pages)
+        self.etags = etags
+        self.statuses = list[tuple[str, int]]()
+
+    def respond(self, handler):
+        if (content := self.pages.get(handler.path)) is None:
+            return super().respond(handler)
+        etag = f'"{hashlib.md5(content.encode()).hexdigest()}"'
+        if self.etags and handler.headers.get("If-None-Match") == etag:
+            status, headers, body = 304, {"ETag": etag}, b""
+        else:
+            status, headers, body = super().respond(handler)
+            if self.etags:
+                headers["ETag"] = etag
+            headers["Last-Modified"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+        self.statuses.append((handler.path, status))
+        return status, headers, body
+
+
+class RefreshTest(TestBase):
+    def setUp(self) -> None:
+        self.pages = {f"/w/cpp/{i}.html": page(f"std::page{i}") for i in range(1, 7)}
+
+    def test_refresh(self):
+        with ValidatingServer(self.pages) as server:
+            records = server.records(self.pages)
+            with Sandbox(records) as sandbox:
+                sandbox.run("fetch", engine="http")
+                sandbox.run("parse", jobs=1)
+                before = {r.id: sandbox.man3(r).read_bytes() for r in records}
+
+                server.pages["/w/cpp/2.html"] = page("std::changed")
+                server.statuses.clear()
+                summary = sandbox.run("refresh")
+
+                self.assertIn("0 failed", summary)
+                self.assertIn("5 unchanged, 1 modified", summary)
+                # nothing but the modified page was downloaded
+                self.assertEqual(sorted(s for _, s in server.statuses), [200] + [304] * 5)  # fmt: off
+                self.assertEqual(sandbox.html(records[1]).read_text(), page("std::changed"))  # fmt: off
+                self.assertIn("std::changed", gzip.decompress(sandbox.man3(records[1]).read_bytes()).decode())  # fmt: off
+                for record in records[2:]:
+                    self.assertEqual(sandbox.man3(record).read_bytes(), before[record.id])
+
+                summary = sandbox.run("refresh")
+                self.assertIn("6 unchanged, 0 modified", summary)
+
+    def test_without_validators(self):
+        """The pages are compared by their digests when the server sends no ETag."""
+        with ValidatingServer(self.pages, etags=False) as server:
+            records = server.records(self.pages)
+            with Sandbox(records) as sandbox:
+                sandbox.run("cache", engine="http")
+                server.pages["/w/cpp/3.html"] = page("std::changed")
+                summary = sandbox.run("refresh")
+                self.assertIn("5 unchanged, 1 modified", summary)
+                self.assertFalse(sandbox.html(records[2]).exists())  # only the manual page was cached
+                self.assertIn("std::changed", gzip.decompress(sandbox.man3(records[2]).read_bytes()).decode())  # fmt: off
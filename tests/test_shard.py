@@ -0,0 +1,64 @@
+import os
+from functools import partial
+
+from cppref.shard import ShardContext
+from cppref.typing_ import Record
+from cppref.utils import Limiter, RequestError
+from tests.helpers import HttpServer, TestBase, page
+
+
+def heading(record: Record, resp: str) -> tuple[int, str]:
+    """Made of the pages in the workers, tells which process fetched them."""
+    return os.getpid(), resp[resp.index("<h1") : resp.index("</h1>")]
+
+
+def broken(record: Record, resp: str) -> str:
+    raise AssertionError(f"Unknown page {record.title}")
+
+
+def crash(record: Record, resp: str) -> str:
+    os._exit(3)
+
+
+class ShardContextTest(TestBase):
+    def setUp(self) -> None:
+        self.pages = {f"/w/cpp/{i}.html": page(f"std::page{i}") for i in range(1, 41)}
+
+    def shard(self, server: HttpServer, paths: list[str], prepare, workers: int = 3):
+        records = server.records(paths)
+        limiter = partial(Limiter.of, 2)
+        with ShardContext(workers, records, limiter, prepare, timeout=5000, engine="http") as shards:  # fmt: off
+            results = dict(shards)
+            limit = shards.limit
+        return records, results, shards.stats, limit
+
+    def test_shard(self):
+        paths = [*self.pages, "/w/cpp/missing.html"]
+        with HttpServer(self.pages) as server:
+            records, results, stats, limit = self.shard(server, paths, heading)
+
+        self.assertEqual(len(results), 41)
+        self.assertEqual(stats["requests"], 41)
+        self.assertEqual(limit, 6)
+        # failures come back with their status
+        self.assertIsInstance(results[records[-1]], RequestError)
+        self.assertEqual(results[records[-1]].status, 404)
+        pids = {results[r][0] for r in records[:-1]}
+        self.assertEqual(len(pids), 3)
+        self.assertNotIn(os.getpid(), pids)
+        for record in records[:-1]:
+            self.assertIn(f"std::page{record.id}", results[record][1])
+
+    def test_prepare_failed(self):
+        with HttpServer(self.pages) as server:
+            records, results, _, _ = self.shard(server, list(self.pages)[:4], broken, 2)
+        self.assertEqual(set(results), set(records))
+        for record in records:
+            self.assertIsInstance(results[record], AssertionError)
+            self.assertIn(record.title, str(results[record]))
+
+    def test_crashed(self):
+        with HttpServer(self.pages) as server:
+            records, results, _, _ = self.shard(server, list(self.pages)[:4], crash, 2)
+        self.assertEqual(set(results), set(records))
+        self.assertIn("exited with 3", str(results[records[0]]))
@@ -0,0 +1,89 @@
+import gzip
+
+from cppref.index import IndexContext
+from cppref.typing_ import Record
+from cppref.utils import Utils
+from tests.helpers import HttpServer, Sandbox, TestBase, page
+
+
+class UpdateTest(TestBase):
+    def setUp(self) -> None:
+        self.pages = {f"/w/cpp/{i}": page(f"std::page{i}") for i in range(1, 8)}
+
+    def records(self, server: HttpServer) -> tuple[list[Record], list[Record]]:
+        current = [Record(i, f"std::page{i}", server.url(f"/w/cpp/{i}")) for i in range(1, 6)]  # fmt: off
+        newer = [
+            current[0],
+            current[1]._replace(title="std::renamed"),
+            current[2]._replace(url=server.url("/w/cpp/7")),  # moved
+            current[4]._replace(url=server.url("/w/cpp/5/")),  # the same page
+            Record(6, "std::page6", server.url("/w/cpp/6")),
+        ]
+        return current, newer
+
+    def test_diff(self):
+        with HttpServer(self.pages) as server:
+            current, newer = self.records(server)
+            with Sandbox(current) as sandbox:
+                path = sandbox.root.joinpath("new-index.db")
+                sandbox.index(path, newer)
+                diff = IndexContext.diff("cppreference", sandbox.root.joinpath("share", "cppref", "index.db"), path)  # fmt: off
+                self.assertEqual(diff.added, [newer[4]])
+                self.assertEqual(diff.moved, [newer[2]])
+                self.assertEqual(diff.renamed, [newer[1], newer[3]])
+                self.assertEqual(diff.removed, [current[3]])
+                self.assertEqual(diff.unchanged, 1)
+                self.assertEqual(str(diff), "1 added, 1 moved, 2 renamed, 1 removed, 1 unchanged")  # fmt: off
+
+    def test_update(self):
+        with HttpServer(self.pages) as server:
+            current, newer = self.records(server)
+            with Sandbox(current) as sandbox:
+                sandbox.run("fetch", engine="http")
+                sandbox.run("parse", jobs=1)
+                path, dbfile = sandbox.root.joinpath("new-index.db"), sandbox.root.joinpath("share", "cppref", "index.db")  # fmt: off
+                sandbox.index(path, newer)
+
+                server.requests.clear()
+                summary = sandbox.run("update", dry_run=True, **{"from": str(path)})
+                self.assertEqual(summary, f"Updating from {path}: 1 added, 1 moved, 2 renamed, 1 removed, 1 unchanged.")  # fmt: off
+                self.assertEqual(Utils.query("cppreference", dbfile), current)
+                self.assertTrue(sandbox.man3(current[3]).exists())
+
+                before = {r.id: sandbox.man3(r).read_bytes() for r in current}
+                summary = sandbox.run("update", engine="http", **{"from": str(path)})
+                self.assertEqual(summary, "Updated 2 page(s), rendered 1 again from the cache, removed the pages of 1 record(s), 0 after retrying, 0 failed.")  # fmt: off
+                # only the pages of the added and the moved are fetched
+                self.assertEqual(sorted(p for p, _ in server.requests), ["/w/cpp/6", "/w/cpp/7"])  # fmt: off
+                self.assertEqual(Utils.query("cppreference", dbfile), newer)
+                self.assertFalse(sandbox.man3(current[3]).exists())
+                self.assertFalse(sandbox.html(current[3]).exists())
+                self.assertIn("std::page7", gzip.decompress(sandbox.man3(newer[2]).read_bytes()).decode())  # fmt: off
+                self.assertIn("std::page7", sandbox.html(newer[2]).read_text())
+                self.assertIn("std::page6", gzip.decompress(sandbox.man3(newer[4]).read_bytes()).decode())  # fmt: off
+                self.assertFalse(sandbox.html(newer[4]).exists())
+                for record in (newer[0], newer[1]):
+                    self.assertEqual(sandbox.man3(record).read_bytes(), before[record.id])
+                # the page shows its url, as written in the new index
+                self.assertIn(f'"{newer[3].url}"', gzip.decompress(sandbox.man3(newer[3]).read_bytes()).decode())  # fmt: off
+
+                # everything is up to date with the new index
+                self.assertEqual(sandbox.run("parse", jobs=1), "Nothing to parse.")
+                summary = sandbox.run("update", **{"from": str(path)})
+                self.assertEqual(summary, "Removed the pages of 0 record(s), nothing to fetch.")  # fmt: off
+
+    def test_rewritten(self):
+        with HttpServer({**self.pages, "/w/cpp/5/": self.pages["/w/cpp/5"]}) as server:
+            current, newer = self.records(server)
+            with Sandbox(current) as sandbox:
+                sandbox.run("fetch", engine="http")
+                path = sandbox.root.joinpath("new-index.db")
+                sandbox.index(path, newer)
+                sandbox.html(current[4]).unlink()
+
+                server.requests.clear()
+                summary = sandbox.run("update", engine="http", **{"from": str(path)})
+                self.assertEqual(summary, "Updated 3 page(s), removed the pages of 1 record(s), 0 after retrying, 0 failed.")  # fmt: off
+                # not cached, the page is fetched again to show its url
+                self.assertEqual(sorted(p for p, _ in server.requests), ["/w/cpp/5/", "/w/cpp/6", "/w/cpp/7"])  # fmt: off
+                self.assertIn(f'"{newer[3].url}"', gzip.decompress(sandbox.man3(newer[3]).read_bytes()).decode())  # fmt: off
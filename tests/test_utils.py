@@ -36,13 +36,6 @@ class UtilsTest(TestBase):
         self.assertEqual(records[0].id, 1)
         self.assertEqual(records[0].title, "Reference")
 
-    def test_fetch(self):
-        dbfile = self.get_root().joinpath("testdata", "index.db")
-
-        record = Utils.query("cppreference", dbfile)[0]
-        webpage = Utils.fetch(record, 10)
-        self.assertTrue(webpage.startswith("<!DOCTYPE html>\n<html"))
-
     def test_afetch(self):
         dbfile = self.get_root().joinpath("testdata", "index.db")
         record = Utils.query("cppreference", dbfile)[0]